@@ -0,0 +1,220 @@
+"""
+Admission Control for LLM-bound Work
+Bounded gateway concurrency, per-user rate limits and intent priorities
+
+- TokenBucket / UserRateLimiter: per-user request rate limiting at the API edge
+- PriorityLimiter: bounded number of concurrent LLM calls; waiting calls are
+  served in priority order so money-moving intents are not starved by bursts
+  of FAQ questions, and new work is rejected once the wait queue is full
+- estimate_priority(): cheap keyword guess used before the intent is known
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from request_budget import DeadlineExceeded
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+USER_RATE_PER_S = float(os.getenv("USER_RATE_PER_S", "1.0"))
+USER_BURST = int(os.getenv("USER_BURST", "5"))
+
+# Lower value = served first
+INTENT_PRIORITY = {
+    "transfer_funds": 0,
+    "make_payment": 0,
+    "check_balance": 1,
+    "view_transactions": 1,
+    "spending_insights": 1,
+    "loan_inquiry": 2,
+    "credit_inquiry": 2,
+    "general_question": 3,
+}
+DEFAULT_PRIORITY = 3
+
+_PRIORITY_KEYWORDS = [
+    (0, ["transfer", "send", "pay", "भेजें", "ट्रांसफर", "મોકલો", "ટ્રાન્સફર"]),
+    (1, ["balance", "transaction", "history", "spend", "spent", "बैलेंस", "लेनदेन", "खर्च", "બેલેન્સ",
+         "વ્યવહાર", "ખર્ચ"]),
+    (2, ["loan", "emi", "credit", "card", "लोन", "क्रेडिट", "લોન", "ક્રેડિટ"]),
+]
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when LLM work is shed because the wait queue is full"""
+
+
+def intent_priority(intent: Optional[str]) -> int:
+    return INTENT_PRIORITY.get(intent or "", DEFAULT_PRIORITY)
+
+
+def estimate_priority(user_input: Optional[str]) -> int:
+    """Keyword-based priority guess for requests whose intent is not known yet"""
+    text = (user_input or "").lower()
+    for priority, keywords in _PRIORITY_KEYWORDS:
+        if any(word in text for word in keywords):
+            return priority
+    return DEFAULT_PRIORITY
+
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe on its own"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def available(self, now: float) -> float:
+        """Tokens the bucket holds at time now (refill included)"""
+        return min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available; returns 0 on success, else seconds until available"""
+        now = time.monotonic()
+        self.tokens = self.available(now)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class UserRateLimiter:
+    """One token bucket per user id"""
+
+    def __init__(self, rate: float = USER_RATE_PER_S, burst: int = USER_BURST, max_users: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def check(self, key: str) -> float:
+        """Returns 0 if the request is allowed, else the Retry-After delay in seconds"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_users:
+                    self._evict(time.monotonic())
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket.try_acquire()
+
+    def _evict(self, now: float):
+        # Buckets that have refilled carry no state worth keeping
+        self._buckets = {k: b for k, b in self._buckets.items() if b.available(now) < b.capacity}
+        if len(self._buckets) >= self.max_users:
+            # Still full of recently active keys: drop the longest idle half
+            idle_first = sorted(self._buckets, key=lambda k: self._buckets[k].updated)
+            for key in idle_first[:len(idle_first) // 2 + 1]:
+                del self._buckets[key]
+
+
+# ============================================================================
+# PRIORITY CONCURRENCY LIMITER
+# ============================================================================
+
+class _Slot:
+    """A held concurrency slot; release() is idempotent"""
+
+    __slots__ = ("_limiter", "_released")
+
+    def __init__(self, limiter: "PriorityLimiter"):
+        self._limiter = limiter
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release()
+
+
+class PriorityLimiter:
+    """Semaphore with a bounded, priority-ordered wait queue"""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiters = []  # heap of [priority, seq]
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    def overloaded(self) -> bool:
+        """True when new LLM work would be rejected"""
+        with self._cond:
+            return self._active >= self.max_concurrency and len(self._waiters) >= self.max_queue
+
+    def acquire(self, priority: int, timeout: Optional[float] = None) -> _Slot:
+        """
+        Wait for a slot. Raises AdmissionRejected if the queue is full and
+        DeadlineExceeded if no slot frees up within timeout seconds.
+        """
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self.admitted += 1
+                return _Slot(self)
+            if len(self._waiters) >= self.max_queue:
+                self.shed += 1
+                raise AdmissionRejected("LLM wait queue is full")
+
+            ticket = [priority, next(self._seq)]
+            heapq.heappush(self._waiters, ticket)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not (self._active < self.max_concurrency and self._waiters[0] is ticket):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self.timed_out += 1
+                    self._cond.notify_all()
+                    raise DeadlineExceeded("Timed out waiting for an LLM slot")
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiters)
+            self._active += 1
+            self.admitted += 1
+            self._cond.notify_all()
+            return _Slot(self)
+
+    def try_acquire(self) -> Optional[_Slot]:
+        """A slot if one is free with nobody waiting, else None; never queues"""
+        with self._cond:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self.admitted += 1
+                return _Slot(self)
+            return None
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": len(self._waiters),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "timed_out": self.timed_out,
+            }
@@ -9,6 +9,19 @@ let voiceBotVisible = false;
 // API Configuration - Update this to match your backend endpoint
 const API_BASE_URL = 'http://localhost:8000'; // Change to your Flask/FastAPI backend URL
 
+// Authorization header for the signed session token issued at login
+function authHeaders(headers = {}) {
+    const token = sessionStorage.getItem('sessionToken');
+    return token ? { ...headers, 'Authorization': `Bearer ${token}` } : headers;
+}
+
+// Expired or invalid session: back to the logged-out view
+function handleUnauthorized(response) {
+    if (response.status !== 401 || !isAuthenticated) return false;
+    logout();
+    return true;
+}
+
 // Initialize the application
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Next Gen Indian Banking Website Loaded');
@@ -89,6 +102,10 @@ async function toggleVoiceRecording() {
                 };
                 
                 recognition.start();
+            } else if (navigator.mediaDevices && window.MediaRecorder) {
+                // No browser speech recognition: record audio and let the
+                // backend transcribe it with Whisper
+                await startAudioRecording();
             } else {
                 alert('Voice recognition is not supported in your browser. Please use Chrome or Edge.');
                 isRecording = false;
@@ -104,8 +121,103 @@ async function toggleVoiceRecording() {
             botStatus.textContent = 'Error';
         }
     } else {
-        // Stop recording (handled by recognition.onend)
+        // Stop recording (handled by recognition.onend or mediaRecorder.onstop)
         isRecording = false;
+        if (mediaRecorder && mediaRecorder.state === 'recording') {
+            mediaRecorder.stop();
+        }
+    }
+}
+
+// MediaRecorder fallback: record compressed audio (Opus/WebM where available)
+let mediaRecorder = null;
+
+async function startAudioRecording() {
+    const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    const mimeType = MediaRecorder.isTypeSupported('audio/webm;codecs=opus') ? 'audio/webm;codecs=opus' : '';
+    const chunks = [];
+    
+    mediaRecorder = new MediaRecorder(stream, mimeType ? { mimeType } : undefined);
+    mediaRecorder.ondataavailable = event => {
+        if (event.data.size > 0) chunks.push(event.data);
+    };
+    mediaRecorder.onstop = async () => {
+        stream.getTracks().forEach(track => track.stop());
+        isRecording = false;
+        document.getElementById('voiceBtn').classList.remove('recording');
+        document.getElementById('voiceIndicator').classList.remove('active');
+        
+        const audioBlob = new Blob(chunks, { type: mediaRecorder.mimeType || 'audio/webm' });
+        await processVoiceAudio(audioBlob);
+    };
+    mediaRecorder.start();
+}
+
+// Upload recorded audio as a raw binary body (no base64/JSON wrapping)
+async function processVoiceAudio(audioBlob) {
+    const botStatus = document.getElementById('botStatus');
+    botStatus.textContent = 'Processing...';
+    
+    try {
+        const currentLang = typeof getCurrentLanguage === 'function' ? getCurrentLanguage() : 'en';
+        const params = new URLSearchParams({
+            language: currentLang,
+            thread_id: `session_${Date.now()}`
+        });
+        // The server takes the user from the session token
+        const response = await fetch(`${API_BASE_URL}/api/voice-banking/audio?${params}`, {
+            method: 'POST',
+            headers: authHeaders({
+                'Content-Type': audioBlob.type
+            }),
+            body: audioBlob
+        });
+        
+        if (handleUnauthorized(response)) {
+            botStatus.textContent = 'Ready to help';
+            return;
+        }
+        if (!response.ok) {
+            throw new Error('Backend API error');
+        }
+        
+        const result = await response.json();
+        if (result.transcribed_text) {
+            addUserMessage(result.transcribed_text);
+        }
+        handleAssistantResult(result, currentLang);
+    } catch (error) {
+        console.error('Error processing voice audio:', error);
+        addBotMessage('Sorry, I couldn\'t understand that. Please try again.');
+    }
+    
+    botStatus.textContent = 'Ready to help';
+}
+
+// Render an assistant response and update the dashboard
+function handleAssistantResult(result, currentLang) {
+    if (!result.response) return;
+    
+    addBotMessage(result.response);
+    
+    // Update UI if balance or transaction data is returned
+    if (result.account_balance) {
+        updateAccountBalance(result.account_balance);
+    }
+    
+    if (result.transaction_history) {
+        updateTransactionHistory(result.transaction_history);
+    } else if (currentUser && result.intent === 'transfer_funds') {
+        // Cheap when nothing changed: the server answers 304
+        loadUserTransactions(currentUser.user_id);
+    }
+    
+    // Prefer the server's streamed TTS audio; fall back to browser speech
+    if (result.tts_audio) {
+        const audio = new Audio(`${API_BASE_URL}${result.tts_audio}`);
+        audio.play().catch(() => speakText(result.response, currentLang));
+    } else {
+        speakText(result.response, currentLang);
     }
 }
 
@@ -121,17 +233,20 @@ async function processVoiceQuery(query) {
         // Call backend API
         const response = await fetch(`${API_BASE_URL}/api/voice-banking`, {
             method: 'POST',
-            headers: {
+            headers: authHeaders({
                 'Content-Type': 'application/json',
-            },
+            }),
             body: JSON.stringify({
                 user_input: query,
-                user_id: isAuthenticated ? currentUser.user_id : null,
                 thread_id: `session_${Date.now()}`,
                 language: currentLang
             })
         });
         
+        if (handleUnauthorized(response)) {
+            botStatus.textContent = 'Ready to help';
+            return;
+        }
         if (!response.ok) {
             throw new Error('Backend API error');
         }
@@ -139,21 +254,7 @@ async function processVoiceQuery(query) {
         const result = await response.json();
         
         // Add bot response to chat
-        if (result.response) {
-            addBotMessage(result.response);
-            
-            // Update UI if balance or transaction data is returned
-            if (result.account_balance) {
-                updateAccountBalance(result.account_balance);
-            }
-            
-            if (result.transaction_history) {
-                updateTransactionHistory(result.transaction_history);
-            }
-            
-            // Text-to-speech for response (use appropriate language)
-            speakText(result.response, currentLang);
-        }
+        handleAssistantResult(result, currentLang);
         
         botStatus.textContent = 'Ready to help';
         
@@ -420,6 +521,7 @@ function logout() {
     
     sessionStorage.removeItem('isAuthenticated');
     sessionStorage.removeItem('currentUser');
+    sessionStorage.removeItem('sessionToken');
     
     document.getElementById('dashboard').classList.add('hidden');
     document.querySelector('.hero').style.display = 'block';
@@ -461,20 +563,37 @@ function checkAuthStatus() {
     const authStatus = sessionStorage.getItem('isAuthenticated');
     const userData = sessionStorage.getItem('currentUser');
     
-    if (authStatus === 'true' && userData) {
+    if (authStatus === 'true' && userData && sessionStorage.getItem('sessionToken')) {
         isAuthenticated = true;
         currentUser = JSON.parse(userData);
         showDashboard();
     }
 }
 
+// Last transaction page per user, revalidated with If-None-Match
+const transactionCache = {};
+
 async function loadUserTransactions(userId) {
     try {
-        const response = await fetch(`${API_BASE_URL}/api/transactions/${userId}`);
+        const cached = transactionCache[userId];
+        const headers = cached ? { 'If-None-Match': cached.etag } : {};
+        const params = new URLSearchParams({ limit: 5, fields: 'date,type,amount,description' });
+        const response = await fetch(`${API_BASE_URL}/api/transactions/${userId}?${params}`, { headers: authHeaders(headers), cache: 'no-store' });
+        
+        if (handleUnauthorized(response)) return;
+        if (response.status === 304 && cached) {
+            updateTransactionHistory(cached.transactions);
+            return;
+        }
+        
         const data = await response.json();
         
         if (data.success && data.transactions) {
-            updateTransactionHistory(data.transactions.slice(0, 5)); // Show last 5 transactions
+            const etag = response.headers.get('ETag');
+            if (etag) {
+                transactionCache[userId] = { etag, transactions: data.transactions };
+            }
+            updateTransactionHistory(data.transactions); // Show last 5 transactions
         }
     } catch (error) {
         console.error('Error loading transactions:', error);
@@ -537,38 +656,29 @@ async function handleLogin(event) {
     const username = document.getElementById('username').value.trim().toLowerCase();
     const password = document.getElementById('password').value;
     
-    // Mock user database (in production, this would be handled by backend)
-    const users = {
-        'neha': {
-            password: 'neha123',
-            user_id: 'neha',
-            name: 'Neha Sharma',
-            account_number: 'NGB001234567890',
-            balance: 125000.00,
-            phone: '+91-9876543210',
-            email: 'neha.sharma@email.com'
-        },
-        'niyati': {
-            password: 'niyati123',
-            user_id: 'niyati',
-            name: 'Niyati Patel',
-            account_number: 'NGB009876543210',
-            balance: 87500.00,
-            phone: '+91-9123456789',
-            email: 'niyati.patel@email.com'
-        }
-    };
+    let result = null;
+    try {
+        const response = await fetch(`${API_BASE_URL}/api/authenticate`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ username, password })
+        });
+        result = await response.json();
+    } catch (error) {
+        console.error('Error during login:', error);
+        alert('Login service is unavailable. Please try again later.');
+        return;
+    }
     
-    // Validate credentials
-    if (users[username] && users[username].password === password) {
+    if (result && result.success) {
         // Login successful
-        const user = users[username];
-        delete user.password; // Remove password from stored data
+        const user = result.user;
         
         currentUser = user;
         isAuthenticated = true;
         
-        // Save to session storage
+        // Save to session storage; the token is sent with every API call until it expires
+        sessionStorage.setItem('sessionToken', result.token);
         sessionStorage.setItem('isAuthenticated', 'true');
         sessionStorage.setItem('currentUser', JSON.stringify(currentUser));
         
@@ -600,6 +710,7 @@ function logout() {
     currentUser = null;
     sessionStorage.removeItem('isAuthenticated');
     sessionStorage.removeItem('currentUser');
+    sessionStorage.removeItem('sessionToken');
     
     // Clear chat history
     clearChat();
@@ -0,0 +1,164 @@
+"""
+ASR Engines
+Pluggable speech recognition backends for the speech agent
+
+- WhisperEngine:        openai-whisper (PyTorch, FP32 on CPU) - the original backend
+- FasterWhisperEngine:  faster-whisper (CTranslate2), int8-quantized on CPU by default
+
+The backend is chosen with ASR_BACKEND and the model size can be set per
+language, since Hindi and Gujarati need larger models than English:
+
+    ASR_BACKEND=faster-whisper
+    ASR_MODEL=tiny          # default / auto-detect
+    ASR_MODEL_HI=small
+    ASR_MODEL_GU=small
+
+Models are shared across requests and loaded once per size. preload()
+loads the models of the configured languages at startup, so the first
+Hindi or Gujarati turn does not spend its latency budget loading one;
+any other model is loaded on first use.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+logger = logging.getLogger("banking.asr")
+
+ASR_BACKEND = os.getenv("ASR_BACKEND", "whisper")
+ASR_MODEL = os.getenv("ASR_MODEL", "tiny")
+ASR_MODEL_BY_LANGUAGE = {
+    "en": os.getenv("ASR_MODEL_EN", ASR_MODEL),
+    "hi": os.getenv("ASR_MODEL_HI", "small"),
+    "gu": os.getenv("ASR_MODEL_GU", "small"),
+}
+ASR_COMPUTE_TYPE = os.getenv("ASR_COMPUTE_TYPE", "int8")
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", "0"))  # 0 = library default
+ASR_BEAM_SIZE = int(os.getenv("ASR_BEAM_SIZE", "1"))
+
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+class ASREngine:
+    """Base class: loads models per size and transcribes 16 kHz float32 audio"""
+
+    backend = "base"
+
+    def __init__(self, default_model: str = ASR_MODEL, models_by_language: Optional[Dict[str, str]] = None):
+        self.default_model = default_model
+        self.models_by_language = dict(ASR_MODEL_BY_LANGUAGE if models_by_language is None else models_by_language)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def model_name(self, language: Optional[str]) -> str:
+        return self.models_by_language.get(language or "", self.default_model)
+
+    def get_model(self, language: Optional[str] = None):
+        name = self.model_name(language)
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    logger.info("Loading %s ASR model '%s'", self.backend, name)
+                    model = self._models[name] = self._load_model(name)
+        return model
+
+    def preload(self, languages=None):
+        """Load the default model and those of the given (default: all configured) languages"""
+        for language in [None] + list(self.models_by_language if languages is None else languages):
+            self.get_model(language)
+
+    def loaded_models(self):
+        return list(self._models)
+
+    def model_bytes(self) -> Dict[str, Optional[int]]:
+        """Resident bytes per loaded model (None where the backend cannot tell)"""
+        return {name: self._model_bytes(model) for name, model in list(self._models.items())}
+
+    def _model_bytes(self, model) -> Optional[int]:
+        return None
+
+    def _load_model(self, name: str):
+        raise NotImplementedError
+
+    def load_audio(self, path: str) -> np.ndarray:
+        """Decode any ffmpeg-readable file to 16 kHz mono float32"""
+        raise NotImplementedError
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict[str, str]:
+        """Return {"text": ..., "language": ...}"""
+        raise NotImplementedError
+
+
+class WhisperEngine(ASREngine):
+    """openai-whisper running in PyTorch"""
+
+    backend = "whisper"
+
+    def _load_model(self, name: str):
+        import whisper
+        return whisper.load_model(name)
+
+    def load_audio(self, path: str) -> np.ndarray:
+        import whisper
+        return whisper.load_audio(path)
+
+    def _model_bytes(self, model) -> Optional[int]:
+        # Parameters plus buffers (mel filters, positional embeddings)
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict[str, str]:
+        result = self.get_model(language).transcribe(audio, language=language, fp16=False)
+        return {"text": result["text"].strip(), "language": result.get("language", language)}
+
+
+class FasterWhisperEngine(ASREngine):
+    """faster-whisper (CTranslate2) with quantized CPU inference"""
+
+    backend = "faster-whisper"
+
+    def __init__(self, *args, compute_type: str = ASR_COMPUTE_TYPE, cpu_threads: int = ASR_CPU_THREADS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+
+    def _load_model(self, name: str):
+        from faster_whisper import WhisperModel
+        return WhisperModel(name, device="cpu", compute_type=self.compute_type, cpu_threads=self.cpu_threads)
+
+    def load_audio(self, path: str) -> np.ndarray:
+        from faster_whisper import decode_audio
+        return decode_audio(path, sampling_rate=16000)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict[str, str]:
+        # Silence is already trimmed upstream, so the built-in VAD filter is off
+        segments, info = self.get_model(language).transcribe(
+            audio, language=language, beam_size=ASR_BEAM_SIZE, vad_filter=False
+        )
+        text = "".join(segment.text for segment in segments)
+        return {"text": text.strip(), "language": info.language or language}
+
+
+ASR_ENGINES = {
+    WhisperEngine.backend: WhisperEngine,
+    FasterWhisperEngine.backend: FasterWhisperEngine,
+}
+
+
+def create_asr_engine(backend: Optional[str] = None, **kwargs) -> ASREngine:
+    """Build the configured ASR engine (ASR_BACKEND by default)"""
+    backend = backend or ASR_BACKEND
+    if backend not in ASR_ENGINES:
+        raise ValueError(f"Unknown ASR backend '{backend}'. Choose one of: {', '.join(ASR_ENGINES)}")
+    return ASR_ENGINES[backend](**kwargs)
@@ -3,32 +3,345 @@ Flask Backend Server for Next Gen Indian Banking Website
 Integrates with LangGraph Banking Voice Assistant with Whisper ASR
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify
 from flask_cors import CORS
 import sys
 import os
 import tempfile
 import base64
+import glob
+import hashlib
+import hmac
+import time
+import uuid
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from log_config import bind_request_id, configure_logging, current_request_id, get_logger, logging_stats
+from request_budget import start_deadline
+from admission_control import UserRateLimiter, estimate_priority
+from memory_stats import MemoryInspector, checkpointer_stats, process_stats
+from serialization import install_json_provider
+from single_flight import SingleFlight
+from post_response import compliance_findings
+from session_tokens import AUTH_REQUIRED, InvalidToken, SessionTokens, verify_password
 
 # Add the parent directory to path to import the notebook functions
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+configure_logging()
+server_log = get_logger("server")
+
 # Import the banking assistant components
 try:
     # Import from the updated banking assistant backend with Whisper support
     from banking_assistant_backend import banking_assistant, BankingState
-    print("✅ Successfully imported LangGraph banking assistant with Whisper ASR")
+    server_log.info("Imported LangGraph banking assistant")
 except ImportError as e:
-    print(f"⚠️  Could not import LangGraph assistant: {e}")
-    print("   Will use mock responses mode")
+    server_log.warning("Could not import LangGraph assistant, using mock responses: %s", e)
     banking_assistant = None
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend access
+CORS(app, expose_headers=['ETag', 'X-Request-ID'])  # Enable CORS for frontend access
+json_provider = install_json_provider(app)  # orjson for jsonify() when installed
 
 # Store session data (in production, use Redis or database)
 sessions = {}
 
+# Per-user token buckets guarding /api/voice-banking
+rate_limiter = UserRateLimiter()
+
+# Concurrent identical account reads share one computation
+account_reads = SingleFlight('account_reads')
+
+# Signed session tokens issued by /api/authenticate, verified on every API call
+session_tokens = SessionTokens()
+
+# Endpoints reachable without a session token (the TTS player is an <audio>
+# element and cannot send headers; its job ids are unguessable)
+PUBLIC_ENDPOINTS = {'authenticate', 'health_check', 'tts_audio', 'metrics'}
+
+# Token-less voice turns are answered anonymously, without account data
+ANONYMOUS_ENDPOINTS = {'voice_banking', 'voice_banking_audio'}
+
+# Shared secret for /api/admin/* (unset = loopback clients only)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# tracemalloc snapshots for /api/admin/memory
+memory_inspector = MemoryInspector()
+
+# Largest audio upload accepted by the voice endpoints (bytes)
+MAX_AUDIO_BYTES = int(os.getenv('MAX_AUDIO_BYTES', str(10 * 1024 * 1024)))
+AUDIO_CHUNK_BYTES = 64 * 1024
+MULTIPART_OVERHEAD_BYTES = 64 * 1024  # boundaries, headers and metadata fields
+
+# Werkzeug enforces this before it buffers or parses any body, chunked ones
+# included; base64 audio in /api/voice-banking needs 4/3 of the audio size
+app.config['MAX_CONTENT_LENGTH'] = MAX_AUDIO_BYTES * 4 // 3 + MULTIPART_OVERHEAD_BYTES
+
+# Uploads are spooled to temp files with this prefix, so leaked ones can be counted
+AUDIO_TEMP_PREFIX = 'banking-audio-'
+
+# File suffixes let ffmpeg (used by Whisper) pick the right demuxer quickly
+AUDIO_SUFFIXES = {
+    'audio/webm': '.webm',
+    'audio/ogg': '.ogg',
+    'audio/opus': '.opus',
+    'audio/wav': '.wav',
+    'audio/x-wav': '.wav',
+    'audio/wave': '.wav',
+    'audio/mpeg': '.mp3',
+    'audio/mp4': '.m4a',
+    'audio/aac': '.aac',
+    'audio/flac': '.flac',
+}
+
+
+class AudioTooLarge(RequestEntityTooLarge):
+    """
+    Raised when an uploaded audio body exceeds MAX_AUDIO_BYTES. Not a
+    ValueError: Werkzeug's form parser would swallow that and leave
+    request.files empty.
+    """
+
+
+class AudioSpool:
+    """
+    Temp file for one audio upload that hashes and size-checks the bytes as
+    they are written; the content hash is the transcription cache key.
+    close() deletes the file unless keep() handed it over first, so uploads
+    of rejected requests are cleaned up with the request.
+    """
+
+    def __init__(self, mimetype):
+        suffix = AUDIO_SUFFIXES.get((mimetype or '').split(';')[0].strip().lower(), '.audio')
+        self._file = tempfile.NamedTemporaryFile(delete=False, prefix=AUDIO_TEMP_PREFIX, suffix=suffix)
+        self.name = self._file.name
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._kept = False
+
+    def write(self, data):
+        self._size += len(data)
+        if self._size > MAX_AUDIO_BYTES:
+            self.close()
+            raise AudioTooLarge(f'Audio exceeds {MAX_AUDIO_BYTES} bytes')
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        # read/seek/flush for Werkzeug's FileStorage
+        return getattr(self._file, name)
+
+    def keep(self):
+        """Returns (temp file path, sha256 hex digest); the caller deletes the file"""
+        self._kept = True
+        self._file.close()
+        return self.name, self._digest.hexdigest()
+
+    def close(self):
+        self._file.close()
+        if not self._kept and os.path.exists(self.name):
+            os.unlink(self.name)
+
+
+class AudioRequest(Request):
+    """Writes multipart audio parts straight into an AudioSpool (one copy)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'voice_banking_audio':
+            return AudioSpool(content_type)
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+app.request_class = AudioRequest
+
+
+def save_audio_stream(stream, mimetype):
+    """
+    Copy an audio stream to a temp file in fixed-size chunks, so the upload is
+    never held in memory as a whole.
+    Returns (temp file path, sha256 hex digest).
+    """
+    spool = AudioSpool(mimetype)
+    try:
+        while True:
+            chunk = stream.read(AUDIO_CHUNK_BYTES)
+            if not chunk:
+                break
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    return spool.keep()
+
+
+@app.before_request
+def bind_request_context():
+    """Correlate every log line of this request (all graph nodes included)"""
+    request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex[:16]
+    bind_request_id(request_id)
+
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = current_request_id()
+    return response
+
+
+@app.before_request
+def verify_session():
+    """Check the Bearer session token once per request; its claims go to g.session"""
+    g.session = None
+    path = request.path
+    if (request.method == 'OPTIONS' or not path.startswith('/api/') or path.startswith('/api/admin/')
+            or request.endpoint in PUBLIC_ENDPOINTS):
+        return None
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        try:
+            g.session = session_tokens.verify(token.strip())
+        except InvalidToken as e:
+            return unauthorized_response(str(e))
+        return None
+    if AUTH_REQUIRED and request.endpoint not in ANONYMOUS_ENDPOINTS:
+        return unauthorized_response('Authentication required')
+    return None
+
+
+def unauthorized_response(message):
+    response = jsonify({'error': 'Unauthorized', 'message': message})
+    response.headers['WWW-Authenticate'] = 'Bearer'
+    return response, 401
+
+
+def session_user_id(claimed):
+    """
+    The user a request acts for: the session token's subject, or None for an
+    anonymous caller. A user_id sent by the client must match the token.
+    Returns (user_id, error response or None).
+    """
+    claimed = claimed.lower() if claimed else None
+    if g.session is not None:
+        if claimed and claimed != g.session['sub']:
+            return None, (jsonify({'error': 'Forbidden'}), 403)
+        return g.session['sub'], None
+    if claimed and AUTH_REQUIRED:
+        return None, unauthorized_response('Authentication required')
+    return claimed, None
+
+
+def rate_limited_response(user_id):
+    """Return a 429 response if the caller is over its rate limit, else None"""
+    retry_after = rate_limiter.check(user_id or request.remote_addr or 'anonymous')
+    if not retry_after:
+        return None
+    response = jsonify({'error': 'Too many requests', 'retry_after': round(retry_after, 1)})
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response, 429
+
+
+def admin_denied_response():
+    """Return a 403 response unless the caller may use admin endpoints, else None"""
+    if ADMIN_TOKEN:
+        allowed = hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1')
+    if allowed:
+        return None
+    return jsonify({'error': 'Forbidden'}), 403
+
+
+def run_banking_assistant(user_input, audio_file_path, user_id, thread_id, language, deadline, audio_hash=None):
+    """
+    Run one turn of the LangGraph assistant and build the API response.
+    Removes the temporary audio file afterwards, even on errors.
+    """
+    from banking_assistant_backend import llm_admission, new_turn_state, post_response, request_profiler
+    
+    started = time.time()
+    try:
+        # Shed load when the LLM queue is full: run the graph with no LLM
+        # budget so every node takes its keyword/template fast path
+        degraded = llm_admission.overloaded()
+        if degraded:
+            server_log.warning("LLM queue full, serving request on the fast path")
+            deadline = 0.0
+        
+        initial_state = new_turn_state(
+            user_input=user_input or "",
+            audio_file=audio_file_path,  # Add audio file path for Whisper
+            audio_sha256=audio_hash,  # Transcription cache key
+            is_authenticated=True,  # Assuming user is authenticated via website
+            user_id=user_id,
+            session_token=thread_id,
+            voice_biometric_verified=True,
+            otp_verified=True,
+            security_level="high",
+            language=language,  # Add language preference (en, hi, gu)
+            deadline=deadline,  # Latency budget shared by all graph nodes
+            priority=estimate_priority(user_input)  # Refined once the intent is detected
+        )
+        
+        config = {"configurable": {"thread_id": thread_id}}
+        
+        # Opt-in profile of this graph run (near-zero cost when not chosen)
+        profile_mode = request_profiler.choose_mode(request.headers.get('X-Profile'))
+        capture, profile_token = (request_profiler.start(profile_mode, current_request_id())
+                                  if profile_mode else (None, None))
+        
+        # Invoke the LangGraph workflow
+        try:
+            result = banking_assistant.invoke(initial_state, config)
+            if capture is not None:
+                capture.tags.update(intent=result.get('detected_intent'), language=language, degraded=degraded)
+        finally:
+            if capture is not None:
+                request_profiler.finish(capture, profile_token)
+    finally:
+        # Clean up temporary audio file
+        if audio_file_path and os.path.exists(audio_file_path):
+            try:
+                os.unlink(audio_file_path)
+            except Exception as e:
+                server_log.warning("Could not delete temp audio file: %s", e)
+    
+    turn = {
+        'request_id': current_request_id(),
+        'user_id': user_id,
+        'thread_id': thread_id,
+        'intent': result.get('detected_intent'),
+        'intents': result.get('intents'),
+        'entities': result.get('entities'),
+        'response': result.get('response'),
+        'account_number': result.get('account_number'),
+        'is_authenticated': g.session is not None,
+        'degraded': degraded,
+        'latency_ms': round((time.time() - started) * 1000, 1)
+    }
+    # The rules are a few dict lookups and a regex; only the audit records
+    # and turn logs they produce are written off the request path
+    findings = compliance_findings(turn)
+    post_response.submit_turn({**turn, 'compliance_findings': findings})
+    
+    # Extract relevant information
+    return {
+        'response': result.get('response', 'I apologize, but I could not process your request.'),
+        'transcribed_text': result.get('transcribed_text'),
+        'audio_metrics': result.get('audio_metrics'),
+        'intent': result.get('detected_intent'),
+        'intents': result.get('intents'),
+        'confidence': result.get('intent_confidence'),
+        'account_balance': result.get('account_balance'),
+        'transaction_history': result.get('transaction_history'),
+        'entities': result.get('entities'),
+        'compliance_passed': not findings,
+        'tts_audio': result.get('tts_audio'),
+        'error': result.get('error'),
+        'degraded': degraded,
+        'profile_id': capture.id if capture is not None else None
+    }
+
+
 @app.route('/api/voice-banking', methods=['POST'])
 def voice_banking():
     """
@@ -36,33 +349,43 @@ def voice_banking():
     Receives user input (text or audio) and returns AI assistant response
     Supports multilingual responses (English, Hindi, Gujarati)
     Supports Whisper ASR for audio transcription
+    
+    Base64 `audio_data` is still accepted for older clients; new clients
+    should upload audio to /api/voice-banking/audio instead.
     """
     try:
+        deadline = start_deadline()  # Budget starts when the request arrives
         data = request.json
         user_input = data.get('user_input')
         audio_data = data.get('audio_data')  # Base64 encoded audio
-        user_id = data.get('user_id')  # Don't default to user_001
+        user_id, denied = session_user_id(data.get('user_id'))  # Don't default to user_001
+        if denied:
+            return denied
         thread_id = data.get('thread_id', f'session_{id(data)}')
         language = data.get('language', 'en')  # en, hi, gu
         
-        print(f"🔍 Received request - user_id: {user_id}, language: {language}, input: {user_input[:50] if user_input else 'audio'}")
+        server_log.info("voice-banking request user=%s language=%s input=%s", user_id, language, 'text' if user_input else 'audio')
+        
+        limited = rate_limited_response(user_id)
+        if limited:
+            return limited
         
         audio_file_path = None
+        audio_hash = None
         
         # Handle audio data if provided
         if audio_data:
             try:
                 # Decode base64 audio data
                 audio_bytes = base64.b64decode(audio_data.split(',')[1] if ',' in audio_data else audio_data)
+                audio_hash = hashlib.sha256(audio_bytes).hexdigest()
                 
                 # Save to temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
+                with tempfile.NamedTemporaryFile(delete=False, prefix=AUDIO_TEMP_PREFIX, suffix='.wav') as temp_audio:
                     temp_audio.write(audio_bytes)
                     audio_file_path = temp_audio.name
-                    
-                print(f"🎤 Received audio file: {audio_file_path}")
             except Exception as e:
-                print(f"❌ Error processing audio data: {e}")
+                server_log.warning("Invalid base64 audio data: %s", e)
                 return jsonify({'error': f'Invalid audio data: {str(e)}'}), 400
         
         if not user_input and not audio_file_path:
@@ -70,62 +393,7 @@ def voice_banking():
         
         # If banking_assistant is available, use it
         if banking_assistant:
-            initial_state = {
-                "user_input": user_input or "",
-                "audio_file": audio_file_path,  # Add audio file path for Whisper
-                "transcribed_text": None,
-                "messages": [],
-                "conversation_history": [],
-                "is_authenticated": True,  # Assuming user is authenticated via website
-                "user_id": user_id,
-                "session_token": thread_id,
-                "voice_biometric_verified": True,
-                "otp_verified": True,
-                "security_level": "high",
-                "detected_intent": None,
-                "intent_confidence": 0.0,
-                "entities": {},
-                "requires_clarification": False,
-                "clarification_question": None,
-                "account_number": None,
-                "account_balance": None,
-                "transaction_history": [],
-                "pending_transaction": None,
-                "retrieved_context": [],
-                "knowledge_base_results": [],
-                "response": "",
-                "tts_audio": None,
-                "next_action": "",
-                "current_node": "",
-                "error": None,
-                "compliance_check_passed": False,
-                "language": language  # Add language preference (en, hi, gu)
-            }
-            
-            config = {"configurable": {"thread_id": thread_id}}
-            
-            # Invoke the LangGraph workflow
-            result = banking_assistant.invoke(initial_state, config)
-            
-            # Clean up temporary audio file
-            if audio_file_path and os.path.exists(audio_file_path):
-                try:
-                    os.unlink(audio_file_path)
-                except Exception as e:
-                    print(f"⚠️ Could not delete temp audio file: {e}")
-            
-            # Extract relevant information
-            response_data = {
-                'response': result.get('response', 'I apologize, but I could not process your request.'),
-                'intent': result.get('detected_intent'),
-                'confidence': result.get('intent_confidence'),
-                'account_balance': result.get('account_balance'),
-                'transaction_history': result.get('transaction_history'),
-                'entities': result.get('entities'),
-                'compliance_passed': result.get('compliance_check_passed'),
-                'error': result.get('error')
-            }
-            
+            response_data = run_banking_assistant(user_input, audio_file_path, user_id, thread_id, language, deadline, audio_hash)
             return jsonify(response_data), 200
         
         else:
@@ -133,8 +401,69 @@ def voice_banking():
             response_data = generate_mock_response(user_input, user_id)
             return jsonify(response_data), 200
             
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Request exceeds {app.config["MAX_CONTENT_LENGTH"]} bytes'}), 413
+    except Exception as e:
+        server_log.exception("Error processing request")
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/voice-banking/audio', methods=['POST'])
+def voice_banking_audio():
+    """
+    Binary audio endpoint for voice banking queries
+    Accepts either a multipart form with an `audio` file part, or a raw
+    `audio/*` request body (e.g. audio/webm;codecs=opus from MediaRecorder).
+    Metadata (user_id, thread_id, language) comes from form fields or the
+    query string. The body is streamed to disk in chunks and handed to
+    Whisper (via ffmpeg) without base64 or JSON decoding.
+    """
+    try:
+        deadline = start_deadline()  # Budget starts when the request arrives
+        
+        # Reject oversized uploads before request.form buffers the body
+        multipart = request.mimetype == 'multipart/form-data'
+        limit = MAX_AUDIO_BYTES + (MULTIPART_OVERHEAD_BYTES if multipart else 0)
+        if request.content_length and request.content_length > limit:
+            return jsonify({'error': f'Audio exceeds {MAX_AUDIO_BYTES} bytes'}), 413
+        
+        params = request.form if multipart else request.args
+        user_id, denied = session_user_id(params.get('user_id'))
+        if denied:
+            return denied
+        thread_id = params.get('thread_id', f'session_{id(request)}')
+        language = params.get('language', 'en')  # en, hi, gu
+        
+        server_log.info("voice-banking audio request user=%s language=%s type=%s", user_id, language, request.mimetype)
+        
+        limited = rate_limited_response(user_id)
+        if limited:
+            return limited
+        
+        if not banking_assistant:
+            return jsonify({'error': 'Speech recognition is not available in mock mode'}), 503
+        
+        if multipart:
+            # Parsed into an AudioSpool already (see AudioRequest)
+            upload = request.files.get('audio')
+            if upload is None:
+                return jsonify({'error': 'Missing "audio" file part'}), 400
+            audio_file_path, audio_hash = upload.stream.keep()
+        elif request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream':
+            audio_file_path, audio_hash = save_audio_stream(request.stream, request.mimetype)
+        else:
+            return jsonify({'error': f'Unsupported content type: {request.mimetype}'}), 415
+        
+        response_data = run_banking_assistant(None, audio_file_path, user_id, thread_id, language, deadline, audio_hash)
+        return jsonify(response_data), 200
+    
+    except RequestEntityTooLarge:  # AudioTooLarge included
+        return jsonify({'error': f'Audio exceeds {MAX_AUDIO_BYTES} bytes'}), 413
     except Exception as e:
-        print(f"Error processing request: {str(e)}")
+        server_log.exception("Error processing audio request")
         return jsonify({
             'error': 'Internal server error',
             'message': str(e)
@@ -248,10 +577,24 @@ def generate_mock_response(user_input, user_id):
 def health_check():
     """Health check endpoint"""
     try:
-        from banking_assistant_backend import whisper_model
-        whisper_available = whisper_model is not None
+        from banking_assistant_backend import asr_engine
+        whisper_available = asr_engine is not None
+        asr_info = {
+            'backend': asr_engine.backend,
+            'models_by_language': asr_engine.models_by_language,
+            'loaded_models': asr_engine.loaded_models()
+        } if asr_engine else None
     except:
         whisper_available = False
+        asr_info = None
+    
+    try:
+        from banking_assistant_backend import llm_gateway, llm_admission
+        llm_circuit = llm_gateway.snapshot() if llm_gateway else None
+        llm_queue = llm_admission.snapshot()
+    except Exception:
+        llm_circuit = None
+        llm_queue = None
     
     return jsonify({
         'status': 'healthy',
@@ -259,32 +602,169 @@ def health_check():
         'service': 'Next Gen Indian Banking Voice Assistant API',
         'version': '1.0.0',
         'whisper_available': whisper_available,
-        'langgraph_available': banking_assistant is not None
+        'asr_engine': asr_info,
+        'langgraph_available': banking_assistant is not None,
+        'llm_circuit_breaker': llm_circuit,
+        'llm_admission': llm_queue
     }), 200
 
 
+@app.route('/api/tts/<job_id>', methods=['GET'])
+def tts_audio(job_id):
+    """
+    Stream the spoken reply for a voice banking response as WAV.
+    Pre-rendered template phrases are sent straight from the phrase cache;
+    only names and amounts are synthesized, one segment at a time.
+    """
+    if not banking_assistant:
+        return jsonify({'error': 'TTS is not available in mock mode'}), 503
+    
+    from banking_assistant_backend import speech_synthesizer
+    
+    job = speech_synthesizer.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired TTS job'}), 404
+    
+    language, segments = job
+    return Response(speech_synthesizer.stream(segments, language), mimetype='audio/wav',
+                    headers={'Cache-Control': 'no-store'})
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Runtime counters for caches and other performance features"""
+    metrics_data = {'json_provider': json_provider, 'account_reads': account_reads.stats(), 'logging': logging_stats(),
+                    'session_tokens': session_tokens.stats()}
+    
+    if banking_assistant:
+        from banking_assistant_backend import transcription_cache, speech_synthesizer, transaction_ledger
+        metrics_data['transcription_cache'] = transcription_cache.stats()
+        metrics_data['transaction_ledger'] = transaction_ledger.stats()
+        from banking_assistant_backend import post_response
+        metrics_data['post_response'] = post_response.stats()
+        metrics_data['tts'] = speech_synthesizer.stats()
+        from banking_assistant_backend import llm_flight
+        metrics_data['llm_single_flight'] = llm_flight.stats()
+        from banking_assistant_backend import user_contexts
+        metrics_data['user_context'] = user_contexts.stats()
+        from banking_assistant_backend import prompt_registry
+        metrics_data['prompts'] = prompt_registry.stats()
+        from banking_assistant_backend import request_profiler
+        metrics_data['profiler'] = request_profiler.stats()
+    
+    return jsonify(metrics_data), 200
+
+
+@app.route('/api/admin/memory', methods=['GET'])
+def memory_report():
+    """
+    Memory accounting: process RSS, checkpointer threads and bytes, sessions,
+    leaked temp audio files, ASR model sizes and, while tracemalloc runs,
+    the top allocation sites (?top=15&group_by=lineno|filename|traceback)
+    and their growth since the baseline
+    """
+    denied = admin_denied_response()
+    if denied:
+        return denied
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': f'Unknown group_by: {group_by}'}), 400
+    
+    report = {
+        'process': process_stats(),
+        'sessions': len(sessions),
+        'temp_audio_files': len(glob.glob(os.path.join(tempfile.gettempdir(), AUDIO_TEMP_PREFIX + '*'))),
+        'tracemalloc': memory_inspector.report(top=request.args.get('top', 15, type=int), group_by=group_by),
+    }
+    if banking_assistant:
+        from banking_assistant_backend import asr_engine, transaction_ledger, transcription_cache, speech_synthesizer
+        report['checkpointer'] = checkpointer_stats(banking_assistant.checkpointer)
+        report['asr_models'] = asr_engine.model_bytes() if asr_engine else {}
+        report['transaction_ledger_bytes'] = transaction_ledger.stats()['column_bytes']
+        report['transcription_cache'] = transcription_cache.stats()
+        report['tts'] = speech_synthesizer.stats()
+    return jsonify(report), 200
+
+
+@app.route('/api/admin/memory/baseline', methods=['POST', 'DELETE'])
+def memory_baseline():
+    """POST starts tracemalloc (if needed) and snapshots a baseline; DELETE stops tracing"""
+    denied = admin_denied_response()
+    if denied:
+        return denied
+    if request.method == 'DELETE':
+        memory_inspector.stop()
+        return jsonify({'tracing': False}), 200
+    return jsonify(memory_inspector.take_baseline()), 200
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Summaries (per-node timings, sample counts) of stored request profiles, newest first"""
+    denied = admin_denied_response()
+    if denied:
+        return denied
+    if not banking_assistant:
+        return jsonify({'error': 'Profiling is not available in mock mode'}), 503
+    from banking_assistant_backend import request_profiler
+    return jsonify({'profiles': request_profiler.list(), **request_profiler.stats()}), 200
+
+
+@app.route('/api/admin/profiles/<capture_id>', methods=['GET'])
+def get_profile(capture_id):
+    """
+    One request profile. ?format=collapsed (flamegraph.pl / speedscope text),
+    speedscope (JSON file for speedscope.app) or summary (default)
+    """
+    denied = admin_denied_response()
+    if denied:
+        return denied
+    if not banking_assistant:
+        return jsonify({'error': 'Profiling is not available in mock mode'}), 503
+    from banking_assistant_backend import request_profiler
+    capture = request_profiler.get(capture_id)
+    if capture is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    output = request.args.get('format', 'summary')
+    if output == 'collapsed':
+        return Response(capture.collapsed(), mimetype='text/plain',
+                        headers={'Content-Disposition': f'attachment; filename={capture.id}.collapsed'})
+    if output == 'speedscope':
+        response = jsonify(capture.speedscope())
+        response.headers['Content-Disposition'] = f'attachment; filename={capture.id}.speedscope.json'
+        return response, 200
+    if output != 'summary':
+        return jsonify({'error': f'Unknown format: {output}'}), 400
+    return jsonify(capture.summary()), 200
+
+
 @app.route('/api/authenticate', methods=['POST'])
 def authenticate():
     """
     Authentication endpoint for user login
+    Returns a signed session token to send as `Authorization: Bearer <token>`
     """
-    from banking_assistant_backend import USERS_DB, TRANSACTIONS_DB
+    from banking_assistant_backend import USERS_DB, warm_user_session
     
     data = request.json
     username = data.get('username', '').lower()
     password = data.get('password', '')
     
-    # Check credentials
-    if username in USERS_DB:
-        user = USERS_DB[username]
-        if user.get('password') == password:
-            # Return user data without password
-            user_data = {k: v for k, v in user.items() if k != 'password'}
-            return jsonify({
-                'success': True,
-                'user': user_data,
-                'token': f'mock_jwt_token_{username}'
-            }), 200
+    # Unknown users are checked against a dummy hash, so both cases take as long
+    user = USERS_DB.get(username)
+    if verify_password(password, user.get('password_hash') if user else None):
+        # Return user data without the password hash
+        user_data = {k: v for k, v in user.items() if k != 'password_hash'}
+        # Prepare the first voice turn while the dashboard loads
+        warm_user_session(username)
+        session = session_tokens.issue(username)
+        return jsonify({
+            'success': True,
+            'user': user_data,
+            'token': session['token'],
+            'expires_at': session['expires_at']
+        }), 200
     
     return jsonify({
         'success': False,
@@ -292,16 +772,25 @@ def authenticate():
     }), 401
 
 
+def load_user_record(user_id):
+    """Account record without the password hash, or None"""
+    from banking_assistant_backend import USERS_DB
+    
+    if user_id not in USERS_DB:
+        return None
+    return {k: v for k, v in USERS_DB[user_id].items() if k != 'password_hash'}
+
+
 @app.route('/api/user/<user_id>', methods=['GET'])
 def get_user_data(user_id):
     """
     Get user account data
     """
-    from banking_assistant_backend import USERS_DB
-    
-    user_id = user_id.lower()
-    if user_id in USERS_DB:
-        user_data = {k: v for k, v in USERS_DB[user_id].items() if k != 'password'}
+    user_id, denied = session_user_id(user_id)
+    if denied:
+        return denied
+    user_data = account_reads.do(('user', user_id), load_user_record, user_id)
+    if user_data is not None:
         return jsonify({
             'success': True,
             'user': user_data
@@ -316,21 +805,60 @@ def get_user_data(user_id):
 @app.route('/api/transactions/<user_id>', methods=['GET'])
 def get_transactions(user_id):
     """
-    Get user transaction history
+    Get user transaction history, one page at a time
+    
+    Query parameters: cursor, limit, from/to (YYYY-MM-DD), type (credit/debit),
+    min_amount/max_amount, fields (comma-separated). Responses carry an ETag
+    that changes whenever the account gets a new transaction; a matching
+    If-None-Match returns 304 with no body.
     """
-    from banking_assistant_backend import TRANSACTIONS_DB
+    from banking_assistant_backend import transaction_ledger
+    from transaction_ledger import InvalidQuery
     
-    user_id = user_id.lower()
-    if user_id in TRANSACTIONS_DB:
+    user_id, denied = session_user_id(user_id)
+    if denied:
+        return denied
+    if not transaction_ledger.has_account(user_id):
         return jsonify({
-            'success': True,
-            'transactions': TRANSACTIONS_DB[user_id]
-        }), 200
+            'success': False,
+            'error': 'No transactions found'
+        }), 404
     
-    return jsonify({
-        'success': False,
-        'error': 'No transactions found'
-    }), 404
+    # The query string is part of the tag: each page/filter is its own representation
+    query = request.query_string.decode('utf-8', 'replace')
+    etag = hashlib.sha1(f"{user_id}:{transaction_ledger.etag(user_id)}:{query}".encode()).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    args = request.args
+    try:
+        transactions, next_cursor = account_reads.do(
+            ('transactions', etag),
+            transaction_ledger.page,
+            user_id,
+            cursor=args.get('cursor'),
+            limit=args.get('limit', 20, type=int),
+            date_from=args.get('from'),
+            date_to=args.get('to'),
+            txn_type=args.get('type'),
+            min_amount=args.get('min_amount', type=float),
+            max_amount=args.get('max_amount', type=float),
+            fields=[f for f in args.get('fields', '').split(',') if f]
+        )
+    except InvalidQuery as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = jsonify({
+        'success': True,
+        'transactions': transactions,
+        'next_cursor': next_cursor,
+        'version': transaction_ledger.version(user_id)
+    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response, 200
 
 
 if __name__ == '__main__':
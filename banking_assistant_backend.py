@@ -10,30 +10,54 @@ from typing import Dict, TypedDict, Annotated, List, Optional
 import operator
 import json
 import random
+import threading
 from datetime import datetime
 
 from dotenv import load_dotenv
 import httpx
-import whisper
 
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, AIMessage
 from langchain_core.tools import tool
 
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.checkpoint.memory import MemorySaver
 
-# Walmart authentication
-from walmart_gpa_peopleai_core.auth_sig import generate_auth_sig
+from request_budget import DeadlineExceeded, has_llm_budget, remaining_ms, run_with_deadline
+from circuit_breaker import CircuitBreaker, GuardedLLM
+from admission_control import DEFAULT_PRIORITY, AdmissionRejected, PriorityLimiter, intent_priority
+from voice_activity import split_for_asr, trim_silence
+from asr_engines import create_asr_engine
+from transcription_cache import TranscriptionCache, hash_file
+from text_to_speech import SpeechSynthesizer
+from transaction_ledger import TransactionLedger
+from spending_insights import SpendingAggregates, detect_category, detect_period
+from entity_extraction import EntityExtractor, extract_amount, extract_date, is_transfer_command
+from single_flight import SingleFlight, prompt_key
+from post_response import PostResponsePipeline
+from log_config import configure_logging, get_logger
+from profiling import RequestProfiler
+from prompts import create_prompt_registry
+from user_context import UserContextCache
+from session_tokens import hash_password
 
 load_dotenv()
 
+# Log calls only enqueue; one writer thread formats and writes
+configure_logging()
+startup_log = get_logger("startup")
+asr_log = get_logger("asr")
+intent_log = get_logger("intent")
+operations_log = get_logger("operations")
+dialog_log = get_logger("dialog")
+
 # ============================================================================
 # LLM CONFIGURATION (Exact copy from notebook)
 # ============================================================================
 
-print("🔧 Initializing Banking Assistant from Notebook Configuration...")
+startup_log.info("Initializing banking assistant")
 
 # Azure OpenAI LLM Configuration
 # Load enterprise Walmart LLM gateway settings from environment variables
@@ -44,74 +68,165 @@ API_VERSION = os.getenv("API_VERSION")
 WM_SVC_ENV = os.getenv("WM_SVC_ENV")
 LLM_MODEL = os.getenv("LLM_MODEL")
 
-# Validate required environment variables
-required_vars = {
-    "AZURE_ENDPOINT": AZURE_ENDPOINT,
-    "PRIVATE_KEY_PATH": PRIVATE_KEY_PATH,
-    "CONSUMER_ID": CONSUMER_ID,
-    "API_VERSION": API_VERSION,
-    "WM_SVC_ENV": WM_SVC_ENV,
-    "LLM_MODEL": LLM_MODEL
-}
+# "signed" for the enterprise gateway, "none" for a local OpenAI/Azure-compatible
+# server such as benchmarks/llm_stub_server.py (no credentials needed)
+LLM_GATEWAY_AUTH = os.getenv("LLM_GATEWAY_AUTH", "signed").lower()
 
-missing_vars = [var for var, value in required_vars.items() if not value]
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}. Please check your .env file.")
-
-# Generate Walmart authentication signature
-epoch_ts, sig = generate_auth_sig(CONSUMER_ID, PRIVATE_KEY_PATH)
-os.environ["OPENAI_API_KEY"] = CONSUMER_ID
-
-# Configure enterprise security headers
-headers: Dict[str, str] = {
-    "WM_CONSUMER.ID": CONSUMER_ID,
-    "WM_SVC.NAME": "WMTLLMGATEWAY", 
-    "WM_SVC.ENV": WM_SVC_ENV,
-    "WM_SEC.KEY_VERSION": "1",
-    "WM_SEC.AUTH_SIGNATURE": sig,
-    "WM_CONSUMER.INTIMESTAMP": str(epoch_ts),
-    "Content-Type": "application/json",
-}
+# Hard ceiling for a single gateway call; the per-request budget is usually tighter
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "15"))
+
+# Idle gateway connections stay pooled this long, so a connection opened at
+# login is still there for the first voice turn
+LLM_KEEPALIVE_S = float(os.getenv("LLM_KEEPALIVE_S", "60"))
+LLM_PREWARM_CONNECTION = os.getenv("LLM_PREWARM_CONNECTION", "true").lower() == "true"
 
-# Create HTTP clients with enterprise auth
-client = httpx.Client(verify=False, headers=headers)
-async_client = httpx.AsyncClient(verify=False, headers=headers)
+# Benchmarks and offline tools import this module without gateway
+# credentials and install their own chat model with install_llm()
+SKIP_LLM_GATEWAY = os.getenv("SKIP_LLM_GATEWAY", "false").lower() == "true"
 
-# Initialize LLM with enterprise configuration
-llm = AzureChatOpenAI(
-    openai_api_key=CONSUMER_ID,
-    model=LLM_MODEL,
-    api_version=API_VERSION,
-    azure_endpoint=AZURE_ENDPOINT,
-    http_client=client,
-    http_async_client=async_client,
-    temperature=0,  # Deterministic responses for routing
-)
+# Load the ASR models at import (off for benchmarks with a stub engine):
+# the default model plus one per language in ASR_PRELOAD_LANGUAGES
+ASR_PRELOAD = os.getenv("ASR_PRELOAD", "true").lower() == "true"
+ASR_PRELOAD_LANGUAGES = [lang.strip() for lang in os.getenv("ASR_PRELOAD_LANGUAGES", "en,hi,gu").split(",")
+                         if lang.strip()]
 
-print("✅ LLM configured and ready")
+
+def create_gateway_llm():
+    """AzureChatOpenAI client for the enterprise LLM gateway (signed headers)"""
+    if LLM_GATEWAY_AUTH == "none":
+        # Local OpenAI/Azure-compatible server, e.g. benchmarks/llm_stub_server.py
+        headers: Dict[str, str] = {"Content-Type": "application/json"}
+        required_vars = {"AZURE_ENDPOINT": AZURE_ENDPOINT, "API_VERSION": API_VERSION, "LLM_MODEL": LLM_MODEL}
+    else:
+        required_vars = {
+            "AZURE_ENDPOINT": AZURE_ENDPOINT,
+            "PRIVATE_KEY_PATH": PRIVATE_KEY_PATH,
+            "CONSUMER_ID": CONSUMER_ID,
+            "API_VERSION": API_VERSION,
+            "WM_SVC_ENV": WM_SVC_ENV,
+            "LLM_MODEL": LLM_MODEL
+        }
+    
+    # Validate required environment variables
+    missing_vars = [var for var, value in required_vars.items() if not value]
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}. Please check your .env file.")
+    
+    if LLM_GATEWAY_AUTH != "none":
+        # Walmart authentication
+        from walmart_gpa_peopleai_core.auth_sig import generate_auth_sig
+        
+        # Generate Walmart authentication signature
+        epoch_ts, sig = generate_auth_sig(CONSUMER_ID, PRIVATE_KEY_PATH)
+        os.environ["OPENAI_API_KEY"] = CONSUMER_ID
+        
+        # Configure enterprise security headers
+        headers = {
+            "WM_CONSUMER.ID": CONSUMER_ID,
+            "WM_SVC.NAME": "WMTLLMGATEWAY", 
+            "WM_SVC.ENV": WM_SVC_ENV,
+            "WM_SEC.KEY_VERSION": "1",
+            "WM_SEC.AUTH_SIGNATURE": sig,
+            "WM_CONSUMER.INTIMESTAMP": str(epoch_ts),
+            "Content-Type": "application/json",
+        }
+    
+    # Create HTTP clients with enterprise auth
+    limits = httpx.Limits(keepalive_expiry=LLM_KEEPALIVE_S)
+    client = httpx.Client(verify=False, headers=headers, limits=limits)
+    async_client = httpx.AsyncClient(verify=False, headers=headers, limits=limits)
+    
+    # Initialize LLM with enterprise configuration
+    return AzureChatOpenAI(
+        openai_api_key=CONSUMER_ID or "local",
+        model=LLM_MODEL,
+        api_version=API_VERSION,
+        azure_endpoint=AZURE_ENDPOINT,
+        http_client=client,
+        http_async_client=async_client,
+        temperature=0,  # Deterministic responses for routing
+        timeout=LLM_REQUEST_TIMEOUT_S,
+        max_retries=0,  # Retries would silently eat the request budget
+    )
+
+
+# Set by install_llm(); while unset every node takes its keyword/template path
+llm = None
+llm_gateway: Optional[GuardedLLM] = None
+LLM_DETERMINISTIC = False
+
+
+def install_llm(chat_model):
+    """Route all node LLM calls through chat_model (gateway client or a stub)"""
+    global llm, llm_gateway, LLM_DETERMINISTIC
+    llm = chat_model
+    # All node LLM calls go through the breaker so a degraded gateway fails fast
+    llm_gateway = GuardedLLM(chat_model, CircuitBreaker("llm_gateway"), admission=llm_admission)
+    # Identical concurrent prompts share one call, but only when output is deterministic
+    LLM_DETERMINISTIC = getattr(chat_model, "temperature", None) == 0
+
+
+# Bounded, priority-ordered concurrency for gateway calls
+llm_admission = PriorityLimiter()
+# A leader's own deadline or admission rejection is not shared with followers
+llm_flight = SingleFlight("llm", caller_errors=(DeadlineExceeded, AdmissionRejected))
+
+if SKIP_LLM_GATEWAY:
+    startup_log.warning("SKIP_LLM_GATEWAY set: no LLM installed until install_llm() is called")
+else:
+    install_llm(create_gateway_llm())
+    startup_log.info("LLM configured (model=%s)", LLM_MODEL)
 
 # ============================================================================
-# WHISPER MODEL INITIALIZATION
+# ASR ENGINE INITIALIZATION
 # ============================================================================
 
-print("🎤 Loading Whisper model for speech recognition...")
+startup_log.info("Loading ASR engine")
 try:
-    whisper_model = whisper.load_model("tiny")  # Using "tiny" for fastest loading
-    print("✅ Whisper model loaded successfully")
+    # Backend and per-language model sizes come from ASR_BACKEND / ASR_MODEL_*
+    asr_engine = create_asr_engine()
+    if ASR_PRELOAD:
+        # A lazy load takes seconds, all of it charged to the first turn's budget
+        asr_engine.preload(ASR_PRELOAD_LANGUAGES)
+    startup_log.info("ASR engine '%s' loaded (models: %s)", asr_engine.backend,
+                     ", ".join(asr_engine.loaded_models()) or "none")
 except Exception as e:
-    print(f"⚠️ Warning: Could not load Whisper model: {e}")
-    whisper_model = None
+    startup_log.warning("Could not load ASR engine: %s", e)
+    asr_engine = None
+
+# Kept for callers that only check whether speech recognition is available
+whisper_model = asr_engine
+
+# Retries and duplicate uploads of the same clip skip ASR
+transcription_cache = TranscriptionCache()
+
+# Server-side TTS; fixed reply fragments are pre-rendered in the background
+speech_synthesizer = SpeechSynthesizer()
+if speech_synthesizer.available:
+    threading.Thread(target=speech_synthesizer.prerender, name="tts-prerender", daemon=True).start()
+    startup_log.info("Server-side TTS enabled")
+else:
+    startup_log.warning("Server-side TTS unavailable (espeak-ng not found), using browser speech")
 
 # ============================================================================
 # STATE DEFINITION
 # ============================================================================
 
+def merge_intent_results(current: List[Dict], update: Optional[List[Dict]]) -> List[Dict]:
+    """Reducer for the parallel banking branches; None (from new_turn_state) clears"""
+    if update is None:
+        return []
+    return (current or []) + update
+
+
 class BankingState(TypedDict):
     """State schema for the banking voice assistant"""
     
     # User input and conversation
     user_input: str
     audio_file: Optional[str]  # Path to audio file for Whisper transcription
+    audio_sha256: Optional[str]  # Content hash of audio_file, computed while uploading
+    audio_metrics: Optional[Dict]  # Seconds of audio received vs. sent to ASR
     transcribed_text: Optional[str]
     messages: Annotated[List[BaseMessage], operator.add]
     conversation_history: List[str]
@@ -127,6 +242,7 @@ class BankingState(TypedDict):
     
     # Intent and context
     detected_intent: Optional[str]
+    intents: List[str]  # Every requested intent, primary first; several fan out in parallel
     intent_confidence: float
     entities: Dict[str, any]
     requires_clarification: bool
@@ -137,6 +253,7 @@ class BankingState(TypedDict):
     account_balance: Optional[float]
     transaction_history: List[Dict]
     pending_transaction: Optional[Dict]
+    intent_results: Annotated[List[Dict], merge_intent_results]  # One entry per parallel branch
     
     # RAG context
     retrieved_context: List[str]
@@ -144,13 +261,38 @@ class BankingState(TypedDict):
     
     # Response generation
     response: str
-    tts_audio: Optional[str]
+    tts_audio: Optional[str]  # URL of the streamed WAV reply (/api/tts/<job_id>)
     
     # Flow control
     next_action: str
     current_node: str
     error: Optional[str]
-    compliance_check_passed: bool
+    deadline: Optional[float]  # Absolute epoch seconds by which the request must finish
+    priority: int  # LLM scheduling priority, lower is served first
+
+
+def new_turn_state(**inputs) -> Dict:
+    """
+    Graph input for one turn: the request fields plus resets for fields that
+    nodes write only on some paths, so values from an earlier turn on the same
+    thread never leak into this one. All other fields are left out; nodes read
+    them with .get() defaults and return only the keys they change.
+    """
+    return {
+        "transcribed_text": None,
+        "detected_intent": None,
+        "intents": [],
+        "intent_results": None,
+        "entities": {},
+        "account_number": None,
+        "account_balance": None,
+        "transaction_history": [],
+        "response": "",
+        "tts_audio": None,
+        "audio_metrics": None,
+        "error": None,
+        **inputs,
+    }
 
 
 # ============================================================================
@@ -228,6 +370,10 @@ USERS_DB = {
     }
 }
 
+# Demo passwords are hashed at import; only the scrypt hash stays in memory
+for _user in USERS_DB.values():
+    _user["password_hash"] = hash_password(_user.pop("password"))
+
 TRANSACTIONS_DB = {
     "neha": [
         {"date": "2025-11-22", "type": "credit", "amount": 75000.00, "description": "Salary Credit - Tech Corp", "balance": 125000.00},
@@ -255,6 +401,114 @@ TRANSACTIONS_DB = {
     ]
 }
 
+# Columnar ledger loaded from the seed data above; all reads and appends
+# go through it (TRANSACTIONS_DB is not updated after startup)
+transaction_ledger = TransactionLedger(TRANSACTIONS_DB)
+
+# Month/category/merchant totals, kept current by every ledger append
+spending_aggregates = SpendingAggregates()
+spending_aggregates.rebuild(TRANSACTIONS_DB)
+transaction_ledger.subscribe(spending_aggregates.record)
+
+# Audit trail, compliance checks and turn logs run after the response
+post_response = PostResponsePipeline()
+transaction_ledger.subscribe(post_response.record_ledger_append)
+
+# Spoken-script spellings of payee names for the local entity extractor
+PAYEE_ALIASES = {
+    "neha": ["नेहा", "નેહા", "नेहा शर्मा"],
+    "niyati": ["नियति", "નિયતિ", "નિયતિ પટેલ"],
+}
+
+
+def payee_names() -> Dict[str, List[str]]:
+    """User id, full name, first name and aliases for every account holder"""
+    return {
+        uid: [uid, udata["name"], udata["name"].split()[0]] + PAYEE_ALIASES.get(uid, [])
+        for uid, udata in USERS_DB.items()
+    }
+
+
+entity_extractor = EntityExtractor(payee_names())
+
+
+def build_user_context(user_id: str) -> Optional[Dict]:
+    """Account summary, recent-transaction digest and payee index for one user"""
+    user_data = USERS_DB.get(user_id)
+    if user_data is None:
+        return None
+    # Every spelling of every other account holder -> their user id
+    payees = {
+        name.lower(): uid
+        for uid, names in payee_names().items() if uid != user_id
+        for name in names
+    }
+    return {
+        "name": user_data["name"],
+        "account_number": user_data["account_number"],
+        "balance": user_data["balance"],
+        "recent_transactions": transaction_ledger.recent(user_id, 5),
+        "statement": transaction_ledger.statement(user_id, days=30),
+        "payees": payees,
+    }
+
+
+# Warmed at login; any ledger append (both sides of a transfer) drops the entry
+user_contexts = UserContextCache(build_user_context)
+transaction_ledger.subscribe(lambda user_id, transaction: user_contexts.invalidate(user_id))
+
+
+def prewarm_llm_connection():
+    """Open a pooled connection to the gateway ahead of the first LLM call"""
+    client = getattr(llm, "http_client", None)
+    if client is None or not AZURE_ENDPOINT:
+        return
+    try:
+        # Any response, even 404, leaves a keep-alive connection in the pool
+        client.head(AZURE_ENDPOINT, timeout=LLM_REQUEST_TIMEOUT_S)
+    except httpx.HTTPError as e:
+        operations_log.debug("Gateway connection prewarm failed: %s", e)
+
+
+def warm_user_session(user_id: str):
+    """Login-time warmup, off the login request: user context and gateway connection"""
+    def warm():
+        user_contexts.warm(user_id)
+        if LLM_PREWARM_CONNECTION:
+            prewarm_llm_connection()
+    
+    threading.Thread(target=warm, name="login-warmup", daemon=True).start()
+
+# Keyword fallback for intent detection; the first match is the primary intent.
+# Transfers are never inferred from keywords, only from an explicit command
+# (entity_extraction.is_transfer_command)
+INTENT_KEYWORDS = [
+    ("check_balance", ['balance', 'बैलेंस', 'બેલેન્સ'], 0.9),
+    ("spending_insights", ['spend', 'spent', 'expense', 'खर्च', 'ખર્ચ'], 0.85),
+    ("view_transactions", ['transaction', 'history', 'लेनदेन', 'વ્યવહાર'], 0.9),
+    ("loan_inquiry", ['loan', 'लोन', 'લોન', 'emi'], 0.9),
+    ("credit_inquiry", ['credit', 'card', 'क्रेडिट', 'ક્રેડિટ'], 0.9),
+]
+
+# Read-only intents that can be answered together in one turn ("show my
+# balance and last five transactions"), each in its own parallel branch.
+# Transfers are never combined, so a balance read cannot race a debit.
+PARALLEL_INTENTS = {"check_balance", "view_transactions", "spending_insights", "loan_inquiry", "credit_inquiry"}
+MAX_PARALLEL_INTENTS = int(os.getenv("MAX_PARALLEL_INTENTS", "4"))
+
+
+def combined_intents(primary: str, candidates: List[str]) -> List[str]:
+    """The primary intent followed by the candidates that can run alongside it"""
+    intents = [primary]
+    if primary in PARALLEL_INTENTS:
+        for intent in candidates:
+            if intent in PARALLEL_INTENTS and intent not in intents and len(intents) < MAX_PARALLEL_INTENTS:
+                intents.append(intent)
+    return intents
+
+# Intent and reply prompts: static prefixes first, per-language token budgets
+prompt_registry = create_prompt_registry()
+
 KNOWLEDGE_BASE = [
     {"topic": "interest_rates", "content": "Current savings account interest rate is 2.5% per annum. Home loan rates start at 7.25% for qualified borrowers with flexible repayment options."},
     {"topic": "credit_cards", "content": "We offer credit cards with 0% introductory interest for 12 months, rewards programs, cashback benefits, and no annual fees for the first year."},
@@ -262,30 +516,126 @@ KNOWLEDGE_BASE = [
 ]
 
 
+# ============================================================================
+# LLM INVOCATION
+# ============================================================================
+
+def invoke_llm(llm_input, state: BankingState, hedged: bool = False):
+    """
+    Invoke the shared LLM within the request's remaining latency budget.
+    Raises (DeadlineExceeded, AdmissionRejected, CircuitOpenError, gateway
+    errors) so that the calling node falls back to its deterministic path.
+    
+    The LLM runs at temperature 0, so concurrent identical prompts share
+    one gateway call; a waiting caller gives up at its own deadline.
+    """
+    if llm_gateway is None:
+        raise RuntimeError("No LLM installed")
+    if not LLM_DETERMINISTIC:
+        return _invoke_llm_now(llm_input, state, hedged)
+    
+    remaining = remaining_ms(state.get("deadline"))
+    return llm_flight.do(
+        prompt_key(llm_input, hedged), _invoke_llm_now, llm_input, state, hedged,
+        timeout=None if remaining is None else max(0.0, remaining / 1000.0)
+    )
+
+
+def _invoke_llm_now(llm_input, state: BankingState, hedged: bool):
+    deadline = state.get("deadline")
+    if not has_llm_budget(deadline):
+        raise DeadlineExceeded("Request budget exhausted before LLM call")
+    
+    # Wait for a gateway slot in priority order, but never past the deadline
+    remaining = remaining_ms(deadline)
+    timeout = None if remaining is None else remaining / 1000.0
+    slot = llm_admission.acquire(state.get("priority", DEFAULT_PRIORITY), timeout=timeout)
+    
+    def call():
+        try:
+            if hedged:
+                remaining_now = remaining_ms(deadline)
+                return llm_gateway.invoke_hedged(
+                    llm_input, timeout=None if remaining_now is None else remaining_now / 1000.0
+                )
+            return llm_gateway.invoke(llm_input)
+        finally:
+            slot.release()
+    
+    # The slot belongs to the call once it starts; a call that never starts
+    # hands it back through on_cancel
+    return run_with_deadline(call, deadline=deadline, on_cancel=slot.release)
+
+
+# ============================================================================
+# SPEECH RECOGNITION
+# ============================================================================
+
+def transcribe_audio(audio_file: str, language: Optional[str], audio_hash: Optional[str] = None) -> Dict:
+    """
+    Transcribe an audio file with VAD trimming, using the transcription cache.
+    Returns {"text", "language", "audio_metrics", "no_speech", "cached"}.
+    """
+    model = f"{asr_engine.backend}:{asr_engine.model_name(language)}"
+    key = TranscriptionCache.make_key(audio_hash or hash_file(audio_file), language, model)
+    cached = transcription_cache.get(key)
+    if cached is not None:
+        asr_log.debug("Transcription cache hit (%s)", model)
+        return {**cached, "cached": True}
+    
+    # Trim silence before ASR; Whisper's cost grows with audio length
+    vad = trim_silence(asr_engine.load_audio(audio_file))
+    asr_log.debug("VAD removed %.2fs of %.2fs audio", vad.removed_seconds, vad.original_seconds)
+    
+    texts = []
+    detected_lang = None
+    if not vad.is_empty:
+        asr_log.debug("Transcribing with %s (language=%s)", model, language or "auto")
+        for chunk in split_for_asr(vad):
+            result = asr_engine.transcribe(chunk, language=language or detected_lang)
+            texts.append(result["text"].strip())
+            detected_lang = detected_lang or result.get("language")
+    
+    transcription = {
+        "text": " ".join(text for text in texts if text),
+        "language": detected_lang,
+        "audio_metrics": vad.metrics(),
+        "no_speech": vad.is_empty,
+    }
+    transcription_cache.put(key, transcription)
+    return {**transcription, "cached": False}
+
+
 # ============================================================================
 # AGENT NODES
 # ============================================================================
 
-def speech_agent(state: BankingState) -> BankingState:
+def speech_agent(state: BankingState) -> Dict:
     """Speech Agent: Handles voice input transcription using Whisper"""
     
     # Check if audio file path is provided
     audio_file = state.get("audio_file")
     
-    if audio_file and whisper_model:
-        # Use Whisper to transcribe audio file
+    if audio_file and asr_engine:
+        # Use the configured ASR engine to transcribe audio file
         try:
             language = state.get("language", "en")
             # Map language codes to Whisper format
             whisper_lang = None if language == "auto" else language
             
-            print(f"🎤 Transcribing audio with Whisper (language: {whisper_lang or 'auto-detect'})...")
-            result = whisper_model.transcribe(audio_file, language=whisper_lang)
-            transcribed = result["text"].strip()
-            detected_lang = result.get("language", language)
+            transcription = transcribe_audio(audio_file, whisper_lang, state.get("audio_sha256"))
+            if transcription["no_speech"]:
+                return {
+                    "error": "No speech detected in audio",
+                    "audio_metrics": transcription["audio_metrics"],
+                    "current_node": "speech",
+                    "next_action": "end"
+                }
+            transcribed = transcription["text"]
+            detected_lang = transcription["language"] or language
             
-            print(f"✅ ASR text: {transcribed}")
-            print(f"✅ Detected language: {detected_lang}")
+            # Transcripts are user content: length only
+            asr_log.info("Transcribed %d chars (language=%s)", len(transcribed), detected_lang)
             
             new_messages = []
             if not state.get('messages') or not any(
@@ -295,17 +645,16 @@ def speech_agent(state: BankingState) -> BankingState:
                 new_messages.append(HumanMessage(content=transcribed))
             
             return {
-                **state,
                 "transcribed_text": transcribed,
                 "messages": new_messages,
                 "current_node": "speech",
                 "next_action": "understand_intent",
-                "language": detected_lang  # Update with detected language
+                "language": detected_lang,  # Update with detected language
+                "audio_metrics": {**transcription["audio_metrics"], "cached": transcription["cached"]}
             }
         except Exception as e:
-            print(f"❌ Whisper transcription error: {e}")
+            asr_log.error("ASR transcription failed: %s", e)
             return {
-                **state,
                 "error": f"Audio transcription failed: {str(e)}",
                 "current_node": "speech",
                 "next_action": "end"
@@ -322,7 +671,6 @@ def speech_agent(state: BankingState) -> BankingState:
             new_messages.append(HumanMessage(content=transcribed))
         
         return {
-            **state,
             "transcribed_text": transcribed,
             "messages": new_messages,
             "current_node": "speech",
@@ -330,151 +678,99 @@ def speech_agent(state: BankingState) -> BankingState:
         }
     else:
         return {
-            **state,
             "error": "No input detected",
             "current_node": "speech",
             "next_action": "end"
         }
 
 
-def intent_understanding_agent(state: BankingState) -> BankingState:
+def transfer_entities(user_text: str, entities: Dict, sender: Optional[str]) -> Dict:
+    """
+    The classifier's transfer entities, with gaps filled by the local
+    extractor and the date normalized to ISO so scheduled transfers are
+    recognised
+    """
+    local = entity_extractor.extract(user_text, sender=sender)
+    merged = dict(entities)
+    for key in ("amount", "recipient"):
+        if not merged.get(key) and key in local:
+            merged[key] = local[key]
+    when = local.get("date") or merged.get("date")
+    if when:
+        merged["date"] = extract_date(str(when)) or str(when)
+    else:
+        merged.pop("date", None)
+    return merged
+
+
+def intent_understanding_agent(state: BankingState) -> Dict:
     """Intent Understanding Agent: Detects user intent - Multilingual support"""
     user_text = state.get("transcribed_text", "")
     language = state.get("language", "en")
     
-    print(f"🔍 Intent Agent - User text: '{user_text}', Language: {language}")
+    intent_log.debug("Classifying %d chars (language=%s)", len(user_text), language)
     
-    # Language-specific prompts
-    if language == "hi":
-        intent_prompt = f"""
-आप एक बैंकिंग सहायक के लिए इंटेंट क्लासिफायर हैं। उपयोगकर्ता के अनुरोध का विश्लेषण करें और पहचानें:
-1. मुख्य इंटेंट (इनमें से एक: check_balance, view_transactions, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
-2. विश्वास स्तर (0.0 से 1.0)
-3. एंटिटीज (राशि, तारीख, खाता संख्या)
-
-उपयोगकर्ता का अनुरोध: "{user_text}"
-
-JSON फॉर्मेट में जवाब दें:
-{{
-    "intent": "<intent_name>",
-    "confidence": <float>,
-    "entities": {{}}
-}}
-"""
-    elif language == "gu":
-        intent_prompt = f"""
-તમે બેન્કિંગ આસિસ્ટન્ટ માટે ઇન્ટેન્ટ ક્લાસિફાયર છો. યુઝરની વિનંતીનું વિશ્લેષણ કરો અને ઓળખો:
-1. મુખ્ય ઇન્ટેન્ટ (આમાંથી એક: check_balance, view_transactions, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
-2. વિશ્વાસ સ્તર (0.0 થી 1.0)
-3. એન્ટિટીઝ (રકમ, તારીખ, ખાતા નંબર)
-
-યુઝરની વિનંતી: "{user_text}"
-
-JSON ફોર્મેટમાં જવાબ આપો:
-{{
-    "intent": "<intent_name>",
-    "confidence": <float>,
-    "entities": {{}}
-}}
-"""
-    else:  # English
-        intent_prompt = f"""
-You are an intent classifier for a banking assistant. Analyze the user's request and identify:
-1. Primary intent (one of: check_balance, view_transactions, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
-2. Confidence level (0.0 to 1.0)
-3. Entities (amounts, dates, account numbers)
-
-User request: "{user_text}"
-
-Respond in JSON format:
-{{
-    "intent": "<intent_name>",
-    "confidence": <float>,
-    "entities": {{}}
-}}
-"""
+    user_text_lower = user_text.lower()
+    
+    # Static classifier instructions first, the user's words last
+    system_prompt, request_prompt = prompt_registry.render("intent", language, user_text=user_text)
+    intent_messages = [SystemMessage(content=system_prompt), HumanMessage(content=request_prompt)]
     
     try:
-        print(f"🤖 Calling LLM for intent classification...")
-        response = llm.invoke(intent_prompt)
-        print(f"🤖 LLM raw response: {response.content}")
+        response = invoke_llm(intent_messages, state, hedged=True)
+        prompt_registry.record_usage("intent", getattr(response, "usage_metadata", None))
         result = json.loads(response.content)
+        intents = combined_intents(result["intent"], result.get("intents") or [])
+        entities = result.get("entities") or {}
+        if result["intent"] == "transfer_funds":
+            entities = transfer_entities(user_text, entities, state.get("user_id"))
         
-        print(f"✅ Detected intent: {result['intent']} (confidence: {result['confidence']})")
+        intent_log.info("Detected intents %s (confidence=%s)", intents, result["confidence"])
         
         return {
-            **state,
             "detected_intent": result["intent"],
+            "intents": intents,
             "intent_confidence": result["confidence"],
-            "entities": result.get("entities", {}),
+            "entities": entities,
+            "priority": intent_priority(result["intent"]),
             "current_node": "intent",
             "next_action": "retrieve_context"
         }
     except Exception as e:
-        print(f"❌ Intent detection error: {e}")
-        print(f"🔄 Falling back to keyword-based intent detection...")
+        intent_log.warning("Intent detection failed, using keyword fallback: %s", e)
         
-        # Fallback: keyword-based intent detection
-        user_text_lower = user_text.lower()
-        detected_intent = "general_question"
-        confidence = 0.7
+        # Fallback: keyword-based intent detection, except for transfers,
+        # which need an explicit command ("send 500 to Niyati")
         entities = {}
+        if is_transfer_command(user_text):
+            detected_intent, confidence, intents = "transfer_funds", 0.8, ["transfer_funds"]
+            # Amount (lakh/crore, native digits, number words), payee and date
+            entities = entity_extractor.extract(user_text, sender=state.get("user_id"))
+            intent_log.debug("Extracted transfer entities: %s", sorted(entities))
+        else:
+            matched = [intent for intent, words, _ in INTENT_KEYWORDS
+                       if any(word in user_text_lower for word in words)]
+            detected_intent = matched[0] if matched else "general_question"
+            confidence = next((c for intent, _, c in INTENT_KEYWORDS if intent == detected_intent), 0.7)
+            intents = combined_intents(detected_intent, matched)
         
-        if any(word in user_text_lower for word in ['balance', 'बैलेंस', 'બેલેન્સ']):
-            detected_intent = "check_balance"
-            confidence = 0.9
-        elif any(word in user_text_lower for word in ['transaction', 'history', 'लेनदेन', 'વ્યવહાર']):
-            detected_intent = "view_transactions"
-            confidence = 0.9
-        elif any(word in user_text_lower for word in ['transfer', 'send', 'pay', 'भेजें', 'મોકલો']):
-            detected_intent = "transfer_funds"
-            confidence = 0.8
-            
-            # Extract amount and recipient from text
-            import re
-            # Look for amount patterns like "10000", "10,000", "₹10000"
-            amount_match = re.search(r'(?:₹|rupees?|rs\.?)\s*(\d[\d,]*)', user_text_lower)
-            if not amount_match:
-                amount_match = re.search(r'(\d[\d,]*)\s*(?:rupees?|rs\.?|₹)', user_text_lower)
-            if not amount_match:
-                # Just look for any number
-                amount_match = re.search(r'\b(\d[\d,]*)\b', user_text_lower)
-            
-            if amount_match:
-                entities["amount"] = amount_match.group(1).replace(',', '')
-                print(f"✅ Extracted amount: {entities['amount']}")
-            
-            # Look for recipient name after "to" keyword
-            recipient_match = re.search(r'to\s+([a-zA-Z]+)', user_text_lower)
-            if recipient_match:
-                entities["recipient"] = recipient_match.group(1).capitalize()
-                print(f"✅ Extracted recipient: {entities['recipient']}")
-            
-        elif any(word in user_text_lower for word in ['loan', 'लोन', 'લોન', 'emi']):
-            detected_intent = "loan_inquiry"
-            confidence = 0.9
-        elif any(word in user_text_lower for word in ['credit', 'card', 'क्रेडिट', 'ક્રેડિટ']):
-            detected_intent = "credit_inquiry"
-            confidence = 0.9
-        
-        print(f"✅ Fallback detected intent: {detected_intent} (confidence: {confidence})")
-        if entities:
-            print(f"✅ Extracted entities: {entities}")
+        intent_log.info("Fallback detected intents %s (confidence=%s)", intents, confidence)
         
         return {
-            **state,
             "detected_intent": detected_intent,
+            "intents": intents,
             "intent_confidence": confidence,
             "entities": entities,
+            "priority": intent_priority(detected_intent),
             "current_node": "intent",
             "next_action": "retrieve_context",
             "error": None  # Clear error since we have a fallback
         }
 
 
-def rag_retrieval_agent(state: BankingState) -> BankingState:
+def rag_retrieval_agent(state: BankingState) -> Dict:
     """RAG Retrieval Agent: Retrieves relevant context"""
-    intent = state.get("detected_intent", "")
+    intents = state.get("intents") or [state.get("detected_intent", "")]
     
     intent_topic_map = {
         "loan_inquiry": ["interest_rates"],
@@ -482,134 +778,137 @@ def rag_retrieval_agent(state: BankingState) -> BankingState:
         "transfer_funds": ["transfer_limits"],
     }
     
-    topics = intent_topic_map.get(intent, [])
+    topics = [topic for intent in intents for topic in intent_topic_map.get(intent, [])]
     relevant_docs = [doc["content"] for doc in KNOWLEDGE_BASE if doc["topic"] in topics]
     
     return {
-        **state,
         "retrieved_context": relevant_docs,
         "current_node": "rag",
         "next_action": "execute_banking"
     }
 
 
-def banking_operations_agent(state: BankingState) -> BankingState:
+def banking_operations_agent(state: BankingState) -> Dict:
     """Banking Operations Agent: Executes banking operations"""
     intent = state.get("detected_intent")
     user_id = state.get("user_id")
     
-    print(f"🔍 Banking Operations - Intent: {intent}, User ID: {user_id}")
+    operations_log.debug("Executing %s for %s", intent, user_id)
     
     if not user_id or user_id not in USERS_DB:
-        print(f"❌ User not authenticated or not found: {user_id}")
+        operations_log.warning("User not authenticated or not found: %s", user_id)
         return {
-            **state,
             "error": "User not authenticated",
             "next_action": "respond"
         }
     
     user_data = USERS_DB[user_id]
-    print(f"✅ Found user data for {user_data['name']}: Balance = ₹{user_data['balance']:,.2f}")
+    # Prepared at login (or on first use) and dropped when a transfer lands
+    context = user_contexts.get(user_id)
     
-    # Ensure entities dict exists
-    if "entities" not in state or state["entities"] is None:
-        state["entities"] = {}
+    # Only the keys this node changes are returned
+    updates = {}
     
     if intent == "check_balance":
-        state["account_balance"] = user_data["balance"]
-        state["account_number"] = user_data["account_number"]
-        print(f"✅ Set account_balance = ₹{state['account_balance']:,.2f}, account_number = {state['account_number']}")
+        updates["account_balance"] = context["balance"]
+        updates["account_number"] = context["account_number"]
     elif intent == "view_transactions":
-        state["transaction_history"] = TRANSACTIONS_DB.get(user_id, [])[:5]
-        state["account_number"] = user_data["account_number"]
-        print(f"✅ Set {len(state['transaction_history'])} transactions")
+        updates["transaction_history"] = list(context["recent_transactions"])
+        # 30-day statement computed over the ledger's columns
+        entities = dict(state.get("entities", {}))
+        entities["statement"] = context["statement"]
+        updates["entities"] = entities
+        updates["account_number"] = user_data["account_number"]
+    elif intent == "spending_insights":
+        # Answered from the incremental aggregates, not a history scan
+        entities = dict(state.get("entities", {}))
+        user_text = state.get("transcribed_text") or ""
+        entities["spending"] = spending_aggregates.summary(
+            user_id,
+            month=detect_period(user_text),
+            category=detect_category(user_text),
+            merchant=spending_aggregates.find_merchant(user_id, user_text),
+        )
+        updates["entities"] = entities
+        updates["account_number"] = user_data["account_number"]
     elif intent == "loan_inquiry":
         # Create a new entities dict with loan information
         entities = dict(state.get("entities", {}))
         entities["loan_balance"] = user_data.get("loan_balance", 0)
         entities["interest_rate"] = user_data.get("interest_rate", 0)
         entities["name"] = user_data.get("name", "")
-        state["entities"] = entities
-        state["account_number"] = user_data["account_number"]
-        print(f"✅ Set loan_balance = ₹{entities['loan_balance']:,.2f}, interest_rate = {entities['interest_rate']}%")
+        updates["entities"] = entities
+        updates["account_number"] = user_data["account_number"]
     elif intent == "credit_inquiry":
         # Create a new entities dict with credit information
         entities = dict(state.get("entities", {}))
         entities["credit_limit"] = user_data.get("credit_limit", 0)
         entities["cards"] = user_data.get("cards", [])
-        state["entities"] = entities
-        state["account_number"] = user_data["account_number"]
-        print(f"✅ Set credit_limit = ₹{entities['credit_limit']:,.2f}")
+        updates["entities"] = entities
+        updates["account_number"] = user_data["account_number"]
     elif intent == "transfer_funds":
         # Handle fund transfer request
         entities = dict(state.get("entities", {}))
         amount = entities.get("amount", 0)
         recipient = entities.get("recipient", "").lower().strip()
         
-        print(f"🔍 Transfer request - Amount: {amount}, Recipient: {recipient}")
-        
-        # Convert amount to float if it's a string
+        # Convert amount to float if it's a string ("1.5 lakh" etc. from the LLM)
         try:
             amount = float(str(amount).replace(",", "").replace("₹", ""))
         except (ValueError, TypeError):
-            print(f"❌ Invalid amount: {amount}")
-            state["error"] = "Invalid transfer amount"
-            state["next_action"] = "respond"
-            return state
+            amount = extract_amount(str(amount))
+        if amount is None:
+            operations_log.info("Transfer rejected: unparseable amount")
+            updates["error"] = "Invalid transfer amount"
+            updates["next_action"] = "respond"
+            return updates
         
-        # Check if recipient exists - match by full name, first name, or user ID
-        recipient_data = None
-        recipient_id = None
-        for uid, udata in USERS_DB.items():
-            # Skip if trying to transfer to self
-            if uid == user_id:
-                continue
-            
-            full_name = udata["name"].lower()
-            first_name = full_name.split()[0]
-            
-            # Match by full name, first name, or user ID
-            if full_name == recipient or first_name == recipient or uid == recipient:
-                recipient_data = udata
-                recipient_id = uid
-                print(f"✅ Found recipient: {udata['name']} (ID: {uid})")
-                break
+        # Check if recipient exists - match by full name, first name, user ID
+        # or alias, excluding the sender (payee index from the user context)
+        recipient_id = context["payees"].get(recipient)
+        recipient_data = USERS_DB.get(recipient_id) if recipient_id else None
+        
+        # Names in other scripts or with extra words ("Niyati ji")
+        if not recipient_data and recipient:
+            recipient_id = entity_extractor.payees.match(recipient, exclude=user_id)
+            recipient_data = USERS_DB.get(recipient_id) if recipient_id else None
         
         if not recipient_data:
-            print(f"❌ Recipient not found: {recipient}")
+            operations_log.info("Transfer rejected: recipient not found")
             entities["error"] = "Recipient not found"
-            state["entities"] = entities
-            state["account_number"] = user_data["account_number"]
-            state["next_action"] = "generate_response"
+            updates["entities"] = entities
+            updates["account_number"] = user_data["account_number"]
+            updates["next_action"] = "generate_response"
         elif amount <= 0:
-            print(f"❌ Invalid amount: {amount}")
+            operations_log.info("Transfer rejected: non-positive amount")
             entities["error"] = "Invalid transfer amount"
-            state["entities"] = entities
-            state["account_number"] = user_data["account_number"]
-            state["next_action"] = "generate_response"
+            updates["entities"] = entities
+            updates["account_number"] = user_data["account_number"]
+            updates["next_action"] = "generate_response"
+        elif entities.get("date") and entities["date"] != datetime.now().date().isoformat():
+            # Only immediate transfers are supported; never run a dated one now
+            operations_log.info("Transfer rejected: scheduled for a later date")
+            entities["error"] = "Scheduled transfer"
+            updates["entities"] = entities
+            updates["account_number"] = user_data["account_number"]
+            updates["next_action"] = "generate_response"
         elif user_data["balance"] < amount:
-            print(f"❌ Insufficient balance: {user_data['balance']} < {amount}")
+            operations_log.info("Transfer rejected: insufficient balance")
             entities["error"] = "Insufficient balance"
             entities["current_balance"] = user_data["balance"]
-            state["entities"] = entities
-            state["account_number"] = user_data["account_number"]
-            state["next_action"] = "generate_response"
+            updates["entities"] = entities
+            updates["account_number"] = user_data["account_number"]
+            updates["next_action"] = "generate_response"
         else:
             # Perform transfer
             USERS_DB[user_id]["balance"] -= amount
             USERS_DB[recipient_id]["balance"] += amount
             
             # Record transaction
-            if user_id not in TRANSACTIONS_DB:
-                TRANSACTIONS_DB[user_id] = []
-            if recipient_id not in TRANSACTIONS_DB:
-                TRANSACTIONS_DB[recipient_id] = []
-            
-            from datetime import datetime
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Add to sender's transactions
-            TRANSACTIONS_DB[user_id].insert(0, {
+            transaction_ledger.append(user_id, {
                 "date": timestamp,
                 "description": f"Transfer to {recipient_data['name']}",
                 "amount": -amount,
@@ -618,7 +917,7 @@ def banking_operations_agent(state: BankingState) -> BankingState:
             })
             
             # Add to recipient's transactions
-            TRANSACTIONS_DB[recipient_id].insert(0, {
+            transaction_ledger.append(recipient_id, {
                 "date": timestamp,
                 "description": f"Transfer from {user_data['name']}",
                 "amount": amount,
@@ -631,23 +930,221 @@ def banking_operations_agent(state: BankingState) -> BankingState:
             entities["recipient_name"] = recipient_data["name"]
             entities["new_balance"] = USERS_DB[user_id]["balance"]
             entities["recipient_account"] = recipient_data["account_number"]
-            state["entities"] = entities
-            state["account_balance"] = USERS_DB[user_id]["balance"]
-            state["account_number"] = user_data["account_number"]
+            updates["entities"] = entities
+            updates["account_balance"] = USERS_DB[user_id]["balance"]
+            updates["account_number"] = user_data["account_number"]
             
-            print(f"✅ Transfer successful: ₹{amount:,.2f} from {user_data['name']} to {recipient_data['name']}")
-            print(f"   New balance for {user_data['name']}: ₹{USERS_DB[user_id]['balance']:,.2f}")
+            operations_log.info("Transfer completed: %s -> %s", user_id, recipient_id)
     else:
         # For general queries, provide basic info
-        state["account_number"] = user_data["account_number"]
+        updates["account_number"] = user_data["account_number"]
+    
+    updates["next_action"] = "generate_response"
+    updates["current_node"] = "banking"
+    
+    return updates
+
+
+def banking_branch_agent(state: BankingState) -> Dict:
+    """
+    Banking Branch: one intent of a compound request, run in parallel with
+    the others. Results go to intent_results (a reducer key) so branches
+    never write the same field; the dialog manager merges them.
+    """
+    updates = banking_operations_agent(state)
+    result = {key: value for key, value in updates.items() if key not in ("next_action", "current_node")}
+    return {"intent_results": [{"intent": state["detected_intent"], **result}]}
+
+
+CATEGORY_LABELS = {
+    "hi": {"groceries": "किराना", "dining": "खाना-पीना", "shopping": "खरीदारी", "utilities": "बिल",
+           "rent": "किराया", "loan_emi": "लोन ईएमआई", "insurance": "बीमा", "health": "स्वास्थ्य",
+           "education": "शिक्षा", "transfers": "ट्रांसफर", "card_payment": "कार्ड भुगतान", "other": "अन्य"},
+    "gu": {"groceries": "કરિયાણું", "dining": "જમવાનું", "shopping": "ખરીદી", "utilities": "બિલ",
+           "rent": "ભાડું", "loan_emi": "લોન ઇએમઆઇ", "insurance": "વીમો", "health": "આરોગ્ય",
+           "education": "શિક્ષણ", "transfers": "ટ્રાન્સફર", "card_payment": "કાર્ડ ચુકવણી", "other": "અન્ય"},
+}
+
+
+def spending_response(spending: Dict, user_name: str, language: str) -> str:
+    """Templated answer for the spending_insights intent"""
+    labels = CATEGORY_LABELS.get(language, {})
+    label = lambda category: labels.get(category, category.replace("_", " "))
+    month = datetime.strptime(spending["month"], "%Y-%m")
+    subject = spending.get("merchant") or (label(spending["category"]) if spending.get("category") else None)
+    top = ", ".join(f"{label(c['category'])} ₹{c['spent']:,.2f}" for c in spending.get("top_categories", []))
+    
+    if language == "hi":
+        period = month.strftime("%m/%Y")
+        text = f"नमस्ते {user_name}, {period} में आपने " + (f"{subject} पर " if subject else "") + f"₹{spending['spent']:,.2f} खर्च किए।"
+        if top and not subject:
+            text += f" सबसे ज्यादा खर्च: {top}।"
+    elif language == "gu":
+        period = month.strftime("%m/%Y")
+        text = f"નમસ્તે {user_name}, {period} માં તમે " + (f"{subject} પર " if subject else "") + f"₹{spending['spent']:,.2f} ખર્ચ્યા."
+        if top and not subject:
+            text += f" સૌથી વધુ ખર્ચ: {top}."
+    else:
+        period = month.strftime("%B %Y")
+        text = f"Hello {user_name}, you spent ₹{spending['spent']:,.2f}" + (f" on {subject}" if subject else "") + f" in {period}."
+        if top and not subject:
+            text += f" Top categories: {top}."
+    return text
+
+
+def transfer_response(state: BankingState, user_name: str, language: str) -> Optional[str]:
+    """
+    Outcome of the transfer the banking node attempted: a confirmation with
+    the new balance, or the reason it failed. None if no transfer was tried.
+    The money has already moved (or not), so this never depends on the LLM.
+    """
+    entities = state.get("entities") or {}
+
+    error_msg = entities.get("error") or state.get("error")
+    if error_msg:
+        if error_msg == "Recipient not found":
+            if language == "hi":
+                return f"क्षमा करें {user_name}, प्राप्तकर्ता नहीं मिला। कृपया सही नाम दोबारा जांचें।"
+            elif language == "gu":
+                return f"માફ કરશો {user_name}, પ્રાપ્તકર્તા મળ્યો નહીં. કૃપા કરીને સાચું નામ ફરીથી તપાસો."
+            else:
+                return f"Sorry {user_name}, recipient not found. Please check the recipient name and try again."
+        elif error_msg == "Scheduled transfer":
+            when = entities.get("date", "")
+            if language == "hi":
+                return f"क्षमा करें {user_name}, मैं अभी केवल तुरंत ट्रांसफर कर सकता हूं, {when} के लिए नहीं। कोई पैसा नहीं भेजा गया।"
+            elif language == "gu":
+                return f"માફ કરશો {user_name}, હું હમણાં ફક્ત તરત ટ્રાન્સફર કરી શકું છું, {when} માટે નહીં. કોઈ પૈસા મોકલવામાં આવ્યા નથી."
+            else:
+                return f"Sorry {user_name}, I can only make transfers right away, not on {when}. No money has been sent."
+        elif error_msg == "Insufficient balance":
+            current_balance = entities.get("current_balance", 0)
+            if language == "hi":
+                return f"क्षमा करें {user_name}, आपका बैलेंस अपर्याप्त है। वर्तमान बैलेंस: ₹{current_balance:,.2f}।"
+            elif language == "gu":
+                return f"માફ કરશો {user_name}, તમારું બેલેન્સ અપૂરતું છે. વર્તમાન બેલેન્સ: ₹{current_balance:,.2f}."
+            else:
+                return f"Sorry {user_name}, insufficient balance. Your current balance is ₹{current_balance:,.2f}."
+        else:
+            if language == "hi":
+                return f"क्षमा करें {user_name}, ट्रांसफर नहीं हो सका। कृपया दोबारा कोशिश करें।"
+            elif language == "gu":
+                return f"માફ કરશો {user_name}, ટ્રાન્સફર થઈ શક્યું નહીં. કૃપા કરીને ફરી પ્રયાસ કરો."
+            else:
+                return f"Sorry {user_name}, transfer failed. Please try again."
+
+    if entities.get("transfer_successful"):
+        amount = entities["amount_transferred"]
+        recipient_name = entities["recipient_name"]
+        new_balance = entities["new_balance"]
+        recipient_account = entities.get("recipient_account", "")
+
+        if language == "hi":
+            return f"✅ सफल! {user_name}, ₹{amount:,.2f} {recipient_name} को ट्रांसफर कर दिया गया है। आपका नया बैलेंस: ₹{new_balance:,.2f}। प्राप्तकर्ता खाता: {recipient_account}।"
+        elif language == "gu":
+            return f"✅ સફળ! {user_name}, ₹{amount:,.2f} {recipient_name} ને ટ્રાન્સફર કરવામાં આવ્યા છે. તમારું નવું બેલેન્સ: ₹{new_balance:,.2f}. પ્રાપ્તકર્તા ખાતું: {recipient_account}."
+        else:
+            return f"✅ Success! {user_name}, ₹{amount:,.2f} has been transferred to {recipient_name}. Your new balance: ₹{new_balance:,.2f}. Recipient account: {recipient_account}."
+    return None
+
+
+def templated_response(intent: str, state: BankingState, user_name: str, language: str) -> Optional[str]:
+    """Reply built only from the operation's data, or None when there is none"""
+    if intent == "check_balance" and state.get("account_balance") is not None:
+        balance = state["account_balance"]
+        account_num = state.get("account_number", "")
+        if language == "hi":
+            return f"नमस्ते {user_name}, आपका वर्तमान खाता बैलेंस ₹{balance:,.2f} है। खाता संख्या {account_num}।"
+        elif language == "gu":
+            return f"નમસ્તે {user_name}, તમારું વર્તમાન ખાતા બેલેન્સ ₹{balance:,.2f} છે. ખાતા નંબર {account_num}."
+        else:
+            return f"Hello {user_name}, your current account balance is ₹{balance:,.2f}. Account number: {account_num}."
+    if intent == "view_transactions" and state.get("transaction_history"):
+        transactions = state["transaction_history"][:3]
+        if language == "hi":
+            txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
+                                  for i, t in enumerate(transactions, 1)])
+            return f"नमस्ते {user_name}, यहां आपके हाल के लेनदेन हैं:\n{txn_list}"
+        elif language == "gu":
+            txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
+                                  for i, t in enumerate(transactions, 1)])
+            return f"નમસ્તે {user_name}, અહીં તમારા તાજેતરના વ્યવહારો છે:\n{txn_list}"
+        else:
+            txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
+                                  for i, t in enumerate(transactions, 1)])
+            return f"Hello {user_name}, here are your recent transactions:\n{txn_list}"
+    if intent == "spending_insights" and state.get("entities", {}).get("spending"):
+        return spending_response(state["entities"]["spending"], user_name, language)
+    if intent == "loan_inquiry" and state.get("entities", {}).get("loan_balance"):
+        loan_balance = state["entities"]["loan_balance"]
+        interest_rate = state["entities"].get("interest_rate", 0)
+        if language == "hi":
+            return f"नमस्ते {user_name}, आपका लोन बैलेंस ₹{loan_balance:,.2f} है और ब्याज दर {interest_rate}% है।"
+        elif language == "gu":
+            return f"નમસ્તે {user_name}, તમારું લોન બેલેન્સ ₹{loan_balance:,.2f} છે અને વ્યાજ દર {interest_rate}% છે."
+        else:
+            return f"Hello {user_name}, your loan balance is ₹{loan_balance:,.2f} with an interest rate of {interest_rate}%."
+    if intent == "transfer_funds":
+        return transfer_response(state, user_name, language)
+    if intent == "credit_inquiry" and state.get("entities", {}).get("credit_limit"):
+        credit_limit = state["entities"]["credit_limit"]
+        if language == "hi":
+            return f"नमस्ते {user_name}, आपकी क्रेडिट लिमिट ₹{credit_limit:,.2f} है।"
+        elif language == "gu":
+            return f"નમસ્તે {user_name}, તમારી ક્રેડિટ લિમિટ ₹{credit_limit:,.2f} છે."
+        else:
+            return f"Hello {user_name}, your credit limit is ₹{credit_limit:,.2f}."
+    return None
+
+
+GREETINGS = {"en": "Hello {name}, ", "hi": "नमस्ते {name}, ", "gu": "નમસ્તે {name}, "}
+CLOSINGS = {
+    "en": "Is there anything else I can help you with?",
+    "hi": "क्या मैं आपकी और कोई मदद कर सकता हूं?",
+    "gu": "શું હું તમને બીજી કોઈ મદદ કરી શકું?",
+}
+
+
+def compound_response(state: BankingState, results: List[Dict], user_name: str, language: str) -> Dict:
+    """
+    One reply for a compound request, merged from the parallel branches.
+    Every combinable intent has a data template (single-intent turns also
+    replace the LLM's wording with it), so no further LLM call is made and
+    the turn costs about as much as a single-intent one.
+    """
+    order = state.get("intents") or []
+    results = sorted(results, key=lambda r: order.index(r["intent"]) if r["intent"] in order else len(order))
+    greeting = GREETINGS.get(language, GREETINGS["en"]).format(name=user_name)
+    
+    merged: Dict = {"entities": dict(state.get("entities") or {})}
+    parts = []
+    for result in results:
+        merged["entities"].update(result.get("entities") or {})
+        merged.update({key: value for key, value in result.items() if key not in ("intent", "entities", "error")})
+        text = templated_response(result["intent"], {**state, **result}, user_name, language)
+        if not text:
+            continue
+        if parts and text.startswith(greeting):
+            # Greet once: "Hello Neha, your balance ... Here are your recent transactions"
+            text = text[len(greeting):]
+            text = text[:1].upper() + text[1:]
+        parts.append(text)
     
-    state["next_action"] = "generate_response"
-    state["current_node"] = "banking"
+    if not parts:
+        parts.append(f"{greeting}{CLOSINGS.get(language, CLOSINGS['en'])}")
+    else:
+        parts.append(CLOSINGS.get(language, CLOSINGS["en"]))
+    dialog_log.debug("Merged %d intent results", len(results))
     
-    return state
+    return {
+        **merged,
+        "response": "\n".join(parts),
+        "next_action": "synthesize_speech",
+        "current_node": "dialog"
+    }
 
 
-def dialog_manager_agent(state: BankingState) -> BankingState:
+def dialog_manager_agent(state: BankingState) -> Dict:
     """Dialog Manager Agent: Generates natural responses - Multilingual support"""
     intent = state.get("detected_intent")
     user_text = state.get("transcribed_text")
@@ -657,17 +1154,27 @@ def dialog_manager_agent(state: BankingState) -> BankingState:
     if not user_id:
         # Respond in user's language
         if language == "hi":
-            state["response"] = "कृपया अपनी खाता जानकारी तक पहुंचने के लिए लॉगिन करें।"
+            response_text = "कृपया अपनी खाता जानकारी तक पहुंचने के लिए लॉगिन करें।"
         elif language == "gu":
-            state["response"] = "કૃપા કરીને તમારી ખાતા માહિતી મેળવવા માટે લૉગિન કરો."
+            response_text = "કૃપા કરીને તમારી ખાતા માહિતી મેળવવા માટે લૉગિન કરો."
         else:
-            state["response"] = "Please log in to access your account information."
-        state["next_action"] = "end"
-        return state
+            response_text = "Please log in to access your account information."
+        return {"response": response_text, "next_action": "synthesize_speech"}
     
     user_data = USERS_DB[user_id]
     user_name = user_data["name"].split()[0]
     
+    # Compound request: the parallel banking branches left one result each
+    results = state.get("intent_results") or []
+    if len(results) > 1:
+        return compound_response(state, results, user_name, language)
+    
+    # A transfer's outcome is reported from its result, with or without the LLM
+    if intent == "transfer_funds":
+        response_text = transfer_response(state, user_name, language)
+        if response_text is not None:
+            return {"response": response_text, "next_action": "synthesize_speech", "current_node": "dialog"}
+    
     # Build detailed context with actual data
     context_parts = []
     if state.get("account_balance") is not None:
@@ -694,101 +1201,49 @@ def dialog_manager_agent(state: BankingState) -> BankingState:
             context_parts.append(f"Interest Rate: {entities['interest_rate']}%")
         if entities.get("credit_limit"):
             context_parts.append(f"Credit Limit: ₹{entities['credit_limit']:,.2f}")
+        if entities.get("statement"):
+            statement = entities["statement"]
+            context_parts.append(f"\nStatement {statement['from']} to {statement['to']}: "
+                                 f"credits ₹{statement['credits']:,.2f}, debits ₹{statement['debits']:,.2f} "
+                                 f"({statement['transactions']} transactions)")
+        if entities.get("spending"):
+            spending = entities["spending"]
+            scope = spending.get("merchant") or spending.get("category") or "all categories"
+            context_parts.append(f"\nSpending in {spending['month']} ({scope}): ₹{spending['spent']:,.2f} "
+                                 f"across {spending['transactions']} transactions")
+            for item in spending.get("top_categories", []):
+                context_parts.append(f"- {item['category']}: ₹{item['spent']:,.2f}")
     
-    if state.get("retrieved_context"):
-        context_parts.extend(state["retrieved_context"])
-    
-    context_str = "\n".join(context_parts)
+    # Earlier requests on this thread, oldest first; trimmed before the
+    # account context and retrieved documents
+    history = [
+        f'Earlier request: "{msg.content}"' for msg in state.get("messages", [])
+        if isinstance(msg, HumanMessage) and msg.content != user_text
+    ]
     
-    # Language-specific prompts with STRONG enforcement
-    if language == "hi":
-        response_prompt = f"""
-आप {user_name} से हिंदी में बात कर रहे हैं। 
-
-उपयोगकर्ता का अनुरोध: "{user_text}"
-इंटेंट: {intent}
-
-खाता जानकारी:
-{context_str}
-
-**बहुत महत्वपूर्ण निर्देश:**
-- आपको केवल हिंदी में उत्तर देना है
-- अंग्रेजी शब्दों का बिल्कुल उपयोग न करें
-- ऊपर दी गई सभी विशिष्ट जानकारी (बैलेंस, ट्रांजेक्शन) को अपने उत्तर में शामिल करें
-- 2-3 वाक्यों में संक्षिप्त लेकिन पूर्ण उत्तर दें
-
-अब केवल हिंदी में उत्तर दें:
-"""
-    elif language == "gu":
-        response_prompt = f"""
-તમે {user_name} સાથે ગુજરાતીમાં વાત કરો છો.
-
-યુઝરની વિનંતી: "{user_text}"
-ઇન્ટેન્ટ: {intent}
-
-ખાતાની માહિતી:
-{context_str}
-
-**ખૂબ જ મહત્વપૂર્ણ સૂચનાઓ:**
-- તમારે ફક્ત ગુજરાતીમાં જવાબ આપવાનો છે
-- અંગ્રેજી શબ્દોનો બિલકુલ ઉપયોગ ન કરો
-- ઉપર આપેલી બધી વિગતવાર માહિતી (બેલેન્સ, ટ્રાન્ઝેક્શન) તમારા જવાબમાં સામેલ કરો
-- 2-3 વાક્યોમાં સંક્ષિપ્ત પણ સંપૂર્ણ જવાબ આપો
-
-હવે ફક્ત ગુજરાતીમાં જવાબ આપો:
-"""
-    else:  # English
-        response_prompt = f"""
-You are speaking to {user_name} in English.
-
-User's request: "{user_text}"
-Intent: {intent}
-
-Account Information:
-{context_str}
-
-**CRITICAL INSTRUCTIONS:**
-- Respond ONLY in English language
-- Do NOT use Hindi, Gujarati or any other language
-- MUST include ALL specific details from above (balance amounts, transaction details, account numbers)
-- For balance queries: State the exact balance amount
-- For transaction queries: List the recent transactions with dates, amounts, and descriptions
-- Keep the response concise but complete (2-4 sentences)
-- Be helpful and professional
-
-Now respond ONLY in English with ALL the specific details:
-"""
+    # Static instructions first; name, request and account context (trimmed
+    # to the language's token budget) last
+    system_prompt, response_prompt = prompt_registry.render(
+        "dialog", language, context_lines=context_parts, history_lines=history,
+        documents=state.get("retrieved_context") or [],
+        user_name=user_name, user_text=user_text, intent=intent
+    )
     
     try:
-        # Use SystemMessage + HumanMessage for stronger language enforcement
-        if language == "hi":
-            messages = [
-                SystemMessage(content="आप एक हिंदी बैंकिंग सहायक हैं। आपको हमेशा केवल हिंदी में जवाब देना है।"),
-                HumanMessage(content=response_prompt)
-            ]
-        elif language == "gu":
-            messages = [
-                SystemMessage(content="તમે એक ગુજરાતી બેન્કિંગ આસિસ્ટન્ટ છો. તમારે હંમેશા ફક્ત ગુજરાતીમાં જ જવાબ આપવાનો છે."),
-                HumanMessage(content=response_prompt)
-            ]
-        else:
-            messages = [
-                SystemMessage(content="You are an English banking assistant. You must ALWAYS respond ONLY in English and include all specific account details."),
-                HumanMessage(content=response_prompt)
-            ]
+        # SystemMessage + HumanMessage for stronger language enforcement
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=response_prompt)]
         
-        response = llm.invoke(messages)
+        response = invoke_llm(messages, state)
+        prompt_registry.record_usage("dialog", getattr(response, "usage_metadata", None))
         generated_response = response.content.strip()
         
-        print(f"🤖 LLM Generated Response: {generated_response[:100]}...")
-        print(f"🔍 Dialog Manager - Intent: {intent}, Balance in state: {state.get('account_balance')}, User: {user_name}")
+        dialog_log.debug("Generated %d-char response for %s", len(generated_response), intent)
         
         # CRITICAL: Always override with actual data for balance, transactions, and loans
         # to prevent LLM hallucination of financial data
         if intent == "check_balance" and state.get("account_balance") is not None:
             balance = state["account_balance"]
             account_num = state.get("account_number", "")
-            print(f"✅ Overriding with actual balance: ₹{balance:,.2f}")
             # Always use the actual balance data
             if language == "hi":
                 generated_response = f"नमस्ते {user_name}, आपका वर्तमान खाता बैलेंस ₹{balance:,.2f} है। खाता संख्या {account_num}। क्या मैं आपकी और कोई मदद कर सकता हूं?"
@@ -796,11 +1251,9 @@ Now respond ONLY in English with ALL the specific details:
                 generated_response = f"નમસ્તે {user_name}, તમારું વર્તમાન ખાતા બેલેન્સ ₹{balance:,.2f} છે. ખાતા નંબર {account_num}. શું હું તમને બીજી કોઈ મદદ કરી શકું?"
             else:
                 generated_response = f"Hello {user_name}, your current account balance is ₹{balance:,.2f}. Account number: {account_num}. Is there anything else I can help you with?"
-            print(f"✅ Final Response: {generated_response}")
         
         elif intent == "view_transactions" and state.get("transaction_history"):
             transactions = state["transaction_history"]
-            print(f"✅ Overriding with {len(transactions)} actual transactions")
             # Always use actual transaction data
             if language == "hi":
                 txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
@@ -815,6 +1268,10 @@ Now respond ONLY in English with ALL the specific details:
                                       for i, t in enumerate(transactions[:3], 1)])
                 generated_response = f"Hello {user_name}, here are your recent transactions:\n{txn_list}\nWould you like more details?"
         
+        elif intent == "spending_insights" and state.get("entities", {}).get("spending"):
+            # Always use the actual aggregates
+            generated_response = spending_response(state["entities"]["spending"], user_name, language)
+        
         elif intent == "loan_inquiry" and state.get("entities", {}).get("loan_balance"):
             loan_balance = state["entities"]["loan_balance"]
             interest_rate = state["entities"].get("interest_rate", 0)
@@ -836,110 +1293,44 @@ Now respond ONLY in English with ALL the specific details:
             else:
                 generated_response = f"Hello {user_name}, your credit limit is ₹{credit_limit:,.2f}. Is there anything else I can help you with?"
         
-        elif intent == "transfer_funds" and state.get("entities"):
-            entities = state["entities"]
-            
-            # Check for errors
-            if entities.get("error"):
-                error_msg = entities["error"]
-                if error_msg == "Recipient not found":
-                    if language == "hi":
-                        generated_response = f"क्षमा करें {user_name}, प्राप्तकर्ता नहीं मिला। कृपया सही नाम दोबारा जांचें।"
-                    elif language == "gu":
-                        generated_response = f"માફ કરશો {user_name}, પ્રાપ્તકર્તા મળ્યો નહીં. કૃપા કરીને સાચું નામ ફરીથી તપાસો."
-                    else:
-                        generated_response = f"Sorry {user_name}, recipient not found. Please check the recipient name and try again."
-                elif error_msg == "Insufficient balance":
-                    current_balance = entities.get("current_balance", 0)
-                    if language == "hi":
-                        generated_response = f"क्षमा करें {user_name}, आपका बैलेंस अपर्याप्त है। वर्तमान बैलेंस: ₹{current_balance:,.2f}।"
-                    elif language == "gu":
-                        generated_response = f"માફ કરશો {user_name}, તમારું બેલેન્સ અપૂરતું છે. વર્તમાન બેલેન્સ: ₹{current_balance:,.2f}."
-                    else:
-                        generated_response = f"Sorry {user_name}, insufficient balance. Your current balance is ₹{current_balance:,.2f}."
-                else:
-                    if language == "hi":
-                        generated_response = f"क्षमा करें {user_name}, ट्रांसफर नहीं हो सका। कृपया दोबारा कोशिश करें।"
-                    elif language == "gu":
-                        generated_response = f"માફ કરશો {user_name}, ટ્રાન્સફર થઈ શક્યું નહીં. કૃપા કરીને ફરી પ્રયાસ કરો."
-                    else:
-                        generated_response = f"Sorry {user_name}, transfer failed. Please try again."
-            
-            # Success case
-            elif entities.get("transfer_successful"):
-                amount = entities["amount_transferred"]
-                recipient_name = entities["recipient_name"]
-                new_balance = entities["new_balance"]
-                recipient_account = entities.get("recipient_account", "")
-                
-                if language == "hi":
-                    generated_response = f"✅ सफल! {user_name}, ₹{amount:,.2f} {recipient_name} को ट्रांसफर कर दिया गया है। आपका नया बैलेंस: ₹{new_balance:,.2f}। प्राप्तकर्ता खाता: {recipient_account}।"
-                elif language == "gu":
-                    generated_response = f"✅ સફળ! {user_name}, ₹{amount:,.2f} {recipient_name} ને ટ્રાન્સફર કરવામાં આવ્યા છે. તમારું નવું બેલેન્સ: ₹{new_balance:,.2f}. પ્રાપ્તકર્તા ખાતું: {recipient_account}."
-                else:
-                    generated_response = f"✅ Success! {user_name}, ₹{amount:,.2f} has been transferred to {recipient_name}. Your new balance: ₹{new_balance:,.2f}. Recipient account: {recipient_account}."
-                
-                print(f"✅ Transfer confirmed: ₹{amount:,.2f} to {recipient_name}, new balance: ₹{new_balance:,.2f}")
-        
-        state["response"] = generated_response
+        response_text = generated_response
         
     except Exception as e:
-        print(f"⚠️ LLM generation error: {e}")
+        dialog_log.warning("Response generation failed, using template: %s", e)
         # Comprehensive fallback responses based on intent
-        if intent == "check_balance" and state.get("account_balance") is not None:
-            balance = state["account_balance"]
-            account_num = state.get("account_number", "")
-            if language == "hi":
-                state["response"] = f"नमस्ते {user_name}, आपका वर्तमान खाता बैलेंस ₹{balance:,.2f} है। खाता संख्या {account_num}।"
-            elif language == "gu":
-                state["response"] = f"નમસ્તે {user_name}, તમારું વર્તમાન ખાતા બેલેન્સ ₹{balance:,.2f} છે. ખાતા નંબર {account_num}."
-            else:
-                state["response"] = f"Hello {user_name}, your current account balance is ₹{balance:,.2f}. Account number: {account_num}."
-        elif intent == "view_transactions" and state.get("transaction_history"):
-            transactions = state["transaction_history"][:3]
-            if language == "hi":
-                txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
-                                      for i, t in enumerate(transactions, 1)])
-                state["response"] = f"नमस्ते {user_name}, यहां आपके हाल के लेनदेन हैं:\n{txn_list}"
-            elif language == "gu":
-                txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
-                                      for i, t in enumerate(transactions, 1)])
-                state["response"] = f"નમસ્તે {user_name}, અહીં તમારા તાજેતરના વ્યવહારો છે:\n{txn_list}"
-            else:
-                txn_list = "\n".join([f"{i}. {t['date']} - {t['type'].upper()} ₹{t['amount']:,.2f} - {t['description']}" 
-                                      for i, t in enumerate(transactions, 1)])
-                state["response"] = f"Hello {user_name}, here are your recent transactions:\n{txn_list}"
-        elif intent == "loan_inquiry" and state.get("entities", {}).get("loan_balance"):
-            loan_balance = state["entities"]["loan_balance"]
-            interest_rate = state["entities"].get("interest_rate", 0)
-            if language == "hi":
-                state["response"] = f"नमस्ते {user_name}, आपका लोन बैलेंस ₹{loan_balance:,.2f} है और ब्याज दर {interest_rate}% है।"
-            elif language == "gu":
-                state["response"] = f"નમસ્તે {user_name}, તમારું લોન બેલેન્સ ₹{loan_balance:,.2f} છે અને વ્યાજ દર {interest_rate}% છે."
-            else:
-                state["response"] = f"Hello {user_name}, your loan balance is ₹{loan_balance:,.2f} with an interest rate of {interest_rate}%."
-        elif intent == "credit_inquiry" and state.get("entities", {}).get("credit_limit"):
-            credit_limit = state["entities"]["credit_limit"]
-            if language == "hi":
-                state["response"] = f"नमस्ते {user_name}, आपकी क्रेडिट लिमिट ₹{credit_limit:,.2f} है।"
-            elif language == "gu":
-                state["response"] = f"નમસ્તે {user_name}, તમારી ક્રેડિટ લિમિટ ₹{credit_limit:,.2f} છે."
-            else:
-                state["response"] = f"Hello {user_name}, your credit limit is ₹{credit_limit:,.2f}."
-        else:
+        response_text = templated_response(intent, state, user_name, language)
+        if response_text is None:
             # Generic fallback
             if language == "hi":
-                state["response"] = f"नमस्ते {user_name}, मैं आपकी बैंकिंग जरूरतों में मदद के लिए यहां हूं।"
+                response_text = f"नमस्ते {user_name}, मैं आपकी बैंकिंग जरूरतों में मदद के लिए यहां हूं।"
             elif language == "gu":
-                state["response"] = f"નમસ્તે {user_name}, હું તમારી બેન્કિંગ જરૂરિયાતોમાં મદદ કરવા અહીં છું."
+                response_text = f"નમસ્તે {user_name}, હું તમારી બેન્કિંગ જરૂરિયાતોમાં મદદ કરવા અહીં છું."
             else:
-                state["response"] = f"Hello {user_name}, I'm here to help with your banking needs."
+                response_text = f"Hello {user_name}, I'm here to help with your banking needs."
+    
+    return {
+        "response": response_text,
+        "next_action": "synthesize_speech",
+        "current_node": "dialog"
+    }
+
+
+def speech_synthesis_agent(state: BankingState) -> Dict:
+    """Speech Synthesis Agent: Registers the reply for streamed server-side TTS"""
+    response = state.get("response")
+    tts_audio = None
     
-    state["next_action"] = "end"
-    state["current_node"] = "dialog"
-    state["compliance_check_passed"] = True
+    if response and speech_synthesizer.available:
+        # Synthesis happens when the client fetches the URL, so the text
+        # response is not delayed and audio starts with the first segment
+        job_id = speech_synthesizer.create_job(response, state.get("language", "en"))
+        tts_audio = f"/api/tts/{job_id}"
     
-    return state
+    return {
+        "tts_audio": tts_audio,
+        "current_node": "tts",
+        "next_action": "end"
+    }
 
 
 # ============================================================================
@@ -950,12 +1341,18 @@ def route_next_action(state: BankingState) -> str:
     """Router function to determine next agent"""
     next_action = state.get("next_action", "end")
     
+    # Compound requests run one banking branch per intent, in parallel
+    intents = state.get("intents") or []
+    if next_action == "execute_banking" and len(intents) > 1:
+        return [Send("banking_branch", {**state, "detected_intent": intent}) for intent in intents]
+    
     routing_map = {
         "understand_intent": "intent",
         "retrieve_context": "rag",
         "execute_banking": "banking",
         "generate_response": "dialog",
         "respond": "dialog",
+        "synthesize_speech": "tts",
         "end": END
     }
     
@@ -966,16 +1363,23 @@ def route_next_action(state: BankingState) -> str:
 # BUILD GRAPH
 # ============================================================================
 
-def build_banking_assistant_graph():
-    """Build and compile the LangGraph workflow"""
+def build_banking_assistant_graph(checkpointer=None, node_wrapper=None):
+    """
+    Build and compile the LangGraph workflow. checkpointer defaults to an
+    in-memory MemorySaver; node_wrapper (callable -> callable) lets
+    benchmarks instrument every node.
+    """
     workflow = StateGraph(BankingState)
+    wrap = node_wrapper or (lambda node: node)
     
     # Add nodes
-    workflow.add_node("speech", speech_agent)
-    workflow.add_node("intent", intent_understanding_agent)
-    workflow.add_node("rag", rag_retrieval_agent)
-    workflow.add_node("banking", banking_operations_agent)
-    workflow.add_node("dialog", dialog_manager_agent)
+    workflow.add_node("speech", wrap(speech_agent))
+    workflow.add_node("intent", wrap(intent_understanding_agent))
+    workflow.add_node("rag", wrap(rag_retrieval_agent))
+    workflow.add_node("banking", wrap(banking_operations_agent))
+    workflow.add_node("banking_branch", wrap(banking_branch_agent))
+    workflow.add_node("dialog", wrap(dialog_manager_agent))
+    workflow.add_node("tts", wrap(speech_synthesis_agent))
     
     # Add edges
     workflow.add_edge(START, "speech")
@@ -983,16 +1387,21 @@ def build_banking_assistant_graph():
     workflow.add_conditional_edges("intent", route_next_action)
     workflow.add_conditional_edges("rag", route_next_action)
     workflow.add_conditional_edges("banking", route_next_action)
+    workflow.add_edge("banking_branch", "dialog")  # Runs once, after every branch
     workflow.add_conditional_edges("dialog", route_next_action)
+    workflow.add_conditional_edges("tts", route_next_action)
     
     # Compile with memory
-    memory = MemorySaver()
+    memory = checkpointer if checkpointer is not None else MemorySaver()
     app = workflow.compile(checkpointer=memory)
     
     return app
 
 
+# Opt-in per-request profiles (X-Profile header or PROFILE_SAMPLE_RATE)
+request_profiler = RequestProfiler()
+
 # Initialize the banking assistant
-banking_assistant = build_banking_assistant_graph()
+banking_assistant = build_banking_assistant_graph(node_wrapper=request_profiler.wrap_node)
 
-print("✅ Banking Assistant Backend Module Loaded")
+startup_log.info("Banking assistant backend loaded")
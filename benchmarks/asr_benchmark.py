@@ -0,0 +1,138 @@
+"""
+ASR Benchmark
+Compares real-time factor (RTF) and word error rate (WER) across ASR backends
+and model sizes on sample clips
+
+Clips live in a directory as audio files with a reference transcript next to
+each one (same name, .txt extension). The clip language is taken from a
+`<lang>_` filename prefix (en_balance.wav, hi_transfer.webm, ...), or from a
+manifest.json mapping file names to {"text": ..., "language": ...}.
+
+Usage:
+    python benchmarks/asr_benchmark.py --clips samples/ \
+        --backends whisper faster-whisper --models tiny base small
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_engines import create_asr_engine  # noqa: E402
+from voice_activity import SAMPLE_RATE, trim_silence  # noqa: E402
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".ogg", ".opus", ".mp3", ".m4a", ".flac")
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_clips(clips_dir: str):
+    manifest_path = os.path.join(clips_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    clips = []
+    for name in sorted(os.listdir(clips_dir)):
+        if not name.endswith(AUDIO_EXTENSIONS):
+            continue
+        entry = manifest.get(name, {})
+        text = entry.get("text")
+        if text is None:
+            transcript = os.path.join(clips_dir, os.path.splitext(name)[0] + ".txt")
+            if not os.path.exists(transcript):
+                print(f"⚠️ Skipping {name}: no reference transcript")
+                continue
+            with open(transcript, encoding="utf-8") as f:
+                text = f.read().strip()
+        language = entry.get("language") or name.split("_", 1)[0]
+        clips.append({"name": name, "path": os.path.join(clips_dir, name),
+                      "text": text, "language": language if language in ("en", "hi", "gu") else None})
+    return clips
+
+
+def run(clips, backend: str, model: str, use_vad: bool):
+    # Force one model size for all languages so sizes can be compared directly
+    engine = create_asr_engine(backend, default_model=model, models_by_language={})
+    engine.get_model()  # Exclude model load time from the measurements
+
+    per_language = defaultdict(lambda: {"audio_s": 0.0, "compute_s": 0.0, "wer": []})
+    for clip in clips:
+        audio = engine.load_audio(clip["path"])
+        duration = len(audio) / SAMPLE_RATE
+        started = time.perf_counter()
+        if use_vad:
+            audio = trim_silence(audio).audio
+        result = engine.transcribe(audio, language=clip["language"]) if len(audio) else {"text": ""}
+        elapsed = time.perf_counter() - started
+
+        stats = per_language[clip["language"] or "auto"]
+        stats["audio_s"] += duration
+        stats["compute_s"] += elapsed
+        stats["wer"].append(word_error_rate(clip["text"], result["text"]))
+
+    rows = []
+    for language, stats in sorted(per_language.items()):
+        rows.append({
+            "backend": backend,
+            "model": model,
+            "language": language,
+            "clips": len(stats["wer"]),
+            "rtf": stats["compute_s"] / stats["audio_s"] if stats["audio_s"] else 0.0,
+            "wer": sum(stats["wer"]) / len(stats["wer"]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", required=True, help="Directory of audio clips and reference transcripts")
+    parser.add_argument("--backends", nargs="+", default=["whisper", "faster-whisper"])
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe untrimmed audio")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    if not clips:
+        sys.exit(f"No clips with reference transcripts found in {args.clips}")
+
+    results = []
+    for backend in args.backends:
+        for model in args.models:
+            try:
+                results.extend(run(clips, backend, model, use_vad=not args.no_vad))
+            except Exception as e:
+                print(f"⚠️ {backend}/{model} failed: {e}")
+
+    print(f"\n{'backend':<16}{'model':<10}{'lang':<6}{'clips':>6}{'RTF':>8}{'WER':>8}")
+    for row in results:
+        print(f"{row['backend']:<16}{row['model']:<10}{row['language']:<6}{row['clips']:>6}"
+              f"{row['rtf']:>8.3f}{row['wer']:>8.1%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
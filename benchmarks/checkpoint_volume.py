@@ -0,0 +1,147 @@
+"""
+Checkpoint Volume Benchmark
+Measures how many bytes the LangGraph checkpointer serializes per turn
+
+Two builds of the same graph are compared:
+
+- delta:   nodes return only the keys they change and turns start from
+           new_turn_state() (the current code)
+- legacy:  every node result is merged back into the full state
+           ({**state, **update}) and turns start from the full ~30-key
+           initial dict, as the graph used to do
+
+Each checkpointer gets a serializer that counts the bytes of every
+dumps_typed() call. Turns run with deadline=0.0, so no LLM is called and
+every node takes its keyword/template path; the state traffic is the same
+as on the LLM path.
+
+Usage:
+    python benchmarks/checkpoint_volume.py --turns 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure the backend for in-process benchmarking before importing it
+os.environ.setdefault("SKIP_LLM_GATEWAY", "true")
+os.environ.setdefault("ASR_PRELOAD", "false")
+os.environ.setdefault("TTS_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("AUDIT_LOG_PATH", os.path.join(tempfile.mkdtemp(prefix="checkpoint-bench-"), "audit.jsonl"))
+
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+import banking_assistant_backend as backend  # noqa: E402
+
+QUERIES = [
+    "What is my account balance?",
+    "Show my recent transactions",
+    "What is my loan balance?",
+    "What is my credit card limit?",
+    "Hello, what can you do?",
+]
+
+
+REDUCER_KEYS = ("messages", "intent_results")
+
+
+class CountingSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer that tallies serialized bytes"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.bytes = 0
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        self.calls += 1
+        self.bytes += len(data)
+        return type_, data
+
+
+def legacy_node(node):
+    """
+    Emulate the old nodes that returned the whole state. Parallel banking
+    branches (which the old graph did not have) still return only their
+    result: two whole-state updates in one step would conflict.
+    """
+    if node is backend.banking_branch_agent:
+        return node
+
+    def wrapped(state):
+        # Reducer channels append what they are given, so returning them
+        # again would duplicate them on every node rather than rewrite them
+        full = {key: value for key, value in state.items() if key not in REDUCER_KEYS}
+        return {**full, **node(state)}
+    return wrapped
+
+
+def legacy_turn_state(user_input: str, user_id: str, thread_id: str) -> dict:
+    return {
+        "messages": [], "user_input": user_input, "audio_file": None, "audio_sha256": None,
+        "transcribed_text": None, "detected_intent": None, "intent_confidence": 0.0, "entities": {},
+        "is_authenticated": True, "user_id": user_id, "session_token": thread_id,
+        "voice_biometric_verified": True, "otp_verified": True, "security_level": "high",
+        "account_number": None, "account_balance": None, "transaction_history": [],
+        "pending_transaction": None, "retrieved_context": [], "knowledge_base_results": [],
+        "conversation_history": [], "requires_clarification": False, "clarification_question": None,
+        "response": "", "tts_audio": None, "audio_metrics": None, "language": "en",
+        "error": None, "current_node": "start",
+        "next_action": "process_speech", "deadline": 0.0, "priority": 3,
+    }
+
+
+def delta_turn_state(user_input: str, user_id: str, thread_id: str) -> dict:
+    return backend.new_turn_state(
+        user_input=user_input, audio_file=None, audio_sha256=None, is_authenticated=True,
+        user_id=user_id, session_token=thread_id, voice_biometric_verified=True, otp_verified=True,
+        security_level="high", language="en", deadline=0.0, priority=3,
+    )
+
+
+def run(name: str, node_wrapper, make_state, turns: int, user_id: str):
+    serde = CountingSerializer()
+    graph = backend.build_banking_assistant_graph(MemorySaver(serde=serde), node_wrapper)
+    config = {"configurable": {"thread_id": f"bench-{name}"}}
+
+    started = time.perf_counter()
+    for i in range(turns):
+        graph.invoke(make_state(QUERIES[i % len(QUERIES)], user_id, config["configurable"]["thread_id"]), config)
+    elapsed = time.perf_counter() - started
+    return {
+        "name": name,
+        "bytes_per_turn": serde.bytes / turns,
+        "writes_per_turn": serde.calls / turns,
+        "ms_per_turn": elapsed * 1000 / turns,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--user", default="neha", help="User from USERS_DB")
+    args = parser.parse_args()
+
+    rows = [
+        run("legacy", legacy_node, legacy_turn_state, args.turns, args.user),
+        run("delta", None, delta_turn_state, args.turns, args.user),
+    ]
+
+    print(f"\n{'graph':<10}{'bytes/turn':>14}{'writes/turn':>14}{'ms/turn':>10}")
+    for row in rows:
+        print(f"{row['name']:<10}{row['bytes_per_turn']:>14.0f}{row['writes_per_turn']:>14.1f}"
+              f"{row['ms_per_turn']:>10.2f}")
+    legacy, delta = rows
+    if delta["bytes_per_turn"]:
+        print(f"\nCheckpoint bytes reduced {legacy['bytes_per_turn'] / delta['bytes_per_turn']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Ledger Benchmark
+Compares the columnar TransactionLedger with lists of dicts on a long
+synthetic history: memory per transaction, and the time for a filtered
+page, a 30-day statement, category totals and running balances
+
+Usage:
+    python benchmarks/ledger_benchmark.py --transactions 200000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spending_insights import categorize  # noqa: E402
+from transaction_ledger import TransactionLedger  # noqa: E402
+
+DESCRIPTIONS = [
+    "Salary Credit - Tech Corp", "Personal Loan EMI", "Amazon - Electronics", "Big Bazaar - Groceries",
+    "BESCOM Electricity Bill", "Truffles Restaurant", "Monthly Rent", "Apollo Pharmacy", "LIC Premium Payment",
+]
+
+
+def make_history(count: int, seed: int = 11):
+    """Newest-first list of dicts shaped like TRANSACTIONS_DB rows"""
+    rng = random.Random(seed)
+    day = date(2015, 1, 1)
+    balance = 100000.0
+    rows = []
+    for i in range(count):
+        if i % 8 == 0:
+            day += timedelta(days=1)
+        credit = rng.random() < 0.2
+        amount = round(rng.uniform(50, 20000), 2)
+        balance += amount if credit else -amount
+        rows.append({"date": day.isoformat(), "type": "credit" if credit else "debit", "amount": amount,
+                     "description": rng.choice(DESCRIPTIONS), "balance": round(balance, 2)})
+    rows.reverse()
+    return rows
+
+
+def timed_ms(fn, repeat: int = 5) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def dict_page(rows, date_from, date_to, min_amount, limit=20):
+    page = []
+    for row in rows:
+        if date_from <= row["date"][:10] <= date_to and row["type"] == "debit" and abs(row["amount"]) >= min_amount:
+            page.append(row)
+            if len(page) == limit:
+                break
+    return page
+
+
+def dict_statement(rows, date_from):
+    credits = debits = 0.0
+    by_category = defaultdict(float)
+    for row in rows:
+        if row["date"][:10] < date_from:
+            break
+        if row["type"] == "credit":
+            credits += row["amount"]
+        else:
+            debits += row["amount"]
+            by_category[categorize(row["description"])] += row["amount"]
+    return credits, debits, by_category
+
+
+def dict_category_totals(rows):
+    totals = defaultdict(float)
+    for row in rows:
+        if row["type"] == "debit":
+            totals[categorize(row["description"])] += row["amount"]
+    return totals
+
+
+def dict_running_balances(rows, opening):
+    balances, balance = [], opening
+    for row in reversed(rows):
+        balance += row["amount"] if row["type"] == "credit" else -row["amount"]
+        balances.append(balance)
+    return balances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=200000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    rows = make_history(args.transactions)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    ledger = TransactionLedger({"bench": rows})
+    stats = ledger.stats()
+    newest = rows[0]["date"][:10]
+    month_ago = (date.fromisoformat(newest) - timedelta(days=30)).isoformat()
+    year_ago = (date.fromisoformat(newest) - timedelta(days=365)).isoformat()
+    year_end = (date.fromisoformat(year_ago) + timedelta(days=30)).isoformat()
+
+    print(f"\n{args.transactions} transactions")
+    print(f"{'memory / transaction':<28}{dict_bytes / len(rows):>12.1f} B{stats['bytes_per_transaction']:>12.1f} B")
+    print(f"\n{'operation (ms)':<28}{'dicts':>14}{'columnar':>14}")
+    comparisons = [
+        ("page, year-old range", lambda: dict_page(rows, year_ago, year_end, 1000),
+         lambda: ledger.page("bench", date_from=year_ago, date_to=year_end, txn_type="debit", min_amount=1000)),
+        ("30-day statement", lambda: dict_statement(rows, month_ago),
+         lambda: ledger.statement("bench", days=30)),
+        ("category totals (all)", lambda: dict_category_totals(rows),
+         lambda: ledger.statement("bench", days=100000)),
+        ("running balances", lambda: dict_running_balances(rows, 100000.0),
+         lambda: ledger.running_balances("bench", 100000.0)),
+        ("monthly totals", None, lambda: ledger.monthly_totals("bench")),
+    ]
+    for name, with_dicts, with_columns in comparisons:
+        dict_ms = f"{timed_ms(with_dicts):>14.2f}" if with_dicts else f"{'-':>14}"
+        print(f"{name:<28}{dict_ms}{timed_ms(with_columns):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
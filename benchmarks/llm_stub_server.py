@@ -0,0 +1,300 @@
+"""
+LLM Stub Server
+Local OpenAI/Azure-compatible chat completions endpoint for offline load tests
+
+Answers like the gateway model (see stubs.complete): intent prompts get
+schema-valid intent JSON, dialog prompts a reply in the system message's
+language. Latency, error rate and streaming speed are configurable, and
+every draw is seeded by the request body and how many times that body has
+been seen, so a replayed workload sees the same latencies and failures.
+
+Point the backend at it with:
+    LLM_GATEWAY_AUTH=none AZURE_ENDPOINT=http://localhost:8400 \\
+    API_VERSION=2024-06-01 LLM_MODEL=stub python backend_server.py
+
+Latency is time to first token; --token-ms is added per generated token
+(streamed as server-sent events when the request sets "stream": true).
+
+Usage:
+    python benchmarks/llm_stub_server.py --latency lognormal:400:0.5 --token-ms 15
+    python benchmarks/llm_stub_server.py --latency uniform:100:300 --error-rate 0.05 --error-status 429 503
+    python benchmarks/llm_stub_server.py --hang-rate 0.02      # exercise client timeouts
+    curl localhost:8400/stats
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List
+
+from stubs import complete
+
+_TOKEN = re.compile(r"\s*\S+")
+
+
+# ============================================================================
+# LATENCY DISTRIBUTIONS
+# ============================================================================
+
+class Latency:
+    """
+    Parsed from "kind:params" (milliseconds):
+        fixed:200  uniform:100:400  normal:300:50  lognormal:300:0.5 (median, sigma)
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Bad latency spec '{spec}' (e.g. fixed:200, uniform:100:400, "
+                             f"normal:300:50, lognormal:300:0.5)")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self.spec = spec
+
+    def sample_ms(self, rng: random.Random) -> float:
+        a, *rest = self.params
+        if self.kind == "fixed":
+            return a
+        if self.kind == "uniform":
+            return rng.uniform(a, rest[0])
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(a, rest[0]))
+        return a * math.exp(rng.gauss(0.0, rest[0]))
+
+
+# ============================================================================
+# STUB MODEL
+# ============================================================================
+
+def reply_for(messages: List[Dict]) -> str:
+    """Gateway-model answer for OpenAI-style chat messages"""
+    def text(message):
+        content = message.get("content") or ""
+        if isinstance(content, list):  # content parts
+            return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return content
+
+    if not any(m.get("role") == "system" for m in messages):
+        # A bare prompt string arrives as one user message
+        return complete(text(messages[-1]) if messages else "")
+    return complete([SimpleNamespace(type=m.get("role"), content=text(m)) for m in messages])
+
+
+def tokens(text: str) -> List[str]:
+    """Whitespace-preserving pieces, roughly one per model token"""
+    return _TOKEN.findall(text) or [text]
+
+
+class StubModel:
+    """Draws latency and failures per request and keeps counters"""
+
+    def __init__(self, latency: Latency, token_ms: float, error_rate: float, error_status: List[int],
+                 hang_rate: float, hang_s: float, seed: int):
+        self.latency = latency
+        self.token_ms = token_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang_s = hang_s
+        self.seed = seed
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"requests": 0, "streamed": 0, "errors": 0, "hangs": 0, "peak_in_flight": 0}
+
+    def rng_for(self, body: bytes) -> random.Random:
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            occurrence = self._seen.get(digest, 0)
+            self._seen[digest] = occurrence + 1
+        return random.Random(f"{self.seed}:{digest}:{occurrence}")
+
+    def enter(self, streamed: bool):
+        with self._lock:
+            self._in_flight += 1
+            self._counts["requests"] += 1
+            self._counts["streamed"] += int(streamed)
+            self._counts["peak_in_flight"] = max(self._counts["peak_in_flight"], self._in_flight)
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {**self._counts, "in_flight": self._in_flight, "latency": self.latency.spec,
+                    "token_ms": self.token_ms, "error_rate": self.error_rate, "hang_rate": self.hang_rate}
+
+
+# ============================================================================
+# HTTP HANDLER
+# ============================================================================
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """POST .../chat/completions (Azure deployment paths or /v1), GET /stats"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the gateway
+    model: StubModel = None
+    quiet = True
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+    def send_json(self, status: int, payload: Dict, headers: Dict[str, str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("", "/health"):
+            self.send_json(200, {"status": "ok"})
+        elif self.path.rstrip("/") == "/stats":
+            self.send_json(200, self.model.stats())
+        else:
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.split("?")[0].endswith("/chat/completions"):
+            self.send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self.send_json(400, {"error": {"code": "BadRequest", "message": "Body is not JSON"}})
+            return
+
+        model = self.model
+        streamed = bool(request.get("stream"))
+        rng = model.rng_for(body)
+        model.enter(streamed)
+        try:
+            # Draw in a fixed order so outcomes depend only on (seed, body, occurrence)
+            failure = rng.random()
+            first_token_ms = model.latency.sample_ms(rng)
+            if failure < model.hang_rate:
+                model.count("hangs")
+                time.sleep(model.hang_s)
+                self.close_connection = True
+                return
+            if failure < model.hang_rate + model.error_rate:
+                model.count("errors")
+                time.sleep(first_token_ms / 1000.0)
+                status = rng.choice(model.error_status)
+                headers = {"Retry-After": "1"} if status == 429 else None
+                self.send_json(status, {"error": {"code": str(status), "message": "Injected stub failure"}},
+                               headers)
+                return
+
+            reply = reply_for(request.get("messages") or [])
+            pieces = tokens(reply)
+            prompt_tokens = sum(len(tokens(str(m.get("content") or ""))) for m in request.get("messages") or [])
+            completion = {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                "created": int(time.time()),
+                "model": request.get("model") or "stub",
+            }
+            time.sleep(first_token_ms / 1000.0)
+            if streamed:
+                self.stream(completion, pieces)
+            else:
+                time.sleep(model.token_ms * len(pieces) / 1000.0)
+                self.send_json(200, {
+                    **completion,
+                    "object": "chat.completion",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(pieces),
+                              "total_tokens": prompt_tokens + len(pieces)},
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up (timeout or cancelled stream)
+        finally:
+            model.leave()
+
+    def stream(self, completion: Dict, pieces: List[str]):
+        """Server-sent events in the OpenAI chunk format, ending with [DONE]"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict, finish_reason=None):
+            chunk = {**completion, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.model.token_ms / 1000.0)
+            event({"content": piece})
+        event({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def serve(host: str, port: int, model: StubModel, quiet: bool = True) -> ThreadingHTTPServer:
+    """Bound server (call serve_forever()); handler class state is per server"""
+    handler = type("Handler", (ChatCompletionsHandler,), {"model": model, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--latency", type=Latency, default=Latency("lognormal:300:0.4"),
+                        help="time to first token, e.g. fixed:200, uniform:100:400, normal:300:50, "
+                             "lognormal:300:0.5")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="delay per generated token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, nargs="+", default=[500], help="statuses for failures")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests that never answer")
+    parser.add_argument("--hang-s", type=float, default=60.0, help="how long a hung request holds the socket")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    model = StubModel(args.latency, args.token_ms, args.error_rate, args.error_status,
+                      args.hang_rate, args.hang_s, args.seed)
+    server = serve(args.host, args.port, model, quiet=not args.verbose)
+    print(f"LLM stub listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency.spec}, {args.token_ms:g} ms/token, "
+          f"errors {args.error_rate:.0%}, hangs {args.hang_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(model.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Logging Benchmark
+Per-request logging overhead under concurrency: the old print() lines
+versus the queue-based, sampled logging in log_config
+
+Each simulated request emits the log lines of one text turn (intent,
+banking operation, dialog) from N threads at once, then waits --work-ms
+(standing in for the LLM and ASR calls a real turn waits on). The time
+spent in the logging calls themselves is measured on the request threads;
+output goes to a line-buffered file, as it would to a terminal or
+container log pipe.
+
+Usage:
+    python benchmarks/logging_benchmark.py --threads 32 --requests 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_config  # noqa: E402
+from log_config import bind_request_id, configure_logging, get_logger, logging_stats, shutdown_logging  # noqa: E402
+
+USER = {"name": "Niyati Shah", "balance": 245000.5, "account_number": "NGB123456789012"}
+ENTITIES = {"amount": 1500.0, "recipient": "rahul", "date": "2026-10-19"}
+LLM_RESPONSE = '{"intent": "transfer_funds", "confidence": 0.93, "entities": {"amount": 1500, "recipient": "Rahul"}}'
+REPLY = "Success! Niyati Shah, ₹1,500.00 has been transferred to Rahul Mehta. Your new balance: ₹243,500.50."
+
+
+def print_request(out):
+    """The per-turn print() lines the graph used to emit"""
+    print(f"🔍 Received request - user_id: user_001, language: en, input: {'send 1500 to rahul'[:50]}", file=out)
+    print(f"🔍 Intent Agent - User text: 'send 1500 to rahul', Language: en", file=out)
+    print(f"🤖 Calling LLM for intent classification...", file=out)
+    print(f"🤖 LLM raw response: {LLM_RESPONSE}", file=out)
+    print(f"✅ Detected intent: transfer_funds (confidence: 0.93)", file=out)
+    print(f"🔍 Banking Operations - Intent: transfer_funds, User ID: user_001", file=out)
+    print(f"✅ Found user data for {USER['name']}: Balance = ₹{USER['balance']:,.2f}", file=out)
+    print(f"🔍 Transfer request - Amount: {ENTITIES['amount']}, Recipient: {ENTITIES['recipient']}", file=out)
+    print(f"✅ Found recipient: Rahul Mehta (ID: user_002)", file=out)
+    print(f"✅ Transfer successful: ₹{1500.0:,.2f} from {USER['name']} to Rahul Mehta", file=out)
+    print(f"   New balance for {USER['name']}: ₹{USER['balance'] - 1500:,.2f}", file=out)
+    print(f"🤖 LLM Generated Response: {REPLY[:100]}...", file=out)
+    print(f"🔍 Dialog Manager - Intent: transfer_funds, Balance in state: {USER['balance']}, User: {USER['name']}",
+          file=out)
+    print(f"✅ Transfer confirmed: ₹{1500.0:,.2f} to Rahul Mehta, new balance: ₹{USER['balance'] - 1500:,.2f}",
+          file=out)
+
+
+server_log = get_logger("server")
+intent_log = get_logger("intent")
+operations_log = get_logger("operations")
+dialog_log = get_logger("dialog")
+
+
+def logging_request(_out):
+    """The same turn through the loggers the graph now uses"""
+    server_log.info("voice-banking request user=%s language=%s input=%s", "user_001", "en", "text")
+    intent_log.debug("Classifying %d chars (language=%s)", 18, "en")
+    intent_log.info("Detected intent %s (confidence=%s)", "transfer_funds", 0.93)
+    operations_log.debug("Executing %s for %s", "transfer_funds", "user_001")
+    operations_log.info("Transfer completed: %s -> %s", "user_001", "user_002")
+    dialog_log.debug("Generated %d-char response for %s", len(REPLY), "transfer_funds")
+
+
+def run(emit, out, threads: int, requests: int, work_ms: float):
+    """Per-request logging time (microseconds) across all request threads"""
+    samples = []
+    lock = threading.Lock()
+    start = threading.Barrier(threads)
+
+    def worker(worker_id: int):
+        local = []
+        start.wait()
+        for i in range(requests):
+            bind_request_id(f"w{worker_id}-r{i}")
+            began = time.perf_counter()
+            emit(out)
+            local.append((time.perf_counter() - began) * 1e6)
+            time.sleep(work_ms / 1000.0)
+        with lock:
+            samples.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    began = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - began
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99)],
+        "requests_per_s": len(samples) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500, help="requests per thread")
+    parser.add_argument("--work-ms", type=float, default=2.0, help="non-logging time per request")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="info sampling for the sampled run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        with open(os.path.join(tmp, "print.log"), "w", buffering=1, encoding="utf-8") as out:
+            results.append(("print()", run(print_request, out, args.threads, args.requests, args.work_ms)))
+
+        for name, rates in [("queue logging", {}),
+                            (f"queue logging, {args.sample_rate:g} sampled", {"banking": args.sample_rate})]:
+            with open(os.path.join(tmp, "queue.log"), "w", buffering=1, encoding="utf-8") as out:
+                configure_logging(stream=out, level="INFO", sample_rates=rates)
+                results.append((name, run(logging_request, out, args.threads, args.requests, args.work_ms)))
+                stats = logging_stats()
+                shutdown_logging()
+
+    print(f"\n{args.threads} threads x {args.requests} requests (queue size {log_config.LOG_QUEUE_SIZE})")
+    print(f"{'mode':<32}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'req/s':>12}")
+    for name, result in results:
+        print(f"{name:<32}{result['mean_us']:>10.1f}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+              f"{result['requests_per_s']:>12.0f}")
+    print(f"\nlogging counters (cumulative): {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Memory Soak Test
+Drives a running backend with voice-banking requests and records RSS,
+checkpointer size and leaked temp files from /api/admin/memory every N
+requests, then reports memory growth per request
+
+Exits with status 1 when growth per request (least-squares slope after
+warm-up) exceeds --max-growth-bytes, so it can gate a CI job. Writes a CSV,
+and a PNG plot when matplotlib is installed (ASCII chart otherwise).
+
+Usage:
+    python backend_server.py &
+    python benchmarks/memory_soak.py --requests 5000 --every 250 --plot rss.png
+    python benchmarks/memory_soak.py --reuse-threads     # one session per worker
+    python benchmarks/memory_soak.py --username neha --password neha123
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+QUERIES = [
+    ("en", "What is my account balance?"),
+    ("en", "Show my recent transactions"),
+    ("hi", "मेरा बैलेंस क्या है?"),
+    ("gu", "મારું બેલેન્સ શું છે?"),
+    ("en", "How much did I spend on groceries this month?"),
+    ("en", "Tell me about my loan"),
+]
+
+
+def post_json(url: str, payload: dict, token: str = None, timeout: float = 30.0) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def get_json(url: str, admin_token: str = None, timeout: float = 30.0) -> dict:
+    headers = {"X-Admin-Token": admin_token} if admin_token else {}
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def sample(args, completed: int, errors: int) -> dict:
+    report = get_json(f"{args.url}/api/admin/memory?top=0", args.admin_token)
+    checkpointer = report.get("checkpointer") or {}
+    return {
+        "requests": completed,
+        "errors": errors,
+        "rss_bytes": report["process"]["rss_bytes"] or 0,
+        "checkpointer_threads": checkpointer.get("threads", 0),
+        "checkpoint_bytes": checkpointer.get("checkpoint_bytes", 0) + checkpointer.get("blob_bytes", 0),
+        "temp_audio_files": report["temp_audio_files"],
+        "gc_objects": report["process"]["gc_objects"],
+    }
+
+
+def slope(points) -> float:
+    """Least-squares growth in bytes per request"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var if var else 0.0
+
+
+def ascii_chart(rows, width: int = 60):
+    peak = max(row["rss_bytes"] for row in rows) or 1
+    for row in rows:
+        bar = "#" * max(1, int(row["rss_bytes"] / peak * width))
+        print(f"{row['requests']:>8} {row['rss_bytes'] / 2**20:>8.1f} MB |{bar}")
+
+
+def plot(rows, path: str):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib not installed, ASCII chart only")
+        return
+    fig, rss_axis = plt.subplots(figsize=(9, 4.5))
+    requests = [row["requests"] for row in rows]
+    rss_axis.plot(requests, [row["rss_bytes"] / 2**20 for row in rows], label="RSS (MB)")
+    rss_axis.set_xlabel("requests")
+    rss_axis.set_ylabel("RSS (MB)")
+    threads_axis = rss_axis.twinx()
+    threads_axis.plot(requests, [row["checkpointer_threads"] for row in rows], color="tab:orange",
+                      label="checkpointer threads")
+    threads_axis.set_ylabel("checkpointer threads")
+    fig.legend(loc="upper left")
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Plot written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--every", type=int, default=100, help="sample memory every N requests")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--username", default=None, help="log in as this user (default: anonymous turns)")
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--reuse-threads", action="store_true",
+                        help="one thread_id per worker instead of a new one per request")
+    parser.add_argument("--warmup", type=int, default=200, help="requests excluded from the growth slope")
+    parser.add_argument("--max-growth-bytes", type=float, default=None,
+                        help="fail when RSS grows faster than this many bytes per request")
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN"))
+    parser.add_argument("--csv", default="memory_soak.csv")
+    parser.add_argument("--plot", default=None, help="PNG path (needs matplotlib)")
+    args = parser.parse_args()
+
+    counter = itertools.count(1)
+    lock = threading.Lock()
+    state = {"completed": 0, "errors": 0}
+    token = None
+    if args.username:
+        token = post_json(f"{args.url}/api/authenticate", {"username": args.username,
+                                                          "password": args.password or ""})["token"]
+    rows = [sample(args, 0, 0)]
+
+    def one_request(_):
+        n = next(counter)
+        language, text = QUERIES[n % len(QUERIES)]
+        worker = threading.current_thread().name
+        thread_id = f"soak_{worker}" if args.reuse_threads else f"soak_{n}"
+        try:
+            post_json(f"{args.url}/api/voice-banking", {"user_input": text, "thread_id": thread_id,
+                                                       "language": language}, token)
+            failed = 0
+        except Exception:
+            failed = 1
+        with lock:
+            state["completed"] += 1
+            state["errors"] += failed
+            due = state["completed"] % args.every == 0
+            completed, errors = state["completed"], state["errors"]
+        if due:
+            row = sample(args, completed, errors)
+            with lock:
+                rows.append(row)
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="soak") as pool:
+        list(pool.map(one_request, range(args.requests)))
+    elapsed = time.time() - started
+    rows.sort(key=lambda row: row["requests"])
+
+    with open(args.csv, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"\n{state['completed']} requests in {elapsed:.1f}s ({state['errors']} errors), samples in {args.csv}\n")
+    ascii_chart(rows)
+    if args.plot:
+        plot(rows, args.plot)
+
+    steady = [(row["requests"], row["rss_bytes"]) for row in rows if row["requests"] >= args.warmup]
+    growth = slope(steady)
+    last = rows[-1]
+    print(f"\nRSS growth after warm-up: {growth:,.0f} bytes/request")
+    print(f"checkpointer: {last['checkpointer_threads']} threads, {last['checkpoint_bytes'] / 2**20:.1f} MB; "
+          f"temp audio files: {last['temp_audio_files']}")
+    if args.max_growth_bytes is not None and growth > args.max_growth_bytes:
+        print(f"FAIL: growth exceeds {args.max_growth_bytes:,.0f} bytes/request")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Node Benchmark
+Times each graph node and the full banking_assistant.invoke() in-process,
+with a stub LLM and stub ASR, across en/hi/gu inputs for every intent
+
+No HTTP server, gateway credentials or network are needed: the backend is
+imported with SKIP_LLM_GATEWAY=true and the stubs are installed in its
+place. Users are authenticated as in the web flow (is_authenticated in the
+turn state). Stub latencies default to zero, so the numbers are the
+graph's own CPU cost; add --llm-ms / --asr-ms to model the services.
+
+Results can be saved as a baseline and later runs compared against it;
+medians that regress by more than --tolerance (and by more than
+--min-delta-us) are flagged and the exit status is 1.
+benchmarks/node_baseline.json is the committed reference run (stub LLM
+and ASR at zero latency). Timings depend on the machine, so regenerate it
+with --save-baseline before comparing on different hardware; a --baseline
+path that does not exist yet is written by the first run.
+
+Usage:
+    python benchmarks/node_benchmark.py --baseline benchmarks/node_baseline.json
+    python benchmarks/node_benchmark.py --save-baseline benchmarks/node_baseline.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure the backend for in-process benchmarking before importing it
+os.environ.setdefault("SKIP_LLM_GATEWAY", "true")
+os.environ.setdefault("ASR_PRELOAD", "false")
+os.environ.setdefault("TTS_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("AUDIT_LOG_PATH", os.path.join(tempfile.mkdtemp(prefix="node-bench-"), "audit.jsonl"))
+
+import banking_assistant_backend as backend  # noqa: E402
+from stubs import StubASREngine, StubChatModel  # noqa: E402
+
+USER_ID = "neha"
+
+UTTERANCES = {
+    "check_balance": {
+        "en": "What is my account balance?",
+        "hi": "मेरा बैलेंस क्या है?",
+        "gu": "મારું બેલેન્સ શું છે?",
+    },
+    "view_transactions": {
+        "en": "Show my recent transactions",
+        "hi": "मेरे हाल के लेनदेन दिखाओ",
+        "gu": "મારા તાજેતરના વ્યવહાર બતાવો",
+    },
+    "spending_insights": {
+        "en": "How much did I spend on groceries this month?",
+        "hi": "इस महीने किराने पर कितना खर्च हुआ?",
+        "gu": "આ મહિને કરિયાણા પર કેટલો ખર્ચ થયો?",
+    },
+    "transfer_funds": {
+        "en": "Send 10 rupees to Niyati",
+        "hi": "नियति को 10 रुपये भेजो",
+        "gu": "નિયતિને 10 રૂપિયા મોકલો",
+    },
+    "loan_inquiry": {
+        "en": "What is my loan EMI?",
+        "hi": "मेरा लोन कितना बाकी है?",
+        "gu": "મારી લોન કેટલી બાકી છે?",
+    },
+    "credit_inquiry": {
+        "en": "What is my credit card limit?",
+        "hi": "मेरी क्रेडिट कार्ड लिमिट क्या है?",
+        "gu": "મારી ક્રેડિટ કાર્ડ લિમિટ શું છે?",
+    },
+    "general_question": {
+        "en": "What are your branch timings?",
+        "hi": "आपकी शाखा का समय क्या है?",
+        "gu": "તમારી શાખાનો સમય શું છે?",
+    },
+}
+
+NODES = [
+    ("speech", backend.speech_agent),
+    ("intent", backend.intent_understanding_agent),
+    ("rag", backend.rag_retrieval_agent),
+    ("banking", backend.banking_operations_agent),
+    ("dialog", backend.dialog_manager_agent),
+    ("tts", backend.speech_synthesis_agent),
+]
+
+
+def install_stubs(llm_ms: float, asr_ms: float) -> StubASREngine:
+    backend.install_llm(StubChatModel(latency_ms=llm_ms))
+    asr = StubASREngine(latency_ms=asr_ms)
+    backend.asr_engine = asr
+    for intent, texts in UTTERANCES.items():
+        for language, text in texts.items():
+            asr.register(f"stub://{language}/{intent}", text, language)
+    return asr
+
+
+def turn_state(intent: str, language: str) -> dict:
+    """Graph input for one voice turn; a fresh audio hash skips the transcription cache"""
+    return backend.new_turn_state(
+        user_input="",
+        audio_file=f"stub://{language}/{intent}",
+        audio_sha256=uuid.uuid4().hex,
+        is_authenticated=True,
+        user_id=USER_ID,
+        session_token="bench",
+        voice_biometric_verified=True,
+        otp_verified=True,
+        security_level="high",
+        language=language,
+        deadline=None,
+        priority=backend.DEFAULT_PRIORITY,
+        messages=[],
+    )
+
+
+def apply(state: dict, delta: dict) -> dict:
+    """Merge a node's delta the way the graph does (messages are appended)"""
+    merged = dict(state)
+    for key, value in delta.items():
+        merged[key] = merged.get(key, []) + value if key == "messages" else value
+    return merged
+
+
+def timed_us(fn, iterations: int, warmup: int):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def summarize(samples) -> dict:
+    ordered = sorted(samples)
+    return {
+        "median_us": round(statistics.median(ordered), 1),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "n": len(ordered),
+    }
+
+
+def run(iterations: int, warmup: int, languages, intents) -> dict:
+    per_node = {name: [] for name, _ in NODES}
+    per_case = {}
+    for intent in intents:
+        for language in languages:
+            # Input state of every node, produced by running the nodes before it
+            inputs = {}
+            state = turn_state(intent, language)
+            for name, node in NODES:
+                inputs[name] = state
+                state = apply(state, node(state))
+            if state.get("detected_intent") != intent:
+                print(f"note: {language} '{UTTERANCES[intent][language]}' routed to {state.get('detected_intent')}")
+
+            case = {}
+            for name, node in NODES:
+                if name == "speech":
+                    samples = timed_us(lambda: node({**inputs[name], "audio_sha256": uuid.uuid4().hex}),
+                                       iterations, warmup)
+                else:
+                    samples = timed_us(lambda: node(inputs[name]), iterations, warmup)
+                per_node[name].extend(samples)
+                case[name] = summarize(samples)
+
+            config = {"configurable": {"thread_id": f"bench-{intent}-{language}"}}
+            graph = timed_us(lambda: backend.banking_assistant.invoke(turn_state(intent, language), config),
+                             iterations, warmup)
+            case["graph"] = summarize(graph)
+            per_case[f"{intent}/{language}"] = case
+
+    graph_all = [case["graph"]["median_us"] for case in per_case.values()]
+    return {
+        "nodes": {name: summarize(samples) for name, samples in per_node.items()},
+        "graph_median_of_cases_us": round(statistics.median(graph_all), 1),
+        "cases": per_case,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_us: float):
+    """Rows of (metric, baseline, current, ratio, regressed)"""
+    rows = []
+
+    def check(metric, now, then):
+        if then is None:
+            return
+        regressed = now > then * (1 + tolerance) and now - then > min_delta_us
+        rows.append((metric, then, now, now / then if then else float("inf"), regressed))
+
+    for name, stats in current["nodes"].items():
+        check(f"node {name}", stats["median_us"], baseline.get("nodes", {}).get(name, {}).get("median_us"))
+    for case, stats in current["cases"].items():
+        check(f"graph {case}", stats["graph"]["median_us"],
+              baseline.get("cases", {}).get(case, {}).get("graph", {}).get("median_us"))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--languages", nargs="+", default=["en", "hi", "gu"])
+    parser.add_argument("--intents", nargs="+", default=list(UTTERANCES), choices=list(UTTERANCES))
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="stub LLM latency per call")
+    parser.add_argument("--asr-ms", type=float, default=0.0, help="stub ASR latency per chunk")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--save-baseline", help="write results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-us", type=float, default=50.0, help="ignore smaller absolute changes")
+    args = parser.parse_args()
+
+    install_stubs(args.llm_ms, args.asr_ms)
+    results = run(args.iterations, args.warmup, args.languages, args.intents)
+    results["meta"] = {"iterations": args.iterations, "llm_ms": args.llm_ms, "asr_ms": args.asr_ms,
+                       "python": sys.version.split()[0]}
+
+    print(f"\n{'node':<12}{'median us':>12}{'p95 us':>12}{'samples':>10}")
+    for name, stats in results["nodes"].items():
+        print(f"{name:<12}{stats['median_us']:>12.1f}{stats['p95_us']:>12.1f}{stats['n']:>10}")
+
+    print(f"\n{'graph.invoke':<28}{'median us':>12}{'p95 us':>12}")
+    for case, stats in results["cases"].items():
+        print(f"{case:<28}{stats['graph']['median_us']:>12.1f}{stats['graph']['p95_us']:>12.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline and not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nNo baseline at {args.baseline}; this run was saved as the baseline")
+    elif args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance, args.min_delta_us)
+        print(f"\n{'metric':<36}{'baseline':>12}{'current':>12}{'ratio':>8}")
+        for metric, then, now, ratio, regressed in rows:
+            print(f"{metric:<36}{then:>12.1f}{now:>12.1f}{ratio:>8.2f}{'  REGRESSION' if regressed else ''}")
+        regressions = sum(1 for row in rows if row[4])
+        if regressions:
+            print(f"\n{regressions} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Serialization Benchmark
+Compares encode/decode time and size of the stock and fast serializers on
+typical API payloads and graph checkpoint values
+
+Payloads:
+- transactions_N:  a page of N transactions as returned by /api/transactions
+- user_record:     a user record with cards, as returned by /api/authenticate
+- turn_state:      the channel values one graph turn writes to the checkpointer
+
+HTTP encoders: json.dumps with Flask's default settings vs orjson (skipped
+when not installed). Checkpoint rows show LangGraph's JsonPlusSerializer,
+which the checkpointer uses as is.
+
+Usage:
+    python benchmarks/serialization_benchmark.py --iterations 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization  # noqa: E402
+
+try:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+except ImportError:
+    JsonPlusSerializer = None
+
+DESCRIPTIONS = [
+    "Salary Credit - Tech Corp", "Personal Loan EMI", "Amazon - Electronics", "IMPS Transfer from Mother",
+    "Credit Card Payment", "Big Bazaar - Groceries", "BESCOM Electricity Bill", "Truffles Restaurant",
+    "Swiggy - बिरयानी", "મોબાઇલ રિચાર્જ",
+]
+
+
+def make_transactions(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    balance = 125000.0
+    rows = []
+    for i in range(count):
+        amount = round(rng.uniform(100, 20000), 2)
+        kind = "credit" if rng.random() < 0.25 else "debit"
+        rows.append({
+            "date": f"2025-{11 - i // 28 % 11:02d}-{28 - i % 28:02d}",
+            "type": kind,
+            "amount": amount,
+            "description": rng.choice(DESCRIPTIONS),
+            "balance": round(balance, 2),
+        })
+        balance += -amount if kind == "credit" else amount
+    return rows
+
+
+def make_user_record():
+    return {
+        "user_id": "neha", "name": "Neha Sharma", "account_number": "NGB001234567890",
+        "balance": 125000.0, "phone": "+91-9876543210", "email": "neha.sharma@email.com",
+        "address": "101, Prestige Apartments, Koramangala, Bangalore - 560034",
+        "loan_balance": 450000.0, "credit_limit": 200000.0,
+        "cards": [
+            {"type": "Debit", "number": "**** **** **** 4521", "expiry": "08/28", "status": "active"},
+            {"type": "Credit", "number": "**** **** **** 7834", "expiry": "11/27", "status": "active",
+             "limit": 200000.0, "used": 45000.0},
+        ],
+    }
+
+
+def make_turn_state():
+    return {
+        "user_input": "आज मेरा बैलेंस क्या है?", "transcribed_text": "आज मेरा बैलेंस क्या है?",
+        "detected_intent": "balance_inquiry", "intent_confidence": 0.92, "entities": {"account_type": "savings"},
+        "user_id": "neha", "language": "hi", "account_number": "NGB001234567890", "account_balance": 125000.0,
+        "transaction_history": make_transactions(5),
+        "retrieved_context": ["Savings accounts earn 3.5% interest per annum, credited quarterly."],
+        "response": "नमस्ते Neha Sharma! आपका वर्तमान खाता बैलेंस ₹1,25,000.00 है।",
+        "tts_audio": "/api/tts/5f0c1e8a9b7d4c2e8f1a3b5c7d9e0f12", "error": None,
+        "current_node": "dialog", "next_action": "synthesize_speech",
+        "deadline": 1760000000.123, "priority": 1,
+    }
+
+
+def payloads():
+    return {
+        "transactions_20": make_transactions(20),
+        "transactions_200": make_transactions(200),
+        "user_record": make_user_record(),
+        "turn_state": make_turn_state(),
+    }
+
+
+def http_encoders():
+    encoders = {"json (flask default)": lambda obj: json.dumps(obj, ensure_ascii=True, sort_keys=True).encode()}
+    if serialization.orjson is not None:
+        encoders["orjson"] = lambda obj: serialization.orjson.dumps(obj, option=serialization.orjson.OPT_NON_STR_KEYS)
+    return encoders
+
+
+def checkpoint_serializers():
+    serializers = {}
+    if JsonPlusSerializer is not None:
+        serializers["jsonplus"] = JsonPlusSerializer()
+    return serializers
+
+
+def time_per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for payload_name, payload in payloads().items():
+        for name, encode in http_encoders().items():
+            results.append({
+                "kind": "http", "payload": payload_name, "encoder": name,
+                "bytes": len(encode(payload)),
+                "encode_us": time_per_call_us(lambda: encode(payload), args.iterations),
+                "decode_us": None,
+            })
+
+        # Checkpoints store each channel value separately
+        channels = payload if payload_name == "turn_state" else {"value": payload}
+        for name, serde in checkpoint_serializers().items():
+            blobs = [serde.dumps_typed(value) for value in channels.values()]
+            results.append({
+                "kind": "checkpoint", "payload": payload_name, "encoder": name,
+                "bytes": sum(len(data) for _, data in blobs),
+                "encode_us": time_per_call_us(lambda: [serde.dumps_typed(v) for v in channels.values()],
+                                              args.iterations),
+                "decode_us": time_per_call_us(lambda: [serde.loads_typed(b) for b in blobs], args.iterations),
+            })
+
+    print(f"\n{'kind':<12}{'payload':<18}{'encoder':<22}{'bytes':>9}{'enc µs':>10}{'dec µs':>10}")
+    for row in results:
+        decode = f"{row['decode_us']:>10.1f}" if row["decode_us"] is not None else f"{'-':>10}"
+        print(f"{row['kind']:<12}{row['payload']:<18}{row['encoder']:<22}{row['bytes']:>9}"
+              f"{row['encode_us']:>10.1f}{decode}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark Stubs
+In-process stand-ins for the LLM gateway and the ASR engine
+
+StubChatModel answers the graph's prompts the way the gateway model would:
+intent prompts get schema-valid intent JSON, dialog prompts a short reply
+in the prompt's language. StubASREngine returns registered transcripts for
+synthetic speech (a tone between silences, so VAD trimming still runs).
+Both can add fixed latency to stand in for network and model time.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asr_engines import ASREngine  # noqa: E402
+from entity_extraction import extract_amount, is_transfer_command  # noqa: E402
+
+# Transfers are recognized as commands (like the model would), not keywords
+INTENT_KEYWORDS = [
+    ("spending_insights", ["spend", "spent", "expense", "खर्च", "ખર્ચ"]),
+    ("view_transactions", ["transaction", "history", "लेनदेन", "વ્યવહાર"]),
+    ("loan_inquiry", ["loan", "emi", "लोन", "લોન"]),
+    ("credit_inquiry", ["credit", "card", "क्रेडिट", "ક્રેડિટ"]),
+    ("check_balance", ["balance", "बैलेंस", "બેલેન્સ"]),
+]
+
+# Labels the intent prompts put in front of the quoted user text (prompts.INTENT_TAIL)
+_USER_TEXT = re.compile(r'(?:User request|उपयोगकर्ता का अनुरोध|યુઝરની વિનંતી):\s*"(.*)"')
+_RECIPIENT = re.compile(r"\bto\s+([A-Za-z]+)", re.IGNORECASE)
+
+REPLIES = {
+    "en": "Hello, here is the information you asked for. Is there anything else I can help you with?",
+    "hi": "नमस्ते, यह रही आपकी मांगी गई जानकारी। क्या मैं आपकी और कोई मदद कर सकता हूं?",
+    "gu": "નમસ્તે, આ રહી તમે માંગેલી માહિતી. શું હું તમને બીજી કોઈ મદદ કરી શકું?",
+}
+
+
+def detect_language(text: str) -> str:
+    if re.search(r"[઀-૿]", text):
+        return "gu"
+    if re.search(r"[ऀ-ॿ]", text):
+        return "hi"
+    return "en"
+
+
+def classify(user_text: str) -> Dict:
+    """Keyword intent classification with the gateway model's JSON shape"""
+    lowered = user_text.lower()
+    if is_transfer_command(user_text):
+        matched = ["transfer_funds"]
+    else:
+        matched = [name for name, words in INTENT_KEYWORDS if any(w in lowered for w in words)]
+    intent = matched[0] if matched else "general_question"
+    entities = {}
+    if intent == "transfer_funds":
+        amount = extract_amount(user_text)
+        recipient = _RECIPIENT.search(user_text)
+        if amount is not None:
+            entities["amount"] = amount
+        if recipient:
+            entities["recipient"] = recipient.group(1)
+    return {"intent": intent, "intents": matched or [intent], "confidence": 0.92, "entities": entities}
+
+
+def complete(llm_input) -> str:
+    """Text the gateway model would return for a prompt string or chat messages"""
+    if isinstance(llm_input, str):
+        match = _USER_TEXT.search(llm_input)
+        return json.dumps(classify(match.group(1) if match else llm_input), ensure_ascii=False)
+    system = next((getattr(m, "content", "") for m in llm_input if getattr(m, "type", "") == "system"), "")
+    if '"intents"' in system:
+        # Intent classifier: JSON schema in the system prompt, user text last
+        return complete(getattr(llm_input[-1], "content", ""))
+    return REPLIES[detect_language(system)]
+
+
+class StubChatModel:
+    """Drop-in for AzureChatOpenAI.invoke() with optional fixed latency"""
+
+    temperature = 0
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def invoke(self, llm_input, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return AIMessage(content=complete(llm_input))
+
+
+class StubASREngine(ASREngine):
+    """ASR engine that returns registered transcripts for synthetic speech"""
+
+    backend = "stub"
+
+    def __init__(self, latency_ms: float = 0.0, speech_seconds: float = 1.5, **kwargs):
+        super().__init__(**kwargs)
+        self.latency_ms = latency_ms
+        self.speech_seconds = speech_seconds
+        self._transcripts: Dict[str, Tuple[str, str]] = {}
+        self._current = threading.local()
+
+    def register(self, path: str, text: str, language: str):
+        """Audio 'file' path -> transcript returned for it"""
+        self._transcripts[path] = (text, language)
+
+    def _load_model(self, name: str):
+        return object()
+
+    def load_audio(self, path: str) -> np.ndarray:
+        self._current.transcript = self._transcripts[path]
+        sample_rate = 16000
+        t = np.arange(int(self.speech_seconds * sample_rate), dtype=np.float32) / sample_rate
+        tone = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+        silence = np.zeros(sample_rate // 2, dtype=np.float32)
+        return np.concatenate([silence, tone, silence])
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None) -> Dict[str, str]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        text, detected = self._current.transcript
+        return {"text": text, "language": language or detected}
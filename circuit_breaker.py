@@ -0,0 +1,325 @@
+"""
+LLM Gateway Circuit Breaker
+Fails fast to local fallbacks while the gateway is degraded, and optionally
+hedges latency-sensitive calls
+
+CircuitBreaker tracks a sliding window of call outcomes. Errors and calls
+slower than the latency threshold both count as failures. Once the failure
+rate crosses the threshold the circuit opens and every call is rejected
+immediately with CircuitOpenError, so nodes go straight to their keyword or
+template paths. After the reset timeout a limited number of half-open probes
+are let through, and the circuit closes again once enough of them succeed.
+
+GuardedLLM wraps the shared AzureChatOpenAI client with the breaker. Its
+invoke_hedged() sends a second, identical request when the first has not
+answered within a percentile of recently observed latencies, and returns
+whichever answer arrives first. A hedge only goes out when the circuit is
+closed and an LLM admission slot is free right away.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+from admission_control import PriorityLimiter
+from request_budget import DeadlineExceeded
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+CB_WINDOW_SIZE = int(os.getenv("LLM_CB_WINDOW_SIZE", "20"))
+CB_MIN_CALLS = int(os.getenv("LLM_CB_MIN_CALLS", "5"))
+CB_FAILURE_RATE = float(os.getenv("LLM_CB_FAILURE_RATE", "0.5"))
+CB_SLOW_CALL_MS = float(os.getenv("LLM_CB_SLOW_CALL_MS", "5000"))
+CB_RESET_TIMEOUT_S = float(os.getenv("LLM_CB_RESET_TIMEOUT_S", "30"))
+CB_HALF_OPEN_PROBES = int(os.getenv("LLM_CB_HALF_OPEN_PROBES", "2"))
+
+logger = logging.getLogger("banking.llm")
+
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "200"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+# ============================================================================
+# CIRCUIT BREAKER
+# ============================================================================
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker with error and latency thresholds"""
+
+    def __init__(self, name: str,
+                 window_size: int = CB_WINDOW_SIZE,
+                 min_calls: int = CB_MIN_CALLS,
+                 failure_rate: float = CB_FAILURE_RATE,
+                 slow_call_ms: float = CB_SLOW_CALL_MS,
+                 reset_timeout_s: float = CB_RESET_TIMEOUT_S,
+                 half_open_probes: int = CB_HALF_OPEN_PROBES):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)  # True = failed or slow
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.time() - self._opened_at >= self.reset_timeout_s:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.warning("Circuit '%s' half-open, probing gateway", self.name)
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.time()
+        self._times_opened += 1
+        logger.error("Circuit '%s' opened, routing to local fallbacks", self.name)
+
+    def allow_request(self) -> bool:
+        """Reserve a call slot; returns False if the call must be rejected"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, latency_ms: float):
+        slow = latency_ms >= self.slow_call_ms
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._open()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.warning("Circuit '%s' closed, gateway recovered", self.name)
+                return
+            self._record(slow)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+                return
+            self._record(True)
+
+    def _record(self, failed: bool):
+        self._outcomes.append(failed)
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state for health checks"""
+        with self._lock:
+            self._maybe_half_open()
+            window = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "failure_rate": round(sum(self._outcomes) / window, 3) if window else 0.0,
+                "window_calls": window,
+                "times_opened": self._times_opened,
+                "rejected_calls": self._rejected,
+                "retry_in_s": round(max(0.0, self._opened_at + self.reset_timeout_s - time.time()), 1)
+                if self._state == OPEN else 0.0,
+            }
+
+
+# ============================================================================
+# LATENCY TRACKING
+# ============================================================================
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+
+    def record(self, latency_ms: float):
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+# ============================================================================
+# GUARDED LLM CLIENT
+# ============================================================================
+
+class GuardedLLM:
+    """LLM client wrapper that applies the circuit breaker and optional hedging"""
+
+    def __init__(self, llm, breaker: CircuitBreaker, admission: Optional[PriorityLimiter] = None,
+                 max_workers: int = 16):
+        self.llm = llm
+        self.breaker = breaker
+        self.admission = admission  # hedges take a slot here like any other call
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+
+    def _call(self, llm_input):
+        started = time.time()
+        try:
+            result = self.llm.invoke(llm_input)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        latency_ms = (time.time() - started) * 1000.0
+        self.breaker.record_success(latency_ms)
+        self.latency.record(latency_ms)
+        return result
+
+    def invoke(self, llm_input):
+        """Single guarded call; raises CircuitOpenError while the circuit is open"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.breaker.name}' is {self.breaker.state}")
+        return self._call(llm_input)
+
+    def hedge_delay_ms(self) -> Optional[float]:
+        """Delay after which a hedge request is sent, or None if hedging is off"""
+        if not HEDGE_ENABLED or len(self.latency) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY_MS, self.latency.percentile(HEDGE_PERCENTILE))
+
+    def invoke_hedged(self, llm_input, timeout: Optional[float] = None):
+        """
+        Guarded call that sends one backup request if the first is slower than
+        the hedge percentile. Only the first successful answer is returned.
+        """
+        delay_ms = self.hedge_delay_ms()
+        if delay_ms is None:
+            # Nothing to race: skip the executor hop (callers bound the wait)
+            return self.invoke(llm_input)
+
+        # invoke() runs on the worker, so the breaker permit (possibly a
+        # half-open probe) is only taken by a call that actually starts; a
+        # future cancelled while queued holds nothing
+        primary = self._executor.submit(self.invoke, llm_input)
+        started = time.time()
+        delay_s = delay_ms / 1000.0 if timeout is None else min(delay_ms / 1000.0, timeout)
+        done, _ = wait([primary], timeout=delay_s)
+        if done:
+            return primary.result()
+
+        futures = [primary]
+        hedge = self._submit_hedge(llm_input)
+        if hedge is not None:
+            with self._lock:
+                self.hedged_calls += 1
+            futures.append(hedge)
+        remaining = None if timeout is None else timeout - (time.time() - started)
+        winner = self._first_success(futures, remaining)
+        if winner is not primary:
+            with self._lock:
+                self.hedge_wins += 1
+        return winner.result()
+
+    def _submit_hedge(self, llm_input):
+        """Backup call, or None if the circuit is not closed or no admission slot is free"""
+        if self.breaker.state != CLOSED:
+            return None
+        slot = self.admission.try_acquire() if self.admission is not None else None
+        if self.admission is not None and slot is None:
+            return None
+
+        def hedge():
+            try:
+                return self.invoke(llm_input)
+            finally:
+                if slot is not None:
+                    slot.release()
+
+        def release_if_cancelled(future):
+            # Cancelled while queued: hedge() never ran to release the slot
+            if future.cancelled() and slot is not None:
+                slot.release()
+
+        future = self._executor.submit(hedge)
+        future.add_done_callback(release_if_cancelled)
+        return future
+
+    @staticmethod
+    def _first_success(futures, timeout: Optional[float]):
+        """Return the first future that completes without an error"""
+        deadline = None if timeout is None else time.time() + max(0.0, timeout)
+        pending = set(futures)
+        last_error = None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.time())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    future.cancel()
+                raise DeadlineExceeded("LLM call exceeded remaining request budget")
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future
+                last_error = future.exception()
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker and hedging stats for /api/health"""
+        p95 = self.latency.percentile(95)
+        with self._lock:
+            hedged_calls, hedge_wins = self.hedged_calls, self.hedge_wins
+        return {
+            **self.breaker.snapshot(),
+            "p95_latency_ms": round(p95, 1) if p95 is not None else None,
+            "hedging_enabled": HEDGE_ENABLED,
+            "hedged_calls": hedged_calls,
+            "hedge_wins": hedge_wins,
+        }
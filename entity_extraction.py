@@ -0,0 +1,328 @@
+"""
+Entity Extraction
+Local, precompiled extraction of transfer entities in English, Hindi and Gujarati
+
+- Amounts:     "₹1,50,000", "1.5 lakh", "2 crore", "10k", "fifty thousand",
+               "डेढ़ लाख", "पांच हजार", "૨૫૦૦ રૂપિયા", Devanagari/Gujarati digits
+- Recipients:  Aho-Corasick automaton over known payee names and aliases,
+               matched on word boundaries (longest match wins)
+- Dates:       today/tomorrow/yesterday (en/hi/gu), weekdays, "5th",
+               "25 november", DD/MM/YYYY, ISO dates
+- Commands:    whether the text is an explicit transfer instruction
+               ("send 500 to Niyati", "नियति को 500 भेजें", "નિયતિને 500 મોકલો")
+
+All tables, regexes and the automaton are built once, so a call costs a
+few microseconds. Extraction only fills in entities: whether a request is a
+transfer at all is decided by the intent classifier, or, without the LLM,
+by the strict command grammar below, never by a keyword hit.
+"""
+
+import re
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ============================================================================
+# NUMERALS AND NUMBER WORDS
+# ============================================================================
+
+_DIGITS = str.maketrans("०१२३४५६७८९૦૧૨૩૪૫૬૭૮૯", "01234567890123456789")
+
+_UNITS = {
+    # English
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    "a": 1, "half": 0.5,
+    # Hindi
+    "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6, "छः": 6, "सात": 7, "आठ": 8,
+    "नौ": 9, "दस": 10, "ग्यारह": 11, "बारह": 12, "पंद्रह": 15, "बीस": 20, "पच्चीस": 25, "तीस": 30,
+    "चालीस": 40, "पचास": 50, "साठ": 60, "सत्तर": 70, "अस्सी": 80, "नब्बे": 90, "डेढ़": 1.5, "ढाई": 2.5,
+    "आधा": 0.5,
+    # Gujarati
+    "એક": 1, "બે": 2, "ત્રણ": 3, "ચાર": 4, "પાંચ": 5, "છ": 6, "સાત": 7, "આઠ": 8, "નવ": 9, "દસ": 10,
+    "અગિયાર": 11, "બાર": 12, "પંદર": 15, "વીસ": 20, "પચીસ": 25, "ત્રીસ": 30, "ચાલીસ": 40, "પચાસ": 50,
+    "સાઠ": 60, "સિત્તેર": 70, "એંસી": 80, "નેવું": 90, "દોઢ": 1.5, "અઢી": 2.5,
+}
+_HUNDRED = {"hundred", "सौ", "सो", "સો"}
+_SCALES = {
+    "thousand": 1_000, "k": 1_000, "हजार": 1_000, "हज़ार": 1_000, "હજાર": 1_000,
+    "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000, "लाख": 100_000, "લાખ": 100_000,
+    "crore": 10_000_000, "crores": 10_000_000, "cr": 10_000_000, "करोड़": 10_000_000, "करोड": 10_000_000,
+    "કરોડ": 10_000_000,
+    "million": 1_000_000,
+}
+_CURRENCY = {"₹", "rs", "rs.", "inr", "rupee", "rupees", "रुपये", "रुपए", "रुपया", "रू", "રૂપિયા", "રૂ"}
+_FILLER = {"and", "और", "અને"}
+
+# Numbers with Indian or western grouping, or decimals ("10k" splits into
+# "10" + "k"), Latin words, and Devanagari/Gujarati words including their
+# vowel signs (which \w does not match) but not the danda
+_TOKEN = re.compile(r"₹|\d+(?:,\d+)*(?:\.\d+)?|[a-z]+\.?|[\u0900-\u0963\u0970-\u097f]+|[\u0a80-\u0ae5\u0af0-\u0aff]+")
+_WORD_CHARS = r"\w\u0900-\u0aff"
+
+
+def normalize_digits(text: str) -> str:
+    """Devanagari/Gujarati digits -> ASCII"""
+    return text.translate(_DIGITS)
+
+
+def _number(token: str) -> Optional[float]:
+    if token[0].isdigit():
+        return float(token.replace(",", ""))
+    return _UNITS.get(token)
+
+
+def extract_amounts(text: str) -> List[Tuple[float, bool]]:
+    """
+    All amounts in the text as (value, has_currency_marker), in order.
+    Number words and scales are combined ("one lakh twenty thousand").
+    """
+    tokens = [t.rstrip(".") if t not in _CURRENCY else t for t in _TOKEN.findall(normalize_digits(text).lower())]
+    amounts = []
+    i = 0
+    while i < len(tokens):
+        value = _number(tokens[i])
+        if value is None or (tokens[i] == "a" and (i + 1 >= len(tokens) or tokens[i + 1] not in _SCALES
+                                                    and tokens[i + 1] not in _HUNDRED)):
+            i += 1
+            continue
+        start = i
+        total, current = 0.0, value
+        i += 1
+        while i < len(tokens):
+            token = tokens[i]
+            if token in _HUNDRED:
+                current = (current or 1) * 100
+            elif token in _SCALES:
+                total += (current or 1) * _SCALES[token]
+                current = 0.0
+            elif token in _FILLER and i + 1 < len(tokens) and _number(tokens[i + 1]) is not None:
+                pass
+            else:
+                number = _number(token)
+                if number is None or token[0].isdigit():
+                    break
+                current += number
+            i += 1
+        window = tokens[max(0, start - 2):start] + tokens[i:i + 2]
+        amounts.append((total + current, any(t in _CURRENCY for t in window)))
+    return amounts
+
+
+def extract_amount(text: str) -> Optional[float]:
+    """The transfer amount: the first one next to a currency marker, else the first one"""
+    amounts = extract_amounts(text)
+    if not amounts:
+        return None
+    for value, has_currency in amounts:
+        if has_currency:
+            return value
+    return amounts[0][0]
+
+
+# ============================================================================
+# PAYEE MATCHING (AHO-CORASICK)
+# ============================================================================
+
+class PayeeMatcher:
+    """Aho-Corasick automaton mapping payee names/aliases to payee ids"""
+
+    def __init__(self, names: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]  # (pattern length, payee id)
+
+        for payee_id, aliases in names.items():
+            for alias in aliases:
+                self._add(alias.lower(), payee_id)
+        self._build()
+
+    def _add(self, pattern: str, payee_id: str):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append((len(pattern), payee_id))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """(start, end, payee id) for whole-word matches"""
+        text = text.lower()
+        matches, state = [], 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payee_id in self._output[state]:
+                start, end = index - length + 1, index + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and _ends_word(text, end):
+                    matches.append((start, end, payee_id))
+        return matches
+
+    def match(self, text: str, exclude: Optional[str] = None) -> Optional[str]:
+        """Payee id of the longest whole-word match, skipping `exclude` (the sender)"""
+        best = None
+        for start, end, payee_id in self.find_all(text):
+            if payee_id != exclude and (best is None or end - start > best[1] - best[0]):
+                best = (start, end, payee_id)
+        return best[2] if best else None
+
+
+# Case markers written attached to names ("નિયતિને", "niyati's")
+_ATTACHED_SUFFIXES = ("ને", "નો", "ની", "નું", "ના", "'s")
+
+
+def _ends_word(text: str, end: int) -> bool:
+    if end == len(text) or not _is_word_char(text[end]):
+        return True
+    for suffix in _ATTACHED_SUFFIXES:
+        if text.startswith(suffix, end):
+            after = end + len(suffix)
+            return after == len(text) or not _is_word_char(text[after])
+    return False
+
+
+def _is_word_char(char: str) -> bool:
+    # Devanagari/Gujarati vowel signs are not alphanumeric but belong to the word
+    return char.isalnum() or "\u0900" <= char <= "\u0aff"
+
+
+# ============================================================================
+# DATES
+# ============================================================================
+
+_RELATIVE_DAYS = {
+    "today": 0, "tomorrow": 1, "yesterday": -1, "day after tomorrow": 2,
+    "आज": 0, "कल": 1, "परसों": 2,  # कल is read as tomorrow for payments
+    "આજે": 0, "આજ": 0, "કાલે": 1, "આવતીકાલે": 1, "ગઈકાલે": -1, "પરમ દિવસે": 2,
+}
+_WEEKDAYS = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6}
+_MONTHS = {name: number for number, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july", "august", "september",
+     "october", "november", "december"], 1)}
+_MONTHS.update({name[:3]: number for name, number in list(_MONTHS.items())})
+
+_RELATIVE_RE = re.compile(rf"(?<![{_WORD_CHARS}])("
+                          + "|".join(sorted((re.escape(k) for k in _RELATIVE_DAYS), key=len, reverse=True))
+                          + rf")(?![{_WORD_CHARS}])")
+_WEEKDAY_RE = re.compile(r"\b(?:next\s+)?(" + "|".join(_WEEKDAYS) + r")\b")
+_ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_SLASH_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b")  # DD/MM[/YYYY]
+_MONTH_NAMES = "|".join(sorted(_MONTHS, key=len, reverse=True))
+_DAY_MONTH_RE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?(?:\s+of)?\s+({_MONTH_NAMES})\b"
+                           rf"|\b({_MONTH_NAMES})\s+(\d{{1,2}})(?:st|nd|rd|th)?\b")
+_ORDINAL_RE = re.compile(r"\bon\s+(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)?\b")
+
+
+def extract_date(text: str, today: Optional[date] = None) -> Optional[str]:
+    """ISO date for the first date expression, or None"""
+    today = today or date.today()
+    text = normalize_digits(text).lower()
+
+    match = _RELATIVE_RE.search(text)
+    if match:
+        return (today + timedelta(days=_RELATIVE_DAYS[match.group(1)])).isoformat()
+
+    match = _WEEKDAY_RE.search(text)
+    if match:
+        ahead = (_WEEKDAYS[match.group(1)] - today.weekday()) % 7 or 7
+        return (today + timedelta(days=ahead)).isoformat()
+
+    candidates = []
+    match = _ISO_DATE_RE.search(text)
+    if match:
+        candidates.append((int(match.group(1)), int(match.group(2)), int(match.group(3))))
+    match = _SLASH_DATE_RE.search(text)
+    if match:
+        year = int(match.group(3)) if match.group(3) else today.year
+        candidates.append((year + 2000 if year < 100 else year, int(match.group(2)), int(match.group(1))))
+    match = _DAY_MONTH_RE.search(text)
+    if match:
+        day, month = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+        candidates.append((today.year, _MONTHS[month], int(day)))
+    match = _ORDINAL_RE.search(text)
+    if match:
+        # "on the 5th" means the next 5th
+        day, month, year = int(match.group(1)), today.month, today.year
+        if day < today.day:
+            month, year = (1, year + 1) if month == 12 else (month + 1, year)
+        candidates.append((year, month, day))
+
+    for year, month, day in candidates:
+        try:
+            return date(year, month, day).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+# ============================================================================
+# TRANSFER COMMANDS
+# ============================================================================
+
+# English instructions start with the verb ("please send ...", "I want to
+# transfer ..."); Hindi and Gujarati ones end with it ("... भेज दो",
+# "... મોકલો"). Questions and mentions ("did my payment go through?",
+# "my balance after I send 500", "repayment of 2000") match neither.
+_COMMAND_EN = re.compile(
+    r"^\s*(?:(?:please|kindly)\s+|(?:can|could|would|will)\s+you\s+(?:please\s+)?"
+    r"|i\s+(?:want|need|would\s+like|'d\s+like)\s+to\s+)?"
+    r"(?:transfer|send|pay)\s+(?!for\b|of\b)\S"
+)
+_COMMAND_INDIC = re.compile(
+    r"(?:भेज(?:ें|ो|िए|\s+दो|\s+दें|\s+दीजिए|ना\s+है)"
+    r"|(?:ट्रांसफर|transfer)\s+(?:कर(?:ें|ो|िए|\s+दो|\s+दें|\s+दीजिए|ना\s+है)|kar(?:o|\s*do|\s*den|\s*dijiye))"
+    r"|મોકલ(?:ો|ી\s+દો|ી\s+આપો|વા\s+છે)"
+    r"|ટ્રાન્સફર\s+કર(?:ો|ી\s+દો|ી\s+આપો|વા\s+છે))"
+    r"(?:\s+(?:please|प्लीज़|प्लीज|પ્લીઝ))?[\s।.!]*$"
+)
+
+
+def is_transfer_command(text: str) -> bool:
+    """True only for an explicit instruction to move money"""
+    text = text.strip().lower()
+    return bool(_COMMAND_EN.match(text) or _COMMAND_INDIC.search(text))
+
+
+# ============================================================================
+# ENTRY POINT
+# ============================================================================
+
+class EntityExtractor:
+    """Amount, recipient and date extraction for transfer requests"""
+
+    def __init__(self, payees: Dict[str, Iterable[str]]):
+        self.payees = PayeeMatcher(payees)
+
+    def extract(self, text: str, sender: Optional[str] = None, today: Optional[date] = None) -> Dict:
+        entities = {}
+        amount = extract_amount(text)
+        if amount is not None:
+            entities["amount"] = amount
+        recipient = self.payees.match(text, exclude=sender)
+        if recipient is not None:
+            entities["recipient"] = recipient
+        when = extract_date(text, today)
+        if when is not None:
+            entities["date"] = when
+        return entities
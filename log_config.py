@@ -0,0 +1,367 @@
+"""
+Logging
+Non-blocking, sampled, request-correlated logging for the backend
+
+Request threads never write to stdout. Log calls go through a QueueHandler
+onto a bounded queue, and one writer thread formats them and writes each
+batch with a single write and flush. Records are formatted lazily:
+
+- level checks and sampling drop most debug/info records before any
+  formatting happens; the sampling decision is made once per request
+- records skip the caller lookup (a stack walk) and the thread/process
+  fields, which none of the formats print
+- kept records whose arguments are plain values are formatted on the
+  writer thread, not the request thread
+- PII (amounts, account numbers, phone numbers, emails) is redacted by the
+  writer's formatter
+
+Every record carries the id of the request it belongs to (set once per
+request with bind_request_id), so the lines from all graph nodes of one
+turn can be correlated. Sampling is decided per request, so a sampled
+request keeps all of its lines.
+
+    LOG_LEVEL=INFO
+    LOG_FORMAT=text                                 # or json
+    LOG_SAMPLE_RATES=banking.intent=0.1,banking.dialog=0.1
+    LOG_REDACT=true
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_MAX = int(os.getenv("LOG_BATCH_MAX", "512"))
+LOG_REDACT = os.getenv("LOG_REDACT", "true").lower() == "true"
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (item.partition("=") for item in os.getenv("LOG_SAMPLE_RATES", "").split(","))
+    if name.strip() and rate
+}
+
+ROOT_LOGGER = "banking"
+
+_request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+_sampling: contextvars.ContextVar = contextvars.ContextVar("sampling", default=None)  # prefix -> kept
+
+_AMOUNT = re.compile(r"₹\s?-?[\d,]+(?:\.\d+)?")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+_LONG_NUMBER = re.compile(r"\d{10}")
+_ACCOUNT_NUMBER = re.compile(r"\b([A-Z]{3})\d{8}(\d{4})\b")
+_PHONE = re.compile(r"\+?\b(?:\d{2,3}[-\s]?)?\d{10}\b")
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def get_logger(category: str) -> logging.Logger:
+    """Logger for one subsystem, e.g. get_logger('intent') -> 'banking.intent'"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
+
+
+def bind_request_id(request_id: str) -> contextvars.Token:
+    """Attach a request id to all log records from this context"""
+    _sampling.set({})
+    return _request_id.set(request_id)
+
+
+def current_request_id() -> str:
+    return _request_id.get()
+
+
+def redact(text: str) -> str:
+    """Mask amounts, emails, account numbers (last 4 kept) and phone numbers"""
+    # Cheap guards first: most lines contain none of these
+    if "₹" in text:
+        text = _AMOUNT.sub("₹***", text)
+    if "@" in text:
+        text = _EMAIL.sub("<email>", text)
+    if _LONG_NUMBER.search(text):
+        text = _ACCOUNT_NUMBER.sub(r"\1********\2", text)
+        text = _PHONE.sub("<phone>", text)
+    return text
+
+
+# ============================================================================
+# FILTERS, HANDLER, FORMATTERS
+# ============================================================================
+
+_counts = {"dropped": 0, "sampled_out": 0}
+_counts_lock = threading.Lock()
+_dequeued = 0  # only the writer thread updates this
+
+
+def _count(name: str):
+    with _counts_lock:
+        _counts[name] += 1
+
+
+class RequestSampler(logging.Filter):
+    """Adds request_id; keeps a per-category fraction of requests below WARNING"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self._rule_for: Dict[str, Optional[Tuple[str, float]]] = {}  # logger name -> (prefix, rate)
+
+    def _rule(self, name: str) -> Optional[Tuple[str, float]]:
+        try:
+            return self._rule_for[name]
+        except KeyError:
+            rule = next(((prefix, rate) for prefix, rate in self.rates
+                         if name == prefix or name.startswith(prefix + ".")), None)
+            self._rule_for[name] = rule
+            return rule
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rule = self._rule(record.name)
+        if rule is None or rule[1] >= 1.0:
+            return True
+        prefix, rate = rule
+        # Same decision for every line of a request, hashed once per request
+        decisions = _sampling.get()
+        kept = decisions.get(prefix) if decisions is not None else None
+        if kept is None:
+            key = f"{record.request_id}:{prefix}" if decisions is not None else f"{id(record)}"
+            kept = zlib.crc32(key.encode()) / 0x100000000 < rate
+            if decisions is not None:
+                decisions[prefix] = kept
+        if not kept:
+            _count("sampled_out")
+        return kept
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Never blocks the caller: drops (and counts) records when the queue is
+    full. The queue is a SimpleQueue (C, no Condition to notify) with an
+    approximate bound checked before each put.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, maxsize: int = LOG_QUEUE_SIZE):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Defer %-formatting to the writer thread when the arguments cannot
+        # change in the meantime; otherwise snapshot the message now
+        if record.args and not _plain_args(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # The queue is thread-safe; skip Handler.handle's per-handler lock,
+        # which would serialize every request thread
+        kept = self.filter(record)
+        if isinstance(kept, logging.LogRecord):  # Python 3.12+ may return a replacement
+            record = kept
+        if kept:
+            self.emit(record)
+        return kept
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.maxsize:
+            _count("dropped")
+            return
+        self.queue.put(record)
+
+
+def _plain_args(args) -> bool:
+    # A plain loop: a generator inside all() costs more than the checks
+    for arg in (args.values() if isinstance(args, dict) else args):
+        if not isinstance(arg, _PLAIN_TYPES):
+            return False
+    return True
+
+
+class _SecondCachedTime(logging.Formatter):
+    """formatTime with the strftime part reused for records in the same second"""
+
+    _second = None
+    _second_text = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._second:
+            # Only the writer thread formats, so the cache needs no lock
+            self._second = second
+            self._second_text = time.strftime(self.default_time_format, self.converter(record.created))
+        return self.default_msec_format % (self._second_text, record.msecs)
+
+
+class TextFormatter(_SecondCachedTime):
+    def __init__(self, redact_pii: bool = LOG_REDACT):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+        self.redact_pii = redact_pii
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        # Only the message and extras can carry PII, not the prefix
+        message = record.message
+        turn = getattr(record, "turn", None)
+        if turn is not None:
+            message += " " + json.dumps(turn, ensure_ascii=False, default=str)
+        record.message = redact(message) if self.redact_pii else message
+        return super().formatMessage(record)
+
+
+class JsonFormatter(_SecondCachedTime):
+    def __init__(self, redact_pii: bool = LOG_REDACT):
+        super().__init__()
+        self.redact_pii = redact_pii
+
+    def format(self, record: logging.LogRecord) -> str:
+        scrub = redact if self.redact_pii else str
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": scrub(record.getMessage()),
+        }
+        if getattr(record, "turn", None) is not None:
+            entry["turn"] = json.loads(scrub(json.dumps(record.turn, ensure_ascii=False, default=str)))
+        if record.exc_text:
+            entry["exception"] = scrub(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BatchWriter:
+    """Listener thread: drains the queue in batches, one write and flush per batch"""
+
+    _STOP = None
+
+    def __init__(self, log_queue: queue.SimpleQueue, stream, formatter: logging.Formatter,
+                 batch_max: int = LOG_BATCH_MAX):
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.batch_max = batch_max
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        global _dequeued
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_max:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            _dequeued += len(batch)
+            lines = []
+            for record in batch:
+                if record is self._STOP:
+                    continue
+                try:
+                    lines.append(self.formatter.format(record))
+                except Exception:
+                    lines.append(f"unformattable log record from {record.name}: {record.msg!r}")
+            try:
+                if lines:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                self.batches += 1
+            except (OSError, ValueError):
+                pass  # Closed or broken stream: logging must never take the app down
+            if any(record is self._STOP for record in batch):
+                return
+
+    def stop(self, timeout: float = 5.0):
+        """Write out everything queued so far, then stop"""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout)
+
+
+# ============================================================================
+# SETUP
+# ============================================================================
+
+_writer: Optional[BatchWriter] = None
+_log_queue: Optional[queue.SimpleQueue] = None
+_setup_lock = threading.Lock()
+
+
+def configure_logging(stream=None, level: str = LOG_LEVEL, fmt: str = LOG_FORMAT,
+                      sample_rates: Optional[Dict[str, float]] = None,
+                      queue_size: int = LOG_QUEUE_SIZE) -> logging.Logger:
+    """Install the queue handler and start the writer thread (idempotent)"""
+    global _writer, _log_queue
+    root = logging.getLogger(ROOT_LOGGER)
+    with _setup_lock:
+        if _writer is not None:
+            return root
+        # Caller lookup walks the stack on every record; thread and process
+        # fields cost lookups too. No format prints any of them.
+        logging._srcfile = None
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        _log_queue = queue.SimpleQueue()
+        handler = DroppingQueueHandler(_log_queue, queue_size)
+        handler.addFilter(RequestSampler(LOG_SAMPLE_RATES if sample_rates is None else sample_rates))
+
+        formatter = JsonFormatter() if fmt == "json" else TextFormatter()
+        _writer = BatchWriter(_log_queue, stream or sys.stdout, formatter)
+        _writer.start()
+        atexit.register(shutdown_logging)
+
+        root.setLevel(level)
+        root.addHandler(handler)
+        root.propagate = False
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _writer
+    with _setup_lock:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
+            root = logging.getLogger(ROOT_LOGGER)
+            for handler in list(root.handlers):
+                if isinstance(handler, DroppingQueueHandler):
+                    root.removeHandler(handler)
+
+
+def logging_stats() -> Dict:
+    queued = _log_queue.qsize() if _log_queue is not None else 0
+    with _counts_lock:
+        dropped, sampled_out = _counts["dropped"], _counts["sampled_out"]
+    return {
+        "enqueued": _dequeued + queued,
+        "dropped": dropped,
+        "sampled_out": sampled_out,
+        "queued": queued,
+        "write_batches": _writer.batches if _writer is not None else 0,
+    }
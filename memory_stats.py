@@ -0,0 +1,180 @@
+"""
+Memory Accounting
+Process, checkpointer and allocation statistics for leak hunting
+
+Reports resident memory, the size of the LangGraph checkpointer (threads,
+checkpoints, pending writes and serialized bytes) and, when tracemalloc is
+running, the top allocation sites and their growth since a baseline
+snapshot. Served by /api/admin/memory; benchmarks/memory_soak.py tracks the
+same numbers over a long run.
+
+tracemalloc slows allocation-heavy code noticeably, so it only runs when
+MEMORY_TRACEMALLOC=true or after a baseline is taken through the admin
+endpoint.
+"""
+
+import gc
+import os
+import resource
+import sys
+import threading
+import tracemalloc
+from typing import Dict, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "10"))
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size (Linux /proc), or None where unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # kB on Linux
+
+
+def _payload_bytes(value, depth: int = 0) -> int:
+    """Bytes held by serialized payloads inside nested tuples/lists/dicts"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if depth > 6:
+        return 0
+    if isinstance(value, (tuple, list)):
+        return sum(_payload_bytes(item, depth + 1) for item in value)
+    if isinstance(value, dict):
+        return sum(_payload_bytes(item, depth + 1) for item in value.values())
+    return 0
+
+
+def _snapshot(mapping) -> list:
+    # The checkpointer is written concurrently; retry until a copy succeeds
+    for _ in range(5):
+        try:
+            return list(mapping.items())
+        except RuntimeError:
+            continue
+    return []
+
+
+def checkpointer_stats(checkpointer) -> Dict:
+    """Threads, checkpoints and serialized bytes held by an in-memory saver"""
+    if checkpointer is None:
+        return {"type": None}
+    stats = {"type": type(checkpointer).__name__}
+    storage = getattr(checkpointer, "storage", None)
+    if storage is None:
+        return stats  # Not an in-memory saver: nothing held in this process
+
+    checkpoints = checkpoint_bytes = 0
+    largest_thread = (None, 0)
+    for thread_id, namespaces in _snapshot(storage):
+        thread_bytes = 0
+        for _, by_id in _snapshot(namespaces):
+            checkpoints += len(by_id)
+            thread_bytes += _payload_bytes(dict(_snapshot(by_id)))
+        checkpoint_bytes += thread_bytes
+        if thread_bytes > largest_thread[1]:
+            largest_thread = (thread_id, thread_bytes)
+
+    writes = _snapshot(getattr(checkpointer, "writes", {}))
+    blobs = _snapshot(getattr(checkpointer, "blobs", {}))
+    stats.update({
+        "threads": len(storage),
+        "checkpoints": checkpoints,
+        "checkpoint_bytes": checkpoint_bytes,
+        "pending_writes": sum(len(w) for _, w in writes),
+        "write_bytes": _payload_bytes(dict(writes)),
+        "blobs": len(blobs),
+        "blob_bytes": _payload_bytes(dict(blobs)),
+        "largest_thread": {"thread_id": largest_thread[0], "bytes": largest_thread[1]},
+    })
+    return stats
+
+
+# ============================================================================
+# TRACEMALLOC
+# ============================================================================
+
+class MemoryInspector:
+    """tracemalloc snapshots and diffs against a baseline"""
+
+    def __init__(self, start_tracing: bool = MEMORY_TRACEMALLOC, frames: int = TRACEMALLOC_FRAMES):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+        if start_tracing and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    @staticmethod
+    def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ])
+
+    def take_baseline(self) -> Dict:
+        """Start tracing if needed and remember the current allocations"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            gc.collect()
+            self._baseline = self._filtered(tracemalloc.take_snapshot())
+            return {"tracing": True, "baseline_traced_bytes": sum(s.size for s in self._baseline.statistics("filename"))}
+
+    def stop(self):
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = None
+
+    def report(self, top: int = 15, group_by: str = "lineno") -> Dict:
+        """Top allocation sites, plus growth since the baseline when there is one"""
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._filtered(tracemalloc.take_snapshot())
+        report = {
+            "tracing": True,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": [_stat_entry(stat) for stat in snapshot.statistics(group_by)[:top]],
+        }
+        with self._lock:
+            baseline = self._baseline
+        if baseline is not None:
+            growth = [diff for diff in snapshot.compare_to(baseline, group_by) if diff.size_diff > 0]
+            report["growth_since_baseline"] = [_diff_entry(diff) for diff in growth[:top]]
+        return report
+
+
+def _stat_entry(stat: tracemalloc.Statistic) -> Dict:
+    frame = stat.traceback[0]
+    return {"where": f"{frame.filename}:{frame.lineno}", "bytes": stat.size, "blocks": stat.count}
+
+
+def _diff_entry(diff: tracemalloc.StatisticDiff) -> Dict:
+    frame = diff.traceback[0]
+    return {"where": f"{frame.filename}:{frame.lineno}", "bytes": diff.size, "bytes_diff": diff.size_diff,
+            "blocks_diff": diff.count_diff}
+
+
+def process_stats() -> Dict:
+    return {
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "gc_counts": gc.get_count(),
+        "threads": threading.active_count(),
+    }
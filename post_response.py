@@ -0,0 +1,257 @@
+"""
+Post-response Pipeline
+Audit records, compliance findings and turn logs, handled off the request path
+
+Requests only enqueue events on a bounded queue. One background worker
+drains the queue in batches and for each batch:
+
+- runs compliance checks on finished turns (unless the request already
+  did, to report compliance_passed in its response)
+- emits one structured log record per turn
+- appends audit records (every ledger append plus every compliance
+  finding) to an append-only JSONL file
+
+All audit records of a batch are written together and made durable with a
+single fsync (group commit). A burst of requests therefore costs one disk
+flush rather than one per record, and no request waits for the disk.
+
+When the queue is full, turn events are dropped and counted. Ledger
+events, which are the audit trail of money movements, never block and are
+never dropped: they go to a bounded overflow list that the worker commits
+with its next batch. Only if that is full too is a record appended
+straight to a separate spill file (AUDIT_LOG_PATH + ".spill").
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+AUDIT_LOG_PATH = os.getenv("AUDIT_LOG_PATH", os.path.join("logs", "audit.jsonl"))
+AUDIT_FSYNC = os.getenv("AUDIT_FSYNC", "true").lower() == "true"
+POST_RESPONSE_QUEUE_SIZE = int(os.getenv("POST_RESPONSE_QUEUE_SIZE", "1000"))
+POST_RESPONSE_BATCH_MAX = int(os.getenv("POST_RESPONSE_BATCH_MAX", "256"))
+POST_RESPONSE_BATCH_WAIT_MS = int(os.getenv("POST_RESPONSE_BATCH_WAIT_MS", "5"))
+AUDIT_OVERFLOW_MAX = int(os.getenv("AUDIT_OVERFLOW_MAX", "10000"))
+
+# Compliance rules
+TRANSFER_LIMIT = float(os.getenv("COMPLIANCE_TRANSFER_LIMIT", "500000"))  # NEFT/RTGS daily limit
+_ACCOUNT_NUMBER = re.compile(r"\b[A-Z]{3}\d{12}\b")
+
+turn_logger = logging.getLogger("banking.turns")
+
+_STOP = object()
+_WAKE = object()  # wakes the worker to commit overflowed ledger records
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+# ============================================================================
+# COMPLIANCE
+# ============================================================================
+
+def compliance_findings(turn: Dict) -> List[str]:
+    """Rule violations for one finished turn (empty list = passed)"""
+    findings = []
+    entities = turn.get("entities") or {}
+    if entities.get("transfer_successful") and entities.get("amount_transferred", 0) > TRANSFER_LIMIT:
+        findings.append("transfer_over_limit")
+    # The user's own account and the payee they just paid may be read back;
+    # any other full account number in a reply is a leak
+    expected = {turn.get("account_number"), entities.get("recipient_account")}
+    if any(number not in expected for number in _ACCOUNT_NUMBER.findall(turn.get("response") or "")):
+        findings.append("full_account_number_in_response")
+    if turn.get("intent") == "transfer_funds" and not turn.get("is_authenticated", True):
+        findings.append("unauthenticated_transfer")
+    return findings
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+class AuditLog:
+    """Append-only JSONL file written in batches, one fsync per batch"""
+
+    def __init__(self, path: str = AUDIT_LOG_PATH, fsync: bool = AUDIT_FSYNC):
+        self.path = path
+        self.fsync = fsync
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self.records = 0
+        self.commits = 0
+
+    def commit(self, records: List[Dict]):
+        if not records:
+            return
+        self._file.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.records += len(records)
+        self.commits += 1
+
+    def close(self):
+        self._file.close()
+
+
+class PostResponsePipeline:
+    """Bounded queue plus one worker doing audit, compliance and turn logs"""
+
+    def __init__(self, audit_log: Optional[AuditLog] = None, maxsize: int = POST_RESPONSE_QUEUE_SIZE):
+        self.audit_log = audit_log or AuditLog()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._overflow: deque = deque()  # ledger records that found the queue full
+        self._overflow_lock = threading.Lock()
+        self._spill: Optional[AuditLog] = None
+        self.turns = 0
+        self.dropped = 0
+        self.overflowed = 0
+        self.spilled = 0
+        self.findings = 0
+        self.errors = 0
+        self._worker = threading.Thread(target=self._run, name="post-response", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    # Producers (request threads) -----------------------------------------
+
+    def submit_turn(self, turn: Dict):
+        """Queue a finished turn; dropped (and counted) when the queue is full"""
+        try:
+            self._queue.put_nowait(("turn", _now(), turn))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def record_ledger_append(self, user_id: str, transaction: Dict):
+        """TransactionLedger listener: audit every money movement, without blocking"""
+        at = _now()
+        try:
+            self._queue.put_nowait(("ledger", at, {"user_id": user_id, **transaction}))
+            return
+        except queue.Full:
+            pass
+        record = {"type": "ledger_append", "at": at, "user_id": user_id, **transaction}
+        with self._overflow_lock:
+            if len(self._overflow) < AUDIT_OVERFLOW_MAX:
+                self._overflow.append(record)
+                self.overflowed += 1
+                record = None
+            else:
+                # Worker far behind: never lose the audit trail, spill to a
+                # file of its own so the worker's commits are not contended
+                if self._spill is None:
+                    self._spill = AuditLog(self.audit_log.path + ".spill", self.audit_log.fsync)
+                self._spill.commit([record])
+                self.spilled += 1
+        if record is None:
+            try:
+                # The worker may have drained the overflow just before this append
+                self._queue.put_nowait(_WAKE)
+            except queue.Full:
+                pass  # A full queue means the worker runs another batch anyway
+
+    # Worker --------------------------------------------------------------
+
+    def _next_batch(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + POST_RESPONSE_BATCH_WAIT_MS / 1000.0
+        while len(batch) < POST_RESPONSE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            stop = any(event is _STOP for event in batch)
+            audit_records = []
+            for event in batch:
+                if event is _STOP or event is _WAKE:
+                    continue
+                kind, at, payload = event
+                try:
+                    if kind == "ledger":
+                        audit_records.append({"type": "ledger_append", "at": at, **payload})
+                    else:
+                        audit_records.extend(self._process_turn(at, payload))
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                    turn_logger.warning("post-response event failed: %s", e)
+            with self._overflow_lock:
+                audit_records.extend(self._overflow)
+                self._overflow.clear()
+            try:
+                with self._lock:
+                    self.audit_log.commit(audit_records)
+            except OSError as e:
+                with self._lock:
+                    self.errors += 1
+                turn_logger.error("audit commit failed for %d records: %s", len(audit_records), e)
+            if stop:
+                return
+
+    def _process_turn(self, at: str, turn: Dict) -> List[Dict]:
+        findings = turn["compliance_findings"] if "compliance_findings" in turn else compliance_findings(turn)
+        with self._lock:
+            self.turns += 1
+            self.findings += len(findings)
+        turn_logger.info("turn", extra={"turn": {
+            "at": at,
+            "request_id": turn.get("request_id"),
+            "user_id": turn.get("user_id"),
+            "thread_id": turn.get("thread_id"),
+            "intent": turn.get("intent"),
+            "degraded": turn.get("degraded"),
+            "latency_ms": turn.get("latency_ms"),
+            "compliance_passed": not findings,
+        }})
+        if not findings:
+            return []
+        return [{"type": "compliance", "at": at, "user_id": turn.get("user_id"),
+                 "thread_id": turn.get("thread_id"), "intent": turn.get("intent"), "findings": findings}]
+
+    def close(self, timeout: float = 5.0):
+        """Drain and stop the worker (at exit)"""
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._overflow_lock:
+            overflowed, spilled = self.overflowed, self.spilled
+        with self._lock:
+            commits = self.audit_log.commits
+            return {
+                "queued": self._queue.qsize(),
+                "turns_processed": self.turns,
+                "turns_dropped": self.dropped,
+                "ledger_overflowed": overflowed,
+                "ledger_spilled": spilled,
+                "compliance_findings": self.findings,
+                "errors": self.errors,
+                "audit_records": self.audit_log.records,
+                "audit_commits": commits,
+                "records_per_commit": round(self.audit_log.records / commits, 2) if commits else 0.0,
+            }
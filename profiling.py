@@ -0,0 +1,300 @@
+"""
+Request Profiling
+On-demand, per-request profiles of a graph run, tagged by node
+
+A request is profiled when it sends `X-Profile: sample` (or `cprofile`),
+or when it is picked by PROFILE_SAMPLE_RATE. Two capture modes:
+
+- sample: a background thread snapshots the stacks of the threads running
+  graph nodes every PROFILE_INTERVAL_MS (wall clock, so time spent waiting
+  on the LLM gateway or ASR shows up)
+- cprofile: each node runs under cProfile (deterministic, CPU-heavy code
+  paths, with more overhead)
+
+Every stack is rooted at the node it was captured in. Captures are kept in
+a small ring and can be exported as collapsed stacks (flamegraph.pl,
+speedscope, inferno) or speedscope JSON; with PROFILE_DIR set they are also
+written to disk.
+
+With profiling disabled the cost is one flag check per request and one
+context variable lookup per node.
+"""
+
+import cProfile
+import contextvars
+import functools
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_CAPTURES = int(os.getenv("PROFILE_MAX_CAPTURES", "50"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "4"))
+PROFILE_DIR = os.getenv("PROFILE_DIR")  # unset = memory only
+
+PROFILE_MODES = ("sample", "cprofile")
+
+_active: contextvars.ContextVar = contextvars.ContextVar("active_profile", default=None)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# ============================================================================
+# CAPTURE
+# ============================================================================
+
+class ProfileCapture:
+    """Stacks and per-node timings of one profiled graph run"""
+
+    def __init__(self, mode: str, request_id: str = "-", tags: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.request_id = request_id
+        self.tags = dict(tags or {})
+        self.started = time.time()
+        self.duration_ms = 0.0
+        self.node_ms: Dict[str, float] = {}
+        # Weighted stacks; weight unit is microseconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # thread ident -> (node, wrapper frame) for nodes currently running
+        self._running: Dict[int, Tuple[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def enter_node(self, node: str, frame):
+        with self._lock:
+            self._running[threading.get_ident()] = (node, frame)
+
+    def exit_node(self, node: str, elapsed_ms: float):
+        with self._lock:
+            self._running.pop(threading.get_ident(), None)
+            self.node_ms[node] = self.node_ms.get(node, 0.0) + elapsed_ms
+
+    def take_sample(self, frames: Dict[int, object], weight_us: float):
+        """Record the current stack of every thread running a node"""
+        with self._lock:
+            running = list(self._running.items())
+        for thread_id, (node, root) in running:
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None and frame is not root:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(node)
+            with self._lock:
+                self.stacks[tuple(reversed(stack))] += weight_us
+                self.samples += 1
+
+    def add_cprofile(self, node: str, profiler: cProfile.Profile):
+        """Fold a node's cProfile stats into caller;callee stacks weighted by own time"""
+        stats = pstats.Stats(profiler).stats
+        with self._lock:
+            for (filename, line, name), (_, calls, own_time, _, callers) in stats.items():
+                if own_time <= 0 or filename == "~" and "_lsprof" in name:
+                    continue
+                label = f"{name} ({os.path.basename(filename)}:{line})"
+                parents = [f"{c[2]} ({os.path.basename(c[0])}:{c[1]})" for c in callers] or [None]
+                share = own_time * 1e6 / len(parents)
+                for parent in parents:
+                    stack = (node, parent, label) if parent else (node, label)
+                    self.stacks[stack] += share
+                self.samples += calls
+
+    # Export ----------------------------------------------------------------
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: 'node;outer;inner <weight_us>'"""
+        return "\n".join(f"{';'.join(stack)} {int(round(weight))}"
+                         for stack, weight in sorted(self.stacks.items()) if weight >= 0.5) + "\n"
+
+    def speedscope(self) -> Dict:
+        """speedscope file format, one sampled profile weighted in microseconds"""
+        frame_index: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, weight in self.stacks.items():
+            samples.append([frame_index.setdefault(label, len(frame_index)) for label in stack])
+            weights.append(round(weight, 1))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "banking-assistant",
+            "name": f"{self.tags.get('intent') or 'graph'} {self.id}",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": label} for label in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.mode} {self.request_id}",
+                "unit": "microseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 1),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "request_id": self.request_id,
+            "tags": self.tags,
+            "started": self.started,
+            "duration_ms": round(self.duration_ms, 1),
+            "node_ms": {node: round(ms, 1) for node, ms in self.node_ms.items()},
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+        }
+
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+
+class RequestProfiler:
+    """Decides which requests to profile, runs the sampler, keeps captures"""
+
+    def __init__(self, enabled: bool = PROFILING_ENABLED, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, max_captures: int = PROFILE_MAX_CAPTURES,
+                 max_concurrent: int = PROFILE_MAX_CONCURRENT, directory: Optional[str] = PROFILE_DIR):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval_s = interval_ms / 1000.0
+        self.max_concurrent = max_concurrent
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._captures: "OrderedDict[str, ProfileCapture]" = OrderedDict()
+        self._max_captures = max_captures
+        self._sampling: List[ProfileCapture] = []
+        self._in_flight = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def choose_mode(self, requested: Optional[str]) -> Optional[str]:
+        """Capture mode for a request (header value or sampling), or None"""
+        if not self.enabled:
+            return None
+        if requested:
+            requested = requested.strip().lower()
+            return "sample" if requested in ("1", "true", "on") else requested if requested in PROFILE_MODES else None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def start(self, mode: str, request_id: str = "-", tags: Optional[Dict] = None):
+        """
+        Begin a capture in the current context. Returns (capture, token), or
+        (None, None) when too many captures are already running.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                self.skipped += 1
+                return None, None
+            self._in_flight += 1
+            capture = ProfileCapture(mode, request_id, tags)
+            if mode == "sample":
+                self._sampling.append(capture)
+                if self._sampler is None or not self._sampler.is_alive():
+                    self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+                    self._sampler.start()
+        return capture, _active.set(capture)
+
+    def finish(self, capture: ProfileCapture, token):
+        _active.reset(token)
+        capture.duration_ms = (time.time() - capture.started) * 1000.0
+        with self._lock:
+            self._in_flight -= 1
+            if capture in self._sampling:
+                self._sampling.remove(capture)
+            self._captures[capture.id] = capture
+            while len(self._captures) > self._max_captures:
+                self._captures.popitem(last=False)
+        if self.directory:
+            self._write(capture)
+
+    def _write(self, capture: ProfileCapture):
+        base = os.path.join(self.directory, f"{int(capture.started)}-{capture.id}")
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            f.write(capture.collapsed())
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(capture.speedscope(), f, ensure_ascii=False)
+
+    def _sample_loop(self):
+        """Runs only while at least one sampling capture is in progress"""
+        last = time.perf_counter()
+        while True:
+            time.sleep(self.interval_s)
+            with self._lock:
+                captures = list(self._sampling)
+                if not captures:
+                    self._sampler = None
+                    return
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for capture in captures:
+                capture.take_sample(frames, (now - last) * 1e6)
+            last = now
+            del frames
+
+    def wrap_node(self, node: Callable) -> Callable:
+        """Graph node wrapper: times the node and attributes stacks to it"""
+        name = node.__name__.replace("_agent", "")
+
+        @functools.wraps(node)
+        def profiled_node(state):
+            capture = _active.get()
+            if capture is None:
+                return node(state)
+            started = time.perf_counter()
+            capture.enter_node(name, sys._getframe())
+            profiler = cProfile.Profile() if capture.mode == "cprofile" else None
+            try:
+                if profiler is None:
+                    return node(state)
+                profiler.enable()
+                try:
+                    return node(state)
+                finally:
+                    profiler.disable()
+            finally:
+                capture.exit_node(name, (time.perf_counter() - started) * 1000.0)
+                if profiler is not None:
+                    capture.add_cprofile(name, profiler)
+
+        return profiled_node
+
+    # Retrieval -------------------------------------------------------------
+
+    def get(self, capture_id: str) -> Optional[ProfileCapture]:
+        with self._lock:
+            return self._captures.get(capture_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            captures = list(self._captures.values())
+        return [capture.summary() for capture in reversed(captures)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "in_flight": self._in_flight,
+                "stored": len(self._captures),
+                "skipped_over_limit": self.skipped,
+            }
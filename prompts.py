@@ -0,0 +1,321 @@
+"""
+Prompt Registry
+Static-prefix-first prompts with per-language token budgets
+
+Every prompt is a system message that is identical for all requests in a
+language, followed by one human message that holds everything
+request-specific (user text, intent, account context). Providers cache
+identical prompt prefixes, so the long instruction blocks are processed
+once rather than on every turn; only the short tail is new input.
+
+Devanagari and Gujarati text costs several times more tokens than English,
+so each language has a token budget for the whole prompt. The context
+(earlier turns, balance and transaction lines, retrieved documents) is
+trimmed line by line to what the budget leaves after the fixed parts:
+earlier turns go first, oldest first, then account lines from the end, and
+retrieved documents only when nothing else is left.
+Tokens are counted with tiktoken when it is installed and a script-aware
+estimate otherwise. Per-node prompt token totals, and the provider's own
+input/cached token counts when it reports them, are in /api/metrics under
+"prompts".
+
+Configuration:
+    PROMPT_TOKEN_BUDGETS=en=450,hi=600,gu=600
+    PROMPT_MIN_CONTEXT_TOKENS=120
+    PROMPT_TOKENIZER=o200k_base
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROMPT_TOKEN_BUDGETS = {
+    language.strip(): int(budget)
+    for language, _, budget in (item.partition("=") for item in
+                                os.getenv("PROMPT_TOKEN_BUDGETS", "en=450,hi=600,gu=600").split(","))
+    if language.strip() and budget
+}
+PROMPT_MIN_CONTEXT_TOKENS = int(os.getenv("PROMPT_MIN_CONTEXT_TOKENS", "120"))
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "o200k_base")
+
+TRIMMED_MARKER = "..."
+
+
+# ============================================================================
+# TOKEN COUNTING
+# ============================================================================
+
+class TokenCounter:
+    """tiktoken counts when available, otherwise a per-script estimate"""
+
+    def __init__(self, encoding: str = PROMPT_TOKENIZER):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception:
+                self.encoding = None  # Unknown encoding or BPE file not downloadable
+        self.backend = f"tiktoken:{encoding}" if self.encoding is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # English BPE merges ~4 ASCII characters per token; Indic scripts get
+        # few merges and come out near one token per character
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def fit_lines(lines: List[str], budget: int, counter: TokenCounter) -> Tuple[List[str], int]:
+    """Leading lines that fit in budget tokens, and how many were dropped"""
+    kept, used = [], 0
+    for i, line in enumerate(lines):
+        cost = counter.count(line) + 1  # + newline
+        if used + cost > budget:
+            return kept + [TRIMMED_MARKER], len(lines) - i
+        kept.append(line)
+        used += cost
+    return kept, 0
+
+
+def fit_context(history: List[str], lines: List[str], documents: List[str], budget: int,
+                counter: TokenCounter) -> Tuple[List[str], int]:
+    """
+    history + lines + documents within budget tokens, and how many lines were
+    dropped. History (oldest first) is dropped from the front, then lines
+    from the end; documents are trimmed only once both are gone.
+    """
+    costs = [counter.count(line) + 1 for line in history]
+    over = sum(costs) + sum(counter.count(line) + 1 for line in lines + documents) - budget
+    start = 0
+    while over > 0 and start < len(history):
+        over -= costs[start]
+        start += 1
+    if over <= 0:
+        return ([TRIMMED_MARKER] if start else []) + history[start:] + lines + documents, start
+
+    documents_cost = sum(counter.count(line) + 1 for line in documents)
+    if documents_cost <= budget:
+        kept, dropped = fit_lines(lines, budget - documents_cost, counter)
+        return kept + documents, start + dropped
+    kept, dropped = fit_lines(documents, budget, counter)
+    marker = [TRIMMED_MARKER] if lines and kept[:1] != [TRIMMED_MARKER] else []
+    return marker + kept, start + len(lines) + dropped
+
+
+# ============================================================================
+# PROMPTS
+# ============================================================================
+
+INTENT_SYSTEM = {
+    "en": """You are an intent classifier for a banking assistant. Analyze the user's request and identify:
+1. Primary intent (one of: check_balance, view_transactions, spending_insights, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
+2. Confidence level (0.0 to 1.0)
+3. Entities (amounts, dates, account numbers)
+4. All intents, primary first, when the request asks for several things
+
+Respond in JSON format:
+{
+    "intent": "<intent_name>",
+    "intents": ["<intent_name>", ...],
+    "confidence": <float>,
+    "entities": {}
+}""",
+    "hi": """आप एक बैंकिंग सहायक के लिए इंटेंट क्लासिफायर हैं। उपयोगकर्ता के अनुरोध का विश्लेषण करें और पहचानें:
+1. मुख्य इंटेंट (इनमें से एक: check_balance, view_transactions, spending_insights, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
+2. विश्वास स्तर (0.0 से 1.0)
+3. एंटिटीज (राशि, तारीख, खाता संख्या)
+4. अनुरोध में कई चीजें मांगी गई हों तो सभी इंटेंट (मुख्य इंटेंट पहले)
+
+JSON फॉर्मेट में जवाब दें:
+{
+    "intent": "<intent_name>",
+    "intents": ["<intent_name>", ...],
+    "confidence": <float>,
+    "entities": {}
+}""",
+    "gu": """તમે બેન્કિંગ આસિસ્ટન્ટ માટે ઇન્ટેન્ટ ક્લાસિફાયર છો. યુઝરની વિનંતીનું વિશ્લેષણ કરો અને ઓળખો:
+1. મુખ્ય ઇન્ટેન્ટ (આમાંથી એક: check_balance, view_transactions, spending_insights, transfer_funds, make_payment, loan_inquiry, credit_inquiry, general_question)
+2. વિશ્વાસ સ્તર (0.0 થી 1.0)
+3. એન્ટિટીઝ (રકમ, તારીખ, ખાતા નંબર)
+4. વિનંતીમાં એકથી વધુ બાબતો માંગી હોય તો બધા ઇન્ટેન્ટ (મુખ્ય ઇન્ટેન્ટ પહેલા)
+
+JSON ફોર્મેટમાં જવાબ આપો:
+{
+    "intent": "<intent_name>",
+    "intents": ["<intent_name>", ...],
+    "confidence": <float>,
+    "entities": {}
+}""",
+}
+
+# Labels must stay in sync with benchmarks/stubs.py (_USER_TEXT)
+INTENT_TAIL = {
+    "en": 'User request: "{user_text}"',
+    "hi": 'उपयोगकर्ता का अनुरोध: "{user_text}"',
+    "gu": 'યુઝરની વિનંતી: "{user_text}"',
+}
+
+DIALOG_SYSTEM = {
+    "en": """You are an English banking assistant. You must ALWAYS respond ONLY in English and include all specific account details.
+
+**CRITICAL INSTRUCTIONS:**
+- Respond ONLY in English language
+- Do NOT use Hindi, Gujarati or any other language
+- MUST include ALL specific details from the account information (balance amounts, transaction details, account numbers)
+- For balance queries: State the exact balance amount
+- For transaction queries: List the recent transactions with dates, amounts, and descriptions
+- Keep the response concise but complete (2-4 sentences)
+- Be helpful and professional""",
+    "hi": """आप एक हिंदी बैंकिंग सहायक हैं। आपको हमेशा केवल हिंदी में जवाब देना है।
+
+**बहुत महत्वपूर्ण निर्देश:**
+- आपको केवल हिंदी में उत्तर देना है
+- अंग्रेजी शब्दों का बिल्कुल उपयोग न करें
+- खाता जानकारी में दी गई सभी विशिष्ट जानकारी (बैलेंस, ट्रांजेक्शन) को अपने उत्तर में शामिल करें
+- 2-3 वाक्यों में संक्षिप्त लेकिन पूर्ण उत्तर दें""",
+    "gu": """તમે એક ગુજરાતી બેન્કિંગ આસિસ્ટન્ટ છો. તમારે હંમેશા ફક્ત ગુજરાતીમાં જ જવાબ આપવાનો છે.
+
+**ખૂબ જ મહત્વપૂર્ણ સૂચનાઓ:**
+- તમારે ફક્ત ગુજરાતીમાં જવાબ આપવાનો છે
+- અંગ્રેજી શબ્દોનો બિલકુલ ઉપયોગ ન કરો
+- ખાતાની માહિતીમાં આપેલી બધી વિગતવાર માહિતી (બેલેન્સ, ટ્રાન્ઝેક્શન) તમારા જવાબમાં સામેલ કરો
+- 2-3 વાક્યોમાં સંક્ષિપ્ત પણ સંપૂર્ણ જવાબ આપો""",
+}
+
+DIALOG_TAIL = {
+    "en": """You are speaking to {user_name} in English.
+
+User's request: "{user_text}"
+Intent: {intent}
+
+Account Information:
+{context}
+
+Now respond ONLY in English with ALL the specific details:""",
+    "hi": """आप {user_name} से हिंदी में बात कर रहे हैं।
+
+उपयोगकर्ता का अनुरोध: "{user_text}"
+इंटेंट: {intent}
+
+खाता जानकारी:
+{context}
+
+अब केवल हिंदी में उत्तर दें:""",
+    "gu": """તમે {user_name} સાથે ગુજરાતીમાં વાત કરો છો.
+
+યુઝરની વિનંતી: "{user_text}"
+ઇન્ટેન્ટ: {intent}
+
+ખાતાની માહિતી:
+{context}
+
+હવે ફક્ત ગુજરાતીમાં જવાબ આપો:""",
+}
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+class PromptTemplate:
+    """Static system prefix plus a format string for the request-specific tail"""
+
+    def __init__(self, system: str, tail: str, counter: TokenCounter):
+        self.system = system
+        self.tail = tail
+        self.system_tokens = counter.count(system)
+
+
+class PromptRegistry:
+    """Prompts by (name, language), rendered within the language's token budget"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, min_context_tokens: int = PROMPT_MIN_CONTEXT_TOKENS,
+                 counter: Optional[TokenCounter] = None):
+        self.budgets = PROMPT_TOKEN_BUDGETS if budgets is None else budgets
+        self.min_context_tokens = min_context_tokens
+        self.counter = counter or TokenCounter()
+        self._templates: Dict[Tuple[str, str], PromptTemplate] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def register(self, name: str, language: str, system: str, tail: str):
+        self._templates[(name, language)] = PromptTemplate(system, tail, self.counter)
+
+    def template(self, name: str, language: str) -> PromptTemplate:
+        return self._templates.get((name, language)) or self._templates[(name, "en")]
+
+    def render(self, name: str, language: str, context_lines: Optional[List[str]] = None,
+               history_lines: Optional[List[str]] = None, documents: Optional[List[str]] = None,
+               **fields) -> Tuple[str, str]:
+        """
+        (system, human) texts for a prompt. history_lines (oldest first),
+        context_lines and documents fill {context}, trimmed by fit_context to
+        what the language budget leaves.
+        """
+        template = self.template(name, language)
+        dropped = 0
+        if context_lines is None and history_lines is None and documents is None:
+            human = template.tail.format(**fields)
+        else:
+            fixed = template.system_tokens + self.counter.count(template.tail.format(context="", **fields))
+            allowance = max(self.min_context_tokens, self.budgets.get(language, self.budgets.get("en", 0)) - fixed)
+            lines, dropped = fit_context(history_lines or [], context_lines or [], documents or [],
+                                         allowance, self.counter)
+            human = template.tail.format(context="\n".join(lines), **fields)
+
+        human_tokens = self.counter.count(human)
+        self._record(name, {
+            "calls": 1,
+            "prompt_tokens": template.system_tokens + human_tokens,
+            "static_prefix_tokens": template.system_tokens,
+            "variable_tokens": human_tokens,
+            "context_lines_trimmed": dropped,
+            "trimmed_prompts": int(dropped > 0),
+        })
+        return template.system, human
+
+    def record_usage(self, name: str, usage: Optional[Dict]):
+        """Provider-reported input tokens (LangChain usage_metadata), cached ones included"""
+        if not usage:
+            return
+        details = usage.get("input_token_details") or {}
+        self._record(name, {
+            "reported_input_tokens": usage.get("input_tokens", 0),
+            "reported_cached_tokens": details.get("cache_read", 0),
+        })
+
+    def _record(self, name: str, values: Dict[str, int]):
+        with self._lock:
+            stats = self._stats.setdefault(name, {})
+            for key, value in values.items():
+                stats[key] = stats.get(key, 0) + value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            nodes = {}
+            for name, stats in self._stats.items():
+                calls = stats.get("calls", 0)
+                nodes[name] = {**stats, "avg_prompt_tokens": round(stats.get("prompt_tokens", 0) / calls, 1)
+                               if calls else 0.0}
+        return {"tokenizer": self.counter.backend, "budgets": self.budgets, "nodes": nodes}
+
+
+def create_prompt_registry(**kwargs) -> PromptRegistry:
+    """Registry with the intent classifier and reply prompts in en/hi/gu"""
+    registry = PromptRegistry(**kwargs)
+    for language in ("en", "hi", "gu"):
+        registry.register("intent", language, INTENT_SYSTEM[language], INTENT_TAIL[language])
+        registry.register("dialog", language, DIALOG_SYSTEM[language], DIALOG_TAIL[language])
+    return registry
@@ -0,0 +1,90 @@
+"""
+Request Latency Budget
+Deadline propagation for LLM-bound work in the banking assistant graph
+
+A deadline (absolute epoch seconds) is created once per request, carried in
+BankingState["deadline"], and checked by every node before it calls the LLM.
+Calls that would overrun the remaining budget are abandoned so the node can
+switch to its deterministic fallback instead of holding the Flask worker.
+"""
+
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Total wall-clock budget for one /api/voice-banking request
+REQUEST_LATENCY_BUDGET_MS = int(os.getenv("REQUEST_LATENCY_BUDGET_MS", "8000"))
+
+# Below this remaining budget an LLM call is not even attempted
+MIN_LLM_BUDGET_MS = int(os.getenv("MIN_LLM_BUDGET_MS", "250"))
+
+# Worker threads used to run LLM calls that can be abandoned on timeout
+LLM_CALL_WORKERS = int(os.getenv("LLM_CALL_WORKERS", "16"))
+
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_CALL_WORKERS, thread_name_prefix="llm-call")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the request budget does not allow (or no longer allows) an LLM call"""
+
+
+# ============================================================================
+# DEADLINE HELPERS
+# ============================================================================
+
+def start_deadline(budget_ms: Optional[int] = None) -> float:
+    """Return the absolute deadline for a request that starts now"""
+    if budget_ms is None:
+        budget_ms = REQUEST_LATENCY_BUDGET_MS
+    return time.time() + budget_ms / 1000.0
+
+
+def remaining_ms(deadline: Optional[float]) -> Optional[float]:
+    """Milliseconds left before the deadline, or None if the request is unbounded"""
+    if deadline is None:
+        return None
+    return max(0.0, (deadline - time.time()) * 1000.0)
+
+
+def has_llm_budget(deadline: Optional[float], min_ms: int = MIN_LLM_BUDGET_MS) -> bool:
+    """True if there is enough budget left to make an LLM call worthwhile"""
+    remaining = remaining_ms(deadline)
+    return remaining is None or remaining >= min_ms
+
+
+def run_with_deadline(fn: Callable[..., Any], *args, deadline: Optional[float] = None,
+                      on_cancel: Optional[Callable[[], None]] = None, **kwargs) -> Any:
+    """
+    Run fn(*args, **kwargs) but give up once the deadline passes.
+
+    The call runs on a shared worker pool so the caller can stop waiting when
+    the budget runs out; the abandoned call finishes (or times out at the HTTP
+    client) in the background. Raises DeadlineExceeded in that case.
+
+    on_cancel is called exactly when fn will never run (too little budget, or
+    still queued at the deadline), so resources handed to fn are released by
+    fn itself or by on_cancel, never both.
+    """
+    remaining = remaining_ms(deadline)
+    if remaining is None:
+        return fn(*args, **kwargs)
+    if remaining < MIN_LLM_BUDGET_MS:
+        if on_cancel is not None:
+            on_cancel()
+        raise DeadlineExceeded(f"Only {remaining:.0f}ms of request budget left")
+
+    # Run in a copy of the caller's context so logs keep the request id
+    future = _llm_executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    try:
+        return future.result(timeout=remaining / 1000.0)
+    except FuturesTimeoutError:
+        # cancel() only succeeds for a call that has not started
+        if future.cancel() and on_cancel is not None:
+            on_cancel()
+        raise DeadlineExceeded(f"LLM call exceeded remaining budget of {remaining:.0f}ms")
@@ -0,0 +1,61 @@
+"""
+Fast Serialization
+Drop-in orjson encoder for API responses
+
+OrjsonProvider is a Flask JSON provider backed by orjson, used for every
+jsonify() response (transaction lists, user records). orjson is optional;
+without it (or with FAST_SERIALIZATION=false) the stock Flask provider is
+used unchanged.
+
+Graph checkpoints keep LangGraph's own serializer, which already packs
+channel values with msgpack (see benchmarks/serialization_benchmark.py).
+"""
+
+import os
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "true").lower() == "true"
+
+
+# ============================================================================
+# HTTP RESPONSES
+# ============================================================================
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson-backed provider. Output is compact UTF-8 with keys in insertion
+    order; types orjson does not know (Decimal, date, ...) go through
+    Flask's default conversion.
+    """
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        return self._dump_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dump_bytes(obj), mimetype=self.mimetype)
+
+    def _dump_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def install_json_provider(app) -> str:
+    """Switch the app to OrjsonProvider when available; returns the provider name"""
+    if FAST_SERIALIZATION and orjson is not None:
+        app.json = OrjsonProvider(app)
+        return "orjson"
+    return "default"
@@ -0,0 +1,160 @@
+"""
+Session Tokens
+Stateless HMAC-signed session tokens, password hashing and cached verification
+
+A token is "<claims>.<signature>": base64url JSON claims (sub, iat, exp,
+sid) and a base64url HMAC-SHA256 of them under SESSION_SECRET. Any worker
+with the secret verifies any session on its own, with no session store.
+Verified tokens are kept in an LRU, so a repeat request costs one dict
+lookup and an expiry check instead of an HMAC and a JSON decode. Tokens
+with bad signatures are never cached.
+
+Tokens cannot be revoked before they expire; keep SESSION_TTL_S short and
+rotate SESSION_SECRET to end every session at once. Passwords are stored as
+scrypt hashes ("scrypt$n$r$p$salt$hash").
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+logger = logging.getLogger("banking.auth")
+
+SESSION_SECRET = os.getenv("SESSION_SECRET")  # shared by all workers; unset = per-process key
+SESSION_TTL_S = int(os.getenv("SESSION_TTL_S", "3600"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "true").lower() == "true"
+
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+
+
+class InvalidToken(Exception):
+    """Malformed, forged or expired session token"""
+
+
+# ============================================================================
+# PASSWORDS
+# ============================================================================
+
+def hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    salt = salt or secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """Constant-time check; unknown users still pay for one hash"""
+    try:
+        _, n, r, p, salt, expected = (stored or _DUMMY_HASH).split("$")
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p))
+    except (ValueError, TypeError):
+        return False
+    return stored is not None and hmac.compare_digest(digest.hex(), expected)
+
+
+_DUMMY_HASH = hash_password(secrets.token_hex(8))
+
+
+# ============================================================================
+# TOKENS
+# ============================================================================
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class SessionTokens:
+    """Issues and verifies signed session tokens"""
+
+    def __init__(self, secret: Optional[str] = SESSION_SECRET, ttl_s: int = SESSION_TTL_S,
+                 cache_size: int = SESSION_CACHE_SIZE):
+        if not secret:
+            logger.warning("SESSION_SECRET not set: sessions end on restart and are not shared between workers")
+            secret = secrets.token_hex(32)
+        self._key = secret.encode("utf-8")
+        self.ttl_s = ttl_s
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.cache_hits = 0
+        self.verified = 0
+        self.rejected = 0
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._key, payload.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, user_id: str) -> Dict:
+        """{"token", "expires_at"} for a freshly authenticated user"""
+        now = int(time.time())
+        claims = {"sub": user_id, "iat": now, "exp": now + self.ttl_s, "sid": secrets.token_hex(8)}
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self.issued += 1
+        return {"token": f"{payload}.{self._sign(payload)}", "expires_at": claims["exp"]}
+
+    def verify(self, token: str) -> Dict:
+        """Claims of a valid token; raises InvalidToken otherwise"""
+        now = time.time()
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is not None:
+                if claims["exp"] > now:
+                    self._cache.move_to_end(token)
+                    self.cache_hits += 1
+                    return claims
+                del self._cache[token]
+
+        try:
+            payload, signature = token.split(".")
+            payload.encode("ascii"), signature.encode("ascii")
+        except (ValueError, AttributeError):
+            self._reject()
+            raise InvalidToken("Malformed token")
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            self._reject()
+            raise InvalidToken("Bad signature")
+        claims = json.loads(_b64decode(payload))
+        if claims["exp"] <= now:
+            self._reject()
+            raise InvalidToken("Token expired")
+
+        with self._lock:
+            self.verified += 1
+            self._cache[token] = claims
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def _reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            checks = self.cache_hits + self.verified
+            return {
+                "issued": self.issued,
+                "cache_hits": self.cache_hits,
+                "verified": self.verified,
+                "rejected": self.rejected,
+                "cached": len(self._cache),
+                "cache_hit_rate": round(self.cache_hits / checks, 3) if checks else 0.0,
+                "ttl_s": self.ttl_s,
+            }
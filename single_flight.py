@@ -0,0 +1,128 @@
+"""
+Single-flight Request Coalescing
+Concurrent identical calls share one in-flight computation
+
+The first caller for a key (the leader) runs the function; callers that
+arrive with the same key while it is running (followers) wait for its
+result instead of repeating the work. The result or exception is shared
+and then forgotten, so this is not a cache: a call that starts after the
+leader finishes runs again.
+
+Errors that belong to the leader rather than to the work (its own deadline
+running out, its admission being rejected) are not shared: the followers
+start over, one of them leading with its own budget.
+
+Used for account reads (dashboard load fires /api/user and
+/api/transactions together) and deterministic (temperature 0) LLM calls,
+where bursts of identical FAQ prompts would otherwise each go to the
+gateway.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+from request_budget import DeadlineExceeded
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "retry", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.retry = False  # leader failed for its own reasons; followers start over
+        self.followers = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key"""
+
+    def __init__(self, name: str, enabled: bool = SINGLE_FLIGHT_ENABLED,
+                 caller_errors: Tuple[Type[BaseException], ...] = ()):
+        self.name = name
+        self.enabled = enabled
+        self.caller_errors = caller_errors  # raised to the leader only
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.retried = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) once per key among concurrent callers.
+        Followers wait at most `timeout` seconds (their own deadline) and
+        then raise DeadlineExceeded; the leader's call is not affected.
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self.executed += 1
+                else:
+                    call.followers += 1
+                    self.coalesced += 1
+
+            if leader:
+                try:
+                    call.result = fn(*args, **kwargs)
+                except BaseException as e:
+                    if isinstance(e, self.caller_errors):
+                        call.retry = True
+                    else:
+                        call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        self._calls.pop(key, None)
+                    call.done.set()
+                return call.result
+
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not call.done.wait(remaining):
+                raise DeadlineExceeded(f"Timed out waiting for in-flight {self.name} call")
+            if call.retry:
+                with self._lock:
+                    self.retried += 1
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "retried": self.retried,
+                "coalesced_ratio": round(self.coalesced / total, 3) if total else 0.0,
+            }
+
+
+def prompt_key(llm_input: Any, *extra: Any) -> str:
+    """Stable key for a prompt string or a list of chat messages"""
+    if isinstance(llm_input, str):
+        parts = [llm_input]
+    else:
+        parts = [f"{getattr(m, 'type', type(m).__name__)}:{getattr(m, 'content', m)}" for m in llm_input]
+    digest = hashlib.sha256("\x1e".join(parts + [repr(e) for e in extra]).encode("utf-8"))
+    return digest.hexdigest()
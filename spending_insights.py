@@ -0,0 +1,217 @@
+"""
+Spending Insights
+Per-user spending aggregates maintained incrementally from the ledger
+
+Every ledger append updates running totals keyed by month, (month,
+category) and (month, merchant), so questions like "how much did I spend
+on groceries this month?" are answered with a few dict lookups instead of
+a scan of the transaction history. Debits count as spending and credits
+as income; amounts are taken as absolute values because transfers record
+debits as negative amounts.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# ============================================================================
+# CATEGORIES
+# ============================================================================
+
+# Checked in order; the first category with a matching keyword wins, so
+# specific categories come before those with generic words like "bill".
+# The same keywords are used to find the category in a user's question.
+CATEGORY_KEYWORDS: List[Tuple[str, List[str]]] = [
+    ("card_payment", ["credit card payment", "card bill", "कार्ड बिल", "કાર્ડ બિલ"]),
+    ("loan_emi", ["emi", "loan", "लोन", "લોન"]),
+    ("insurance", ["insurance", "lic", "premium", "बीमा", "વીમો"]),
+    ("health", ["pharmacy", "hospital", "medical", "medicine", "apollo", "दवा", "દવા"]),
+    ("education", ["school", "fees", "tuition", "college", "फीस", "ફી"]),
+    ("rent", ["rent", "किराया", "ભાડું"]),
+    ("groceries", ["grocery", "groceries", "big bazaar", "reliance fresh", "dmart", "supermarket",
+                   "किराना", "राशन", "કરિયાણું", "કરિયાણા"]),
+    ("dining", ["restaurant", "swiggy", "zomato", "dining", "food", "cafe", "खाना", "रेस्टोरेंट",
+                "જમવાનું", "રેસ્ટોરન્ટ"]),
+    ("utilities", ["electricity", "gas", "water", "bill", "recharge", "bescom", "बिजली", "ગેસ", "વીજળી"]),
+    ("shopping", ["amazon", "flipkart", "myntra", "electronics", "shopping", "खरीदारी", "ખરીદી"]),
+    ("transfers", ["transfer", "imps", "neft", "upi"]),
+]
+OTHER_CATEGORY = "other"
+
+_MONTH_NAMES = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6, "july": 7,
+    "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+}
+_THIS_MONTH = ["this month", "current month", "इस महीने", "આ મહિને", "આ મહિનામાં"]
+_LAST_MONTH = ["last month", "previous month", "पिछले महीने", "ગયા મહિને", "ગયા મહિનામાં"]
+_WORD = re.compile(r"\w+")
+
+
+def _keyword_pattern(keywords: List[str]) -> "re.Pattern":
+    """
+    English keywords match whole words (plurals included), so "lic" does
+    not fire on "public". Hindi and Gujarati keywords are anchored at the
+    start only: Gujarati attaches postpositions ("કરિયાણામાં"), and \\b is
+    unreliable after Devanagari/Gujarati vowel signs.
+    """
+    alternatives = []
+    english = [re.escape(k) for k in keywords if k.isascii()]
+    indic = [re.escape(k) for k in keywords if not k.isascii()]
+    if english:
+        alternatives.append(r"\b(?:%s)(?:e?s)?\b" % "|".join(english))
+    if indic:
+        alternatives.append(r"(?<!\w)(?:%s)" % "|".join(indic))
+    return re.compile("|".join(alternatives))
+
+
+_CATEGORY_PATTERNS = [(category, _keyword_pattern(keywords)) for category, keywords in CATEGORY_KEYWORDS]
+
+
+def categorize(description: str) -> str:
+    return detect_category(description) or OTHER_CATEGORY
+
+
+def merchant_of(description: str) -> str:
+    """'Amazon - Electronics' -> 'amazon'; 'Transfer to Niyati Patel' -> 'niyati patel'"""
+    name = description.split(" - ", 1)[0].strip()
+    for prefix in ("Transfer to ", "Transfer from "):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name.lower()
+
+
+def detect_category(text: str) -> Optional[str]:
+    """Category mentioned in a question, if any"""
+    text = text.lower()
+    for category, pattern in _CATEGORY_PATTERNS:
+        if pattern.search(text):
+            return category
+    return None
+
+
+def shift_month(month: str, delta: int) -> str:
+    year, number = int(month[:4]), int(month[5:7]) + delta
+    year, number = year + (number - 1) // 12, (number - 1) % 12 + 1
+    return f"{year:04d}-{number:02d}"
+
+
+def detect_period(text: str, today: Optional[date] = None) -> Optional[str]:
+    """'this month', 'last month' or a month name -> 'YYYY-MM'; None if not mentioned"""
+    text = text.lower()
+    current = (today or date.today()).strftime("%Y-%m")
+    if any(phrase in text for phrase in _LAST_MONTH):
+        return shift_month(current, -1)
+    if any(phrase in text for phrase in _THIS_MONTH):
+        return current
+    for word in _WORD.findall(text):
+        number = _MONTH_NAMES.get(word)
+        if number:
+            # A month name means its most recent occurrence
+            year = int(current[:4]) - (1 if number > int(current[5:7]) else 0)
+            return f"{year:04d}-{number:02d}"
+    return None
+
+
+# ============================================================================
+# AGGREGATES
+# ============================================================================
+
+class _Totals:
+    __slots__ = ("spent", "income", "count")
+
+    def __init__(self):
+        self.spent = 0.0
+        self.income = 0.0
+        self.count = 0
+
+    def add(self, amount: float, is_debit: bool):
+        if is_debit:
+            self.spent += amount
+        else:
+            self.income += amount
+        self.count += 1
+
+
+class SpendingAggregates:
+    """Running totals per user by month, category and merchant"""
+
+    def __init__(self):
+        self._months: Dict[str, Dict[str, _Totals]] = defaultdict(lambda: defaultdict(_Totals))
+        self._categories: Dict[str, Dict[Tuple[str, str], _Totals]] = defaultdict(lambda: defaultdict(_Totals))
+        self._merchants: Dict[str, Dict[Tuple[str, str], _Totals]] = defaultdict(lambda: defaultdict(_Totals))
+        self._merchant_names: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self._latest_month: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: str, transaction: Dict):
+        """Add one transaction; O(1). Used as a TransactionLedger listener."""
+        month = transaction["date"][:7]
+        amount = abs(float(transaction["amount"]))
+        is_debit = transaction.get("type") == "debit"
+        description = transaction.get("description", "")
+        category = categorize(description)
+        merchant = merchant_of(description)
+
+        with self._lock:
+            self._months[user_id][month].add(amount, is_debit)
+            self._categories[user_id][(month, category)].add(amount, is_debit)
+            self._merchants[user_id][(month, merchant)].add(amount, is_debit)
+            self._merchant_names[user_id].setdefault(merchant, description.split(" - ", 1)[0].strip())
+            if month > self._latest_month.get(user_id, ""):
+                self._latest_month[user_id] = month
+
+    def rebuild(self, transactions: Dict[str, List[Dict]]):
+        """One pass over existing histories (startup only)"""
+        for user_id, rows in transactions.items():
+            for row in rows:
+                self.record(user_id, row)
+
+    def latest_month(self, user_id: str) -> Optional[str]:
+        return self._latest_month.get(user_id)
+
+    def find_merchant(self, user_id: str, text: str) -> Optional[str]:
+        """Known merchant named in the question (checks 1-3 word phrases)"""
+        names = self._merchant_names.get(user_id, {})
+        words = _WORD.findall(text.lower())
+        for size in (3, 2, 1):
+            for i in range(len(words) - size + 1):
+                phrase = " ".join(words[i:i + size])
+                if phrase in names:
+                    return phrase
+        return None
+
+    def summary(self, user_id: str, month: Optional[str] = None, category: Optional[str] = None,
+                merchant: Optional[str] = None) -> Dict:
+        """
+        Spending for one month (default: the user's latest month with
+        activity), optionally narrowed to a category or merchant. The top
+        categories come from a fixed, small set, so this stays constant time.
+        """
+        month = month or self._latest_month.get(user_id) or date.today().strftime("%Y-%m")
+        with self._lock:
+            if merchant:
+                totals = self._merchants[user_id].get((month, merchant)) or _Totals()
+            elif category:
+                totals = self._categories[user_id].get((month, category)) or _Totals()
+            else:
+                totals = self._months[user_id].get(month) or _Totals()
+
+            by_category = self._categories[user_id]
+            top = sorted(
+                ((name, by_category[(month, name)].spent)
+                 for name in [c for c, _ in CATEGORY_KEYWORDS] + [OTHER_CATEGORY]
+                 if (month, name) in by_category and by_category[(month, name)].spent > 0),
+                key=lambda item: item[1], reverse=True,
+            )[:3]
+
+            return {
+                "month": month,
+                "category": category,
+                "merchant": self._merchant_names[user_id].get(merchant) if merchant else None,
+                "spent": round(totals.spent, 2),
+                "income": round(totals.income, 2),
+                "transactions": totals.count,
+                "top_categories": [{"category": name, "spent": round(spent, 2)} for name, spent in top],
+            }
@@ -0,0 +1,222 @@
+"""
+Server-side Text-to-Speech
+Offline speech synthesis for assistant replies (English, Hindi, Gujarati)
+
+Replies are built from fixed template fragments ("your current account
+balance is", greetings, closing lines) and a few variable parts (amounts,
+names). Fixed fragments are rendered once and kept as raw PCM in a phrase
+cache; only the variable parts are synthesized per request. The WAV stream
+is written segment by segment as each one becomes available, so playback
+starts as soon as the first segment is ready, and cached segments are sent
+as-is without being copied into a combined buffer.
+
+The engine is espeak-ng (offline, has en/hi/gu voices). When it is not
+installed, TTS is disabled and the frontend falls back to browser speech.
+"""
+
+import logging
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+TTS_ENABLED = os.getenv("TTS_ENABLED", "true").lower() == "true"
+TTS_BINARY = os.getenv("TTS_BINARY", "espeak-ng")
+TTS_SPEED_WPM = int(os.getenv("TTS_SPEED_WPM", "165"))
+TTS_JOB_TTL_S = int(os.getenv("TTS_JOB_TTL_S", "300"))
+TTS_MAX_JOBS = int(os.getenv("TTS_MAX_JOBS", "1000"))
+
+logger = logging.getLogger("banking.tts")
+
+SAMPLE_RATE = 22050  # espeak-ng output format: 16-bit mono PCM
+TTS_VOICES = {"en": "en-us", "hi": "hi", "gu": "gu"}
+
+# Fixed fragments of the dialog manager's templated replies
+FIXED_PHRASES = {
+    "en": [
+        "Hello", "your current account balance is", "Account number",
+        "Is there anything else I can help you with?", "here are your recent transactions",
+        "Would you like more details?", "your loan balance is", "with an interest rate of",
+        "your credit limit is", "has been transferred to", "Your new balance",
+        "Recipient account", "Success!", "Sorry",
+        "recipient not found. Please check the recipient name and try again.",
+        "insufficient balance. Your current balance is", "transfer failed. Please try again.",
+        "I'm here to help with your banking needs.", "Please log in to access your account information.",
+    ],
+    "hi": [
+        "नमस्ते", "आपका वर्तमान खाता बैलेंस", "खाता संख्या", "क्या मैं आपकी और कोई मदद कर सकता हूं?",
+        "यहां आपके हाल के लेनदेन हैं", "क्या आप और विवरण चाहते हैं?", "आपका लोन बैलेंस",
+        "और ब्याज दर", "आपकी क्रेडिट लिमिट", "आपका नया बैलेंस", "प्राप्तकर्ता खाता", "सफल!",
+        "क्षमा करें", "प्राप्तकर्ता नहीं मिला। कृपया सही नाम दोबारा जांचें।",
+        "मैं आपकी बैंकिंग जरूरतों में मदद के लिए यहां हूं।",
+        "कृपया अपनी खाता जानकारी तक पहुंचने के लिए लॉगिन करें।",
+    ],
+    "gu": [
+        "નમસ્તે", "તમારું વર્તમાન ખાતા બેલેન્સ", "ખાતા નંબર", "શું હું તમને બીજી કોઈ મદદ કરી શકું?",
+        "અહીં તમારા તાજેતરના વ્યવહારો છે", "શું તમને વધુ વિગતો જોઈએ છે?", "તમારું લોન બેલેન્સ",
+        "અને વ્યાજ દર", "તમારી ક્રેડિટ લિમિટ", "તમારું નવું બેલેન્સ", "પ્રાપ્તકર્તા ખાતું", "સફળ!",
+        "માફ કરશો", "પ્રાપ્તકર્તા મળ્યો નહીં. કૃપા કરીને સાચું નામ ફરીથી તપાસો.",
+        "હું તમારી બેન્કિંગ જરૂરિયાતોમાં મદદ કરવા અહીં છું.",
+        "કૃપા કરીને તમારી ખાતા માહિતી મેળવવા માટે લૉગિન કરો.",
+    ],
+}
+
+_RUPEE_WORD = {"en": "rupees", "hi": "रुपये", "gu": "રૂપિયા"}
+_RUPEE_AMOUNT = re.compile(r"₹\s*([\d,]+(?:\.\d+)?)")
+_NON_SPEECH = re.compile(r"[✅❌⚠️🔍🤖]")
+_PUNCT_ONLY = re.compile(r"^[\s\W]*$")
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+def _pcm_from_wav(wav: bytes) -> bytes:
+    """Strip the RIFF header; espeak-ng writes an unsized header on stdout"""
+    index = wav.find(b"data")
+    return wav[index + 8:] if index >= 0 else b""
+
+
+class EspeakEngine:
+    """espeak-ng subprocess producing raw 16-bit PCM"""
+
+    def __init__(self, binary: str = TTS_BINARY, speed_wpm: int = TTS_SPEED_WPM):
+        self.binary = shutil.which(binary)
+        self.speed_wpm = speed_wpm
+
+    @property
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        voice = TTS_VOICES.get(language, TTS_VOICES["en"])
+        # Text goes on stdin, never argv: replies echo payee names and user
+        # input, and a leading "-" would be parsed as an option (e.g. -w FILE)
+        result = subprocess.run(
+            [self.binary, "-v", voice, "-s", str(self.speed_wpm), "--stdout", "--stdin"],
+            input=text.encode("utf-8"), capture_output=True, check=True, timeout=10,
+        )
+        return _pcm_from_wav(result.stdout)
+
+
+def wav_stream_header(sample_rate: int = SAMPLE_RATE) -> bytes:
+    """WAV header with 'unknown' sizes so the body can be streamed"""
+    unknown = 0xFFFFFFFF
+    return (b"RIFF" + struct.pack("<I", unknown) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+            + b"data" + struct.pack("<I", unknown))
+
+
+# ============================================================================
+# PHRASE CACHE AND SEGMENT PLANNING
+# ============================================================================
+
+def normalize_for_speech(text: str, language: str) -> str:
+    """Make amounts and symbols speakable"""
+    rupees = _RUPEE_WORD.get(language, _RUPEE_WORD["en"])
+    text = _RUPEE_AMOUNT.sub(lambda m: f"{m.group(1).replace(',', '')} {rupees}", text)
+    return _NON_SPEECH.sub("", text)
+
+
+class SpeechSynthesizer:
+    """Plans replies into cached/variable segments and streams synthesized audio"""
+
+    def __init__(self, engine: Optional[EspeakEngine] = None, phrases: Dict[str, List[str]] = FIXED_PHRASES):
+        self.engine = engine or EspeakEngine()
+        self.phrases = phrases
+        self._phrase_pcm: Dict[Tuple[str, str], bytes] = {}
+        self._patterns = {
+            language: re.compile("|".join(re.escape(p) for p in sorted(items, key=len, reverse=True)))
+            for language, items in phrases.items()
+        }
+        self._jobs: "OrderedDict[str, Tuple[float, str, List[Tuple[str, bool]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cached_segments = 0
+        self.synthesized_segments = 0
+
+    @property
+    def available(self) -> bool:
+        return TTS_ENABLED and self.engine.available
+
+    def prerender(self):
+        """Render every fixed phrase once (run in the background at startup)"""
+        for language, items in self.phrases.items():
+            for phrase in items:
+                if (language, phrase) not in self._phrase_pcm:
+                    try:
+                        self._phrase_pcm[(language, phrase)] = self.engine.synthesize(phrase, language)
+                    except Exception as e:
+                        logger.warning("Could not pre-render TTS phrase '%s': %s", phrase, e)
+        logger.info("Pre-rendered %d TTS phrases", len(self._phrase_pcm))
+
+    def plan(self, text: str, language: str) -> List[Tuple[str, bool]]:
+        """Split a reply into (text, is_fixed_phrase) segments"""
+        text = normalize_for_speech(text, language)
+        pattern = self._patterns.get(language)
+        if pattern is None:
+            return [(text.strip(), False)] if text.strip() else []
+
+        segments, position = [], 0
+        for match in pattern.finditer(text):
+            variable = text[position:match.start()]
+            if not _PUNCT_ONLY.match(variable):
+                segments.append((variable.strip(" ,:;"), False))
+            segments.append((match.group(0), True))
+            position = match.end()
+        tail = text[position:]
+        if not _PUNCT_ONLY.match(tail):
+            segments.append((tail.strip(" ,:;"), False))
+        return segments
+
+    def stream(self, segments: List[Tuple[str, bool]], language: str) -> Iterator[bytes]:
+        """Yield a streamable WAV: header first, then one PCM block per segment"""
+        yield wav_stream_header()
+        for text, fixed in segments:
+            pcm = self._phrase_pcm.get((language, text)) if fixed else None
+            if pcm is None:
+                pcm = self.engine.synthesize(text, language)
+                self.synthesized_segments += 1
+                if fixed:
+                    self._phrase_pcm[(language, text)] = pcm
+            else:
+                self.cached_segments += 1
+            yield pcm
+
+    # Jobs let the graph return a URL immediately; audio is produced when fetched
+
+    def create_job(self, text: str, language: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            while self._jobs and (len(self._jobs) >= TTS_MAX_JOBS
+                                  or next(iter(self._jobs.values()))[0] < now - TTS_JOB_TTL_S):
+                self._jobs.popitem(last=False)
+            self._jobs[job_id] = (now, language, self.plan(text, language))
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Tuple[str, List[Tuple[str, bool]]]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job[0] < time.time() - TTS_JOB_TTL_S:
+            return None
+        return job[1], job[2]
+
+    def stats(self) -> Dict:
+        return {
+            "available": self.available,
+            "phrases_cached": len(self._phrase_pcm),
+            "phrase_cache_bytes": sum(len(pcm) for pcm in list(self._phrase_pcm.values())),
+            "pending_jobs": len(self._jobs),
+            "cached_segments_served": self.cached_segments,
+            "synthesized_segments": self.synthesized_segments,
+        }
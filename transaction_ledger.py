@@ -0,0 +1,338 @@
+"""
+Transaction Ledger
+Per-account transaction history in columnar, NumPy-backed storage
+
+Each account keeps its transactions in chronological order as parallel
+arrays instead of a list of dicts:
+
+    dates        int64   seconds since the epoch
+    amounts      int64   absolute amount in paise (fixed point, no float drift)
+    balances     int64   balance after the transaction, in paise
+    directions   int8    +1 credit / -1 debit
+    categories   int16   interned spending category code
+    descriptions int32   interned description id
+
+That is 31 bytes per transaction, against roughly a kilobyte for a dict
+of boxed floats and strings. Range queries, running balances, statements
+and group-bys run as vectorized array operations. Dicts are built only
+for the rows that are actually returned.
+
+A row's 1-based position in the arrays is its sequence number (the oldest
+row is 1). Rows are only appended, so sequence numbers are stable, and
+cursors are built from them so pages do not shift when new transactions
+arrive. Every append bumps the account version, which the API uses as the
+ETag for conditional GETs. Listeners, such as the spending aggregates,
+are notified so derived data never needs a rescan.
+"""
+
+import base64
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from spending_insights import CATEGORY_KEYWORDS, OTHER_CATEGORY, categorize
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+TRANSACTION_FIELDS = ("id", "date", "type", "amount", "description", "balance")
+TRANSACTION_TYPES = ("credit", "debit")
+CATEGORIES = [name for name, _ in CATEGORY_KEYWORDS] + [OTHER_CATEGORY]
+_CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+_INITIAL_CAPACITY = 16
+_DAY = 86400
+
+
+class InvalidQuery(ValueError):
+    """Bad cursor, filter or field list"""
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(f"s{seq}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        if not raw.startswith("s"):
+            raise ValueError(raw)
+        return int(raw[1:])
+    except ValueError:
+        raise InvalidQuery("Invalid cursor")
+
+
+def to_seconds(value: str) -> int:
+    """'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS' -> epoch seconds (naive dates, stored as UTC)"""
+    fmt = "%Y-%m-%d %H:%M:%S" if len(value) > 10 else "%Y-%m-%d"
+    try:
+        return int(datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        raise InvalidQuery(f"Invalid date: {value}")
+
+
+def from_seconds(seconds: int) -> str:
+    seconds = int(seconds)
+    moment = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%d" if seconds % _DAY == 0 else "%Y-%m-%d %H:%M:%S")
+
+
+def to_paise(amount) -> int:
+    return int(round(float(amount) * 100))
+
+
+# ============================================================================
+# COLUMNAR STORAGE
+# ============================================================================
+
+class AccountColumns:
+    """Append-only column arrays for one account, grown by doubling"""
+
+    COLUMNS = (("dates", np.int64), ("amounts", np.int64), ("balances", np.int64),
+               ("directions", np.int8), ("categories", np.int16), ("descriptions", np.int32))
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        self.size = 0
+        self.sorted = True  # dates non-decreasing, so date ranges can be binary searched
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+
+    def column(self, name: str) -> np.ndarray:
+        """View of the filled part of a column"""
+        return self._columns[name][:self.size]
+
+    def append(self, **values: int):
+        if self.size == len(self._columns["dates"]):
+            for name, array in self._columns.items():
+                grown = np.empty(len(array) * 2, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                self._columns[name] = grown
+        if self.size and values["dates"] < self._columns["dates"][self.size - 1]:
+            self.sorted = False
+        for name, value in values.items():
+            self._columns[name][self.size] = value
+        self.size += 1
+
+    def date_slice(self, start: Optional[int], end: Optional[int], upto: int) -> Tuple[int, int]:
+        """Row range [lo, hi) within the first `upto` rows that can hold dates in [start, end)"""
+        if not self.sorted:
+            return 0, upto
+        dates = self._columns["dates"][:upto]
+        lo = int(np.searchsorted(dates, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(dates, end, side="left")) if end is not None else upto
+        return lo, max(lo, hi)
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._columns.values())
+
+
+class TransactionLedger:
+    """Versioned columnar transaction histories keyed by user id"""
+
+    def __init__(self, transactions: Dict[str, List[Dict]]):
+        self._accounts: Dict[str, AccountColumns] = {}
+        self._versions: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._descriptions: List[str] = []
+        self._description_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Versions restart with the process; the epoch keeps ETags from
+        # an earlier process from matching
+        self.epoch = uuid.uuid4().hex[:8]
+
+        # Seed lists are newest first
+        for user_id, rows in transactions.items():
+            account = self._accounts[user_id] = AccountColumns(max(_INITIAL_CAPACITY, len(rows)))
+            for row in reversed(rows):
+                self._store(account, row)
+
+    def subscribe(self, listener: Callable[[str, Dict], None]):
+        """Call listener(user_id, transaction) after every append, outside the ledger lock"""
+        self._listeners.append(listener)
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def etag(self, user_id: str) -> str:
+        return f"{self.epoch}-{self.version(user_id)}"
+
+    def has_account(self, user_id: str) -> bool:
+        return user_id in self._accounts
+
+    def _intern(self, description: str) -> int:
+        code = self._description_ids.get(description)
+        if code is None:
+            code = self._description_ids[description] = len(self._descriptions)
+            self._descriptions.append(description)
+        return code
+
+    def _store(self, account: AccountColumns, row: Dict):
+        description = row.get("description", "")
+        account.append(
+            dates=to_seconds(row["date"]),
+            amounts=abs(to_paise(row["amount"])),
+            balances=to_paise(row.get("balance", 0)),
+            directions=1 if row.get("type") == "credit" else -1,
+            categories=_CATEGORY_CODES[categorize(description)],
+            descriptions=self._intern(description),
+        )
+
+    def append(self, user_id: str, transaction: Dict):
+        """Record a new (latest) transaction and bump the account version"""
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None:
+                account = self._accounts[user_id] = AccountColumns()
+            self._store(account, transaction)
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+        # Listeners (audit, cache invalidation) must not stall readers and writers
+        for listener in self._listeners:
+            listener(user_id, transaction)
+
+    def _row(self, account: AccountColumns, index: int, fields: Iterable[str]) -> Dict:
+        row = {}
+        for name in fields:
+            if name == "id":
+                row[name] = index + 1
+            elif name == "date":
+                row[name] = from_seconds(account.column("dates")[index])
+            elif name == "type":
+                row[name] = "credit" if account.column("directions")[index] > 0 else "debit"
+            elif name == "description":
+                row[name] = self._descriptions[account.column("descriptions")[index]]
+            else:  # amount, balance
+                row[name] = int(account.column(f"{name}s")[index]) / 100
+        return row
+
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+
+    def recent(self, user_id: str, limit: int = 5) -> List[Dict]:
+        """Latest transactions as dicts, newest first"""
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None:
+                return []
+            return [self._row(account, index, TRANSACTION_FIELDS[1:])
+                    for index in range(account.size - 1, max(-1, account.size - 1 - limit), -1)]
+
+    def page(self, user_id: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             date_from: Optional[str] = None, date_to: Optional[str] = None,
+             txn_type: Optional[str] = None, min_amount: Optional[float] = None,
+             max_amount: Optional[float] = None,
+             fields: Optional[Iterable[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of matching transactions, newest first, and the cursor for
+        the next page (None on the last page). Date bounds are inclusive
+        days; amount bounds apply to the absolute amount.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if txn_type is not None and txn_type not in TRANSACTION_TYPES:
+            raise InvalidQuery(f"type must be one of: {', '.join(TRANSACTION_TYPES)}")
+        fields = tuple(fields) if fields else TRANSACTION_FIELDS
+        unknown = set(fields) - set(TRANSACTION_FIELDS)
+        if unknown:
+            raise InvalidQuery(f"Unknown fields: {', '.join(sorted(unknown))}")
+        start = to_seconds(date_from[:10]) if date_from else None
+        end = to_seconds(date_to[:10]) + _DAY if date_to else None
+
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None:
+                return [], None
+            # The cursor is the sequence number of the newest row not yet returned
+            upto = max(0, min(decode_cursor(cursor), account.size)) if cursor else account.size
+            lo, hi = account.date_slice(start, end, upto)
+
+            mask = np.ones(hi - lo, dtype=bool)
+            if not account.sorted:
+                dates = account.column("dates")[lo:hi]
+                if start is not None:
+                    mask &= dates >= start
+                if end is not None:
+                    mask &= dates < end
+            if txn_type:
+                mask &= account.column("directions")[lo:hi] == (1 if txn_type == "credit" else -1)
+            amounts = account.column("amounts")[lo:hi]
+            if min_amount is not None:
+                mask &= amounts >= to_paise(min_amount)
+            if max_amount is not None:
+                mask &= amounts <= to_paise(max_amount)
+
+            matches = np.flatnonzero(mask)[::-1][:limit + 1] + lo
+            items = [self._row(account, int(index), fields) for index in matches[:limit]]
+            next_cursor = encode_cursor(int(matches[limit]) + 1) if len(matches) > limit else None
+        return items, next_cursor
+
+    def running_balances(self, user_id: str, opening: float = 0.0) -> np.ndarray:
+        """Balance after each transaction (paise, chronological) from an opening balance"""
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None:
+                return np.empty(0, dtype=np.int64)
+            signed = account.column("amounts") * account.column("directions")
+        return to_paise(opening) + np.cumsum(signed)
+
+    def statement(self, user_id: str, days: int = 30, end: Optional[str] = None) -> Optional[Dict]:
+        """
+        Totals over the `days` days ending at `end` (default: the latest
+        transaction), with per-category debit totals from one bincount.
+        """
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None or account.size == 0:
+                return None
+            end_s = to_seconds(end[:10]) + _DAY if end else int(account.column("dates").max()) + 1
+            start_s = end_s - days * _DAY
+            lo, hi = account.date_slice(start_s, end_s, account.size)
+            dates = account.column("dates")[lo:hi]
+            in_range = (dates >= start_s) & (dates < end_s)
+            amounts = account.column("amounts")[lo:hi][in_range]
+            debits = account.column("directions")[lo:hi][in_range] < 0
+            categories = account.column("categories")[lo:hi][in_range]
+            balances = account.column("balances")[lo:hi][in_range]
+            closing = int(balances[-1]) if len(balances) else None
+
+        by_category = np.bincount(categories[debits], weights=amounts[debits], minlength=len(CATEGORIES))
+        order = np.argsort(by_category)[::-1]
+        return {
+            "from": from_seconds(start_s - start_s % _DAY),
+            "to": from_seconds((end_s - 1) - (end_s - 1) % _DAY),
+            "transactions": int(len(amounts)),
+            "credits": int(amounts[~debits].sum()) / 100,
+            "debits": int(amounts[debits].sum()) / 100,
+            "closing_balance": closing / 100 if closing is not None else None,
+            "top_categories": [{"category": CATEGORIES[code], "spent": float(by_category[code]) / 100}
+                               for code in order[:3] if by_category[code] > 0],
+        }
+
+    def monthly_totals(self, user_id: str) -> Dict[str, Dict[str, float]]:
+        """Credits and debits grouped by YYYY-MM"""
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None or account.size == 0:
+                return {}
+            months = account.column("dates").astype("datetime64[s]").astype("datetime64[M]")
+            signed = account.column("amounts") * account.column("directions")
+        keys, inverse = np.unique(months, return_inverse=True)
+        credits = np.bincount(inverse, weights=np.where(signed > 0, signed, 0))
+        debits = np.bincount(inverse, weights=np.where(signed < 0, -signed, 0))
+        return {str(key): {"credits": float(credits[i]) / 100, "debits": float(debits[i]) / 100}
+                for i, key in enumerate(keys)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            rows = sum(account.size for account in self._accounts.values())
+            column_bytes = sum(account.nbytes() for account in self._accounts.values())
+            return {
+                "accounts": len(self._accounts),
+                "transactions": rows,
+                "column_bytes": column_bytes,
+                "bytes_per_transaction": round(column_bytes / rows, 1) if rows else 0.0,
+                "interned_descriptions": len(self._descriptions),
+            }
@@ -0,0 +1,204 @@
+"""
+Transcription Cache
+Content-addressed cache of ASR results keyed by (audio hash, language, model)
+
+Retries and duplicate uploads of the same clip skip ASR entirely. The memory
+tier is an LRU bounded by both entry count and approximate bytes; an optional
+disk tier (TRANSCRIPTION_CACHE_DIR) survives restarts and is shared by
+workers on the same host. The disk tier is bounded by total bytes and file
+age, and pruned on write (least recently used files first). No-speech
+results are kept in memory only, so a retry after a restart or a VAD change
+gets a fresh look.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+logger = logging.getLogger("banking.asr")
+
+TRANSCRIPTION_CACHE_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_ENTRIES", "2048"))
+TRANSCRIPTION_CACHE_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_BYTES", str(8 * 1024 * 1024)))
+TRANSCRIPTION_CACHE_DIR = os.getenv("TRANSCRIPTION_CACHE_DIR")  # unset = memory only
+TRANSCRIPTION_CACHE_DISK_BYTES = int(os.getenv("TRANSCRIPTION_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+TRANSCRIPTION_CACHE_DISK_MAX_AGE_S = float(os.getenv("TRANSCRIPTION_CACHE_DISK_MAX_AGE_S", str(7 * 86400)))
+DISK_PRUNE_INTERVAL_S = 3600  # expired files are swept at least this often
+DISK_PRUNE_TARGET = 0.9  # prune down to this fraction of the byte limit
+
+CacheKey = Tuple[str, str, str]  # (audio sha256, language, model)
+
+
+def hash_file(path: str, chunk_size: int = 64 * 1024) -> str:
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Two-tier (memory LRU + optional disk) cache of transcription results"""
+
+    def __init__(self, max_entries: int = TRANSCRIPTION_CACHE_ENTRIES,
+                 max_bytes: int = TRANSCRIPTION_CACHE_BYTES,
+                 disk_dir: Optional[str] = TRANSCRIPTION_CACHE_DIR,
+                 disk_max_bytes: int = TRANSCRIPTION_CACHE_DISK_BYTES,
+                 disk_max_age_s: float = TRANSCRIPTION_CACHE_DISK_MAX_AGE_S):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_max_age_s = disk_max_age_s
+
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[Dict, int]]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0  # estimate between prunes; other workers write too
+        self._next_prune = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._prune_disk()
+
+    @staticmethod
+    def make_key(audio_hash: str, language: Optional[str], model: str) -> CacheKey:
+        return (audio_hash, language or "auto", model)
+
+    def _disk_path(self, key: CacheKey) -> str:
+        name = hashlib.sha256("|".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{name}.json")
+
+    def get(self, key: CacheKey) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                if time.time() - os.path.getmtime(path) > self.disk_max_age_s:
+                    raise FileNotFoundError(path)  # expired; removed by the next prune
+                with open(path, encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)  # mtime is the LRU clock for pruning
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, value: Dict):
+        self._put_memory(key, value)
+        if self.disk_dir and not value.get("no_speech"):
+            # Write-then-rename so concurrent readers never see partial files
+            data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning("Could not write transcription cache file: %s", e)
+                return
+            with self._lock:
+                self._disk_bytes += len(data)
+                due = self._disk_bytes > self.disk_max_bytes or time.time() >= self._next_prune
+            if due:
+                self._prune_disk()
+
+    def _prune_disk(self):
+        """Drop expired files, then the least recently used until under the byte limit"""
+        if not self._prune_lock.acquire(blocking=False):
+            return  # another thread is pruning
+        try:
+            now = time.time()
+            files, total, removed = [], 0, 0
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if now - stat.st_mtime > self.disk_max_age_s:
+                        removed += self._remove(entry.path)
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+            if total > self.disk_max_bytes:
+                files.sort()
+                target = self.disk_max_bytes * DISK_PRUNE_TARGET
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    removed += self._remove(path)
+                    total -= size
+            with self._lock:
+                self._disk_bytes = total
+                self._next_prune = now + DISK_PRUNE_INTERVAL_S
+                self.disk_evictions += removed
+        finally:
+            self._prune_lock.release()
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0  # already removed by another worker
+
+    def _put_memory(self, key: CacheKey, value: Dict):
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8")) + sum(len(part) for part in key)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "disk_tier": bool(self.disk_dir),
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+            }
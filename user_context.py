@@ -0,0 +1,104 @@
+"""
+User Context Cache
+Per-user account summary, transaction digest and payee index, warmed at login
+
+/api/authenticate builds the entry in the background, so the first voice
+turn after login reads the same prepared context as later turns instead of
+starting cold. Entries expire after USER_CONTEXT_TTL_S and are dropped as
+soon as the transaction ledger records a new transaction for the user
+(transfers debit the sender and credit the payee). An entry being built
+while it is invalidated is discarded rather than stored, so a stale
+balance never outlives the transfer that changed it.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from single_flight import SingleFlight
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+USER_CONTEXT_TTL_S = float(os.getenv("USER_CONTEXT_TTL_S", "900"))
+USER_CONTEXT_MAX_USERS = int(os.getenv("USER_CONTEXT_MAX_USERS", "10000"))
+
+
+class UserContextCache:
+    """TTL + LRU cache of builder(user_id) results with explicit invalidation"""
+
+    def __init__(self, builder: Callable[[str], Optional[Dict]], ttl_s: float = USER_CONTEXT_TTL_S,
+                 max_users: int = USER_CONTEXT_MAX_USERS):
+        self.builder = builder
+        self.ttl_s = ttl_s
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()  # user -> (context, expires)
+        self._generations: Dict[str, int] = {}
+        # Login warmup and the first turn often ask at the same time
+        self._flight = SingleFlight("user_context")
+        self.hits = 0
+        self.misses = 0
+        self.warmups = 0
+        self.invalidations = 0
+        self.discarded = 0
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Cached context, built on a miss; None for unknown users"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generations.get(user_id, 0)
+        return self._flight.do((user_id, generation), self._build, user_id, generation)
+
+    def warm(self, user_id: str) -> Optional[Dict]:
+        """Build (or rebuild) the user's context ahead of their first turn"""
+        with self._lock:
+            self.warmups += 1
+            generation = self._generations.get(user_id, 0)
+        return self._flight.do((user_id, generation), self._build, user_id, generation)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def _build(self, user_id: str, generation: int) -> Optional[Dict]:
+        # Callers share a build only within one generation, so nobody who
+        # arrives after an invalidation joins a build that started before it
+        context = self.builder(user_id)
+        if context is None:
+            return None
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                # Invalidated while building: serve this once, never cache it
+                self.discarded += 1
+                return context
+            self._entries[user_id] = (context, time.monotonic() + self.ttl_s)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return context
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "warmups": self.warmups,
+                "invalidations": self.invalidations,
+                "discarded_builds": self.discarded,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "ttl_s": self.ttl_s,
+            }
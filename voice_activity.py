@@ -0,0 +1,158 @@
+"""
+Voice Activity Detection
+Energy-based, NumPy-vectorized silence trimming ahead of Whisper
+
+Whisper's cost grows with audio length, so leading/trailing silence and long
+pauses are removed before transcription. Recordings without any speech are
+rejected outright, and long recordings are split into speech chunks that fit
+Whisper's 30 second window.
+
+All functions work on 16 kHz mono float32 arrays as returned by
+whisper.load_audio().
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SAMPLE_RATE = 16000
+VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))   # above the noise floor
+VAD_MIN_LEVEL_DB = float(os.getenv("VAD_MIN_LEVEL_DB", "-50"))  # absolute floor (dBFS)
+VAD_MIN_RANGE_DB = float(os.getenv("VAD_MIN_RANGE_DB", "6"))    # peak above the noise floor; less = stationary noise
+VAD_PAD_MS = int(os.getenv("VAD_PAD_MS", "200"))          # kept around speech
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "150"))
+VAD_MAX_GAP_MS = int(os.getenv("VAD_MAX_GAP_MS", "400"))  # shorter pauses are kept
+ASR_MAX_CHUNK_S = float(os.getenv("ASR_MAX_CHUNK_S", "30"))
+
+
+@dataclass
+class VadResult:
+    """Speech-only audio plus accounting of what was removed"""
+    audio: np.ndarray
+    segments: List[Tuple[int, int]] = field(default_factory=list)  # sample ranges in the original
+    original_seconds: float = 0.0
+    speech_seconds: float = 0.0
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.segments
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_seconds - self.speech_seconds
+
+    def metrics(self) -> dict:
+        return {
+            "original_seconds": round(self.original_seconds, 2),
+            "speech_seconds": round(self.speech_seconds, 2),
+            "removed_seconds": round(self.removed_seconds, 2),
+            "segments": len(self.segments),
+        }
+
+
+# ============================================================================
+# DETECTION
+# ============================================================================
+
+def frame_levels_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level in dBFS for each full frame"""
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """[start, end) frame indices of each run of True"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """Return [start, end) sample ranges that contain speech"""
+    frame_len = sample_rate * VAD_FRAME_MS // 1000
+    levels = frame_levels_db(audio, frame_len)
+    if levels.size == 0:
+        return []
+
+    # Adaptive threshold: quiet frames estimate the noise floor, the peak
+    # caps it so recordings that are almost all speech are not rejected.
+    # Hiss, hum and fans never rise far above their own floor, however much
+    # of the clip is silence, so such a recording has nothing to transcribe.
+    noise_floor = np.percentile(levels, 10)
+    peak = levels.max()
+    if peak - noise_floor < VAD_MIN_RANGE_DB:
+        return []
+    threshold = max(VAD_MIN_LEVEL_DB, min(noise_floor + VAD_MARGIN_DB, peak - VAD_MARGIN_DB))
+    voiced = levels > threshold
+
+    # Drop clicks and bumps before padding would widen them past the minimum
+    min_frames = max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+    starts, ends = _runs(voiced)
+    for s, e in zip(starts, ends):
+        if e - s < min_frames:
+            voiced[s:e] = False
+    if not voiced.any():
+        return []
+
+    # Pad speech on both sides and bridge short pauses (frame-level dilation)
+    pad = max(1, VAD_PAD_MS // VAD_FRAME_MS)
+    bridge = max(pad, VAD_MAX_GAP_MS // VAD_FRAME_MS // 2)
+    voiced = np.convolve(voiced.astype(np.int8), np.ones(2 * bridge + 1, dtype=np.int8), mode="same") > 0
+
+    starts, ends = _runs(voiced)
+    return [(int(s) * frame_len, min(len(audio), int(e) * frame_len))
+            for s, e in zip(starts, ends)]
+
+
+def trim_silence(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> VadResult:
+    """Drop non-speech audio; the result holds only the detected speech"""
+    original_seconds = len(audio) / sample_rate
+    if not VAD_ENABLED:
+        return VadResult(audio, [(0, len(audio))] if len(audio) else [], original_seconds, original_seconds)
+
+    segments = detect_speech(audio, sample_rate)
+    if not segments:
+        return VadResult(audio[:0], [], original_seconds, 0.0)
+    if len(segments) == 1:
+        start, end = segments[0]
+        speech = audio[start:end]  # view, no copy
+    else:
+        speech = np.concatenate([audio[s:e] for s, e in segments])
+    return VadResult(speech, segments, original_seconds, len(speech) / sample_rate)
+
+
+def split_for_asr(result: VadResult, sample_rate: int = SAMPLE_RATE,
+                  max_seconds: float = ASR_MAX_CHUNK_S) -> List[np.ndarray]:
+    """
+    Split trimmed speech into chunks no longer than max_seconds, cutting at
+    segment boundaries where possible so words are not split.
+    """
+    max_samples = int(max_seconds * sample_rate)
+    if len(result.audio) <= max_samples:
+        return [result.audio]
+
+    chunks, chunk_start, offset = [], 0, 0
+    for start, end in result.segments:
+        length = end - start
+        if offset + length - chunk_start > max_samples and offset > chunk_start:
+            chunks.append(result.audio[chunk_start:offset])
+            chunk_start = offset
+        offset += length
+        # A single very long segment is cut at fixed boundaries
+        while offset - chunk_start > max_samples:
+            chunks.append(result.audio[chunk_start:chunk_start + max_samples])
+            chunk_start += max_samples
+    if offset > chunk_start:
+        chunks.append(result.audio[chunk_start:offset])
+    return chunks